@@ -248,6 +248,7 @@ class SCANPLOT(param.Parameterized):
                                       label='5. Ler Campos Espaciais')
 
     fields_loaded = None
+    levels = None
     
     # method keeps on watching whether button is triggered
     @param.depends('button_get_dataset', watch=True)
@@ -267,6 +268,10 @@ class SCANPLOT(param.Parameterized):
         
         self.dataset = sc.get_dataset(data_conf, data_vars, Stats, 
                                       Exps, outDir)
+
+        # Níveis de cores de cada estatística e variável, calculados uma única vez
+        self.levels = sc.field_levels(self.dataset)
+
         self.fields_loaded = True        
 
 #    # method is watching whether model_trained is updated
@@ -321,8 +326,14 @@ class SCANPLOT(param.Parameterized):
                         name='Variables')
 
             def get_plot(file, var):
+                lv = self.levels.get((file.split('_')[0][0:4], var))
+                if lv is not None:
+                    clim = (lv['levels'][0], lv['levels'][-1])
+                else:
+                    clim = None
                 return self.dataset[file][var].hvplot(groupby='time', 
                                               colorbar=True,
+                                              clim=clim,
                                               #levels=10,
                                               coastline=True,
                                               #global_extend=True,
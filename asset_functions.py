@@ -0,0 +1,370 @@
+#! /usr/bin/env python3
+
+# SCANPLOT - Um sistema de plotagem simples para o SCANTEC
+# CC-BY-NC-SA-4.0 2022 INPE
+
+# Uso:
+# $ python asset_functions.py ~/scanplot_assets                   # baixa (se necessário) e valida os arquivos
+# $ python asset_functions.py ~/scanplot_assets --check           # apenas valida os arquivos
+# $ python asset_functions.py ~/scanplot_assets -r 110m 50m 10m   # inclui outras resoluções
+
+import os
+import sys
+import argparse
+
+import cartopy
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+
+from cartopy.io import Downloader
+from cartopy.io import shapereader
+
+# Arquivos do Natural Earth utilizados pelo SCANPLOT (categoria, nome) e resoluções padrão
+ne_features = [('physical', 'coastline'), ('physical', 'land')]
+ne_resolutions = ['110m', '50m']
+
+# Geometrias das linhas de costa já lidas neste processo (ver a função coastline_geometries)
+coastline_cache = {}
+
+# Resoluções das linhas de costa (da mais grossa para a mais fina) e limites da escolha automática da
+# resolução a partir da extensão do mapa, os mesmos de ax.coastlines() (cartopy.feature.auto_scaler):
+# 50m para extensões menores ou iguais a 50 graus e 10m para extensões menores ou iguais a 15 graus
+coastline_resolutions = ['110m', '50m', '10m']
+coastline_limits = (('50m', 50), ('10m', 15))
+
+def natural_earth_path(assetDir,resolution,category,name):
+
+    """
+    Retorna o caminho do arquivo .shp do Natural Earth no diretório assetDir (mesma estrutura
+    de diretórios utilizada pelo Cartopy).
+    """
+
+    return os.path.join(assetDir, 'shapefiles', 'natural_earth', category, 'ne_' + resolution + '_' + name + '.shp')
+
+def check_natural_earth(assetDir,resolutions=None,features=None):
+
+    """
+    check_natural_earth
+    ===================
+
+    Esta função verifica se os arquivos do Natural Earth utilizados nos mapas estão completos (.shp, .shx e .dbf)
+    e podem ser lidos a partir do diretório assetDir.
+
+    Parâmetros de entrada
+    ---------------------
+        assetDir : string com o diretório dos arquivos do Natural Earth.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        resolutions : lista com as resoluções (valor padrão: ['110m', '50m']);
+        features    : lista de tuplas (categoria, nome) (valor padrão: [('physical', 'coastline'), ('physical', 'land')]).
+
+    Resultado
+    ---------
+        Dicionário com as chaves (resolução, categoria, nome) e valores None (arquivo válido) ou
+        uma string com o problema encontrado.
+
+    Uso
+    ---
+        import asset_functions as af
+
+        problems = af.check_natural_earth('/home/user/scanplot_assets')
+    """
+
+    if resolutions is None:
+        resolutions = ne_resolutions
+
+    if features is None:
+        features = ne_features
+
+    status = {}
+
+    for resolution in resolutions:
+
+        for category, name in features:
+
+            fname = natural_earth_path(assetDir, resolution, category, name)
+
+            missing = [ext for ext in ['.shp', '.shx', '.dbf'] if not os.path.isfile(os.path.splitext(fname)[0] + ext)]
+
+            if missing:
+                status[(resolution, category, name)] = 'arquivo(s) ausente(s): ' + ', '.join(missing)
+                continue
+
+            try:
+                if next(iter(shapereader.Reader(fname).geometries()), None) is None:
+                    status[(resolution, category, name)] = 'arquivo sem geometrias'
+                else:
+                    status[(resolution, category, name)] = None
+            except Exception as e:
+                status[(resolution, category, name)] = 'erro na leitura: ' + str(e)
+
+    return status
+
+def prepare_natural_earth(assetDir,resolutions=None,features=None,download=True):
+
+    """
+    prepare_natural_earth
+    =====================
+
+    Esta função prepara o diretório assetDir com os arquivos do Natural Earth utilizados nos mapas
+    (linhas de costa e continentes), baixando os arquivos ausentes ou inválidos. Deve ser executada uma
+    única vez em uma máquina com acesso à internet; o diretório pode então ser copiado para as máquinas
+    sem acesso à internet e utilizado com a função set_natural_earth.
+
+    Parâmetros de entrada
+    ---------------------
+        assetDir : string com o diretório dos arquivos do Natural Earth.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        resolutions : lista com as resoluções (valor padrão: ['110m', '50m']);
+        features    : lista de tuplas (categoria, nome) (valor padrão: [('physical', 'coastline'), ('physical', 'land')]);
+        download    : valor Booleano para baixar os arquivos ausentes ou inválidos:
+                      * download=True (valor padrão), baixa os arquivos;
+                      * download=False, apenas valida os arquivos existentes.
+
+    Resultado
+    ---------
+        Dicionário com o resultado da validação (ver a função check_natural_earth).
+
+    Uso
+    ---
+        import asset_functions as af
+
+        problems = af.prepare_natural_earth('/home/user/scanplot_assets', resolutions=['110m', '50m', '10m'])
+    """
+
+    status = check_natural_earth(assetDir, resolutions=resolutions, features=features)
+
+    if download:
+
+        # Os arquivos são baixados diretamente para assetDir
+        config = dict(cartopy.config)
+
+        cartopy.config['data_dir'] = assetDir
+        cartopy.config['pre_existing_data_dir'] = ''
+
+        try:
+            for (resolution, category, name), problem in status.items():
+                if problem is not None:
+                    fname = natural_earth_path(assetDir, resolution, category, name)
+                    # Arquivos incompletos são removidos antes do download
+                    for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
+                        if os.path.isfile(os.path.splitext(fname)[0] + ext):
+                            os.remove(os.path.splitext(fname)[0] + ext)
+                    print('Baixando ' + os.path.basename(fname) + ' (' + problem + ')')
+                    try:
+                        shapereader.NEShpDownloader.default_downloader().path({'config': cartopy.config, 'category': category,
+                                                                               'name': name, 'resolution': resolution})
+                    except Exception as e:
+                        print('Não foi possível baixar ' + os.path.basename(fname) + ': ' + str(e))
+        finally:
+            cartopy.config.update(config)
+
+        status = check_natural_earth(assetDir, resolutions=resolutions, features=features)
+
+    return status
+
+class OfflineDownloader(Downloader):
+
+    """
+    Downloader do Cartopy que não acessa a internet: os arquivos ausentes resultam em erro imediato,
+    no lugar de uma tentativa de download que pode bloquear a plotagem até o fim do tempo limite.
+    """
+
+    def acquire_resource(self,target_path,format_dict):
+        raise IOError('O arquivo ' + str(target_path) + ' do Natural Earth não está disponível e o download está ' +
+                      'desabilitado (prepare o diretório com a função prepare_natural_earth).')
+
+def set_natural_earth(assetDir,offline=True,check=True):
+
+    """
+    set_natural_earth
+    =================
+
+    Esta função configura o Cartopy para utilizar os arquivos do Natural Earth do diretório assetDir
+    (preparado com a função prepare_natural_earth). A variável de ambiente CARTOPY_DATA_DIR também é
+    definida, de forma que os processos criados a partir deste (ex.: plot_fields com workers > 1) utilizam
+    o mesmo diretório.
+
+    Parâmetros de entrada
+    ---------------------
+        assetDir : string com o diretório dos arquivos do Natural Earth.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        offline : valor Booleano para desabilitar o download dos arquivos do Natural Earth:
+                  * offline=True (valor padrão), os arquivos ausentes resultam em erro imediato;
+                  * offline=False, os arquivos ausentes são baixados pelo Cartopy;
+        check   : valor Booleano para validar os arquivos das resoluções padrão (valor padrão: True).
+
+    Resultado
+    ---------
+        Dicionário com o resultado da validação (ver a função check_natural_earth) ou um dicionário
+        vazio, se check=False.
+
+    Uso
+    ---
+        import scanplot
+
+        scanplot.set_natural_earth('/home/user/scanplot_assets')
+    """
+
+    if not os.path.isdir(assetDir):
+        raise IOError('O diretório ' + str(assetDir) + ' não existe (prepare o diretório com a função prepare_natural_earth).')
+
+    status = {}
+
+    if check:
+        status = check_natural_earth(assetDir)
+        for (resolution, category, name), problem in status.items():
+            if problem is not None:
+                print('Natural Earth: ne_' + resolution + '_' + name + ' (' + category + '): ' + problem)
+
+    os.environ['CARTOPY_DATA_DIR'] = assetDir
+    cartopy.config['pre_existing_data_dir'] = assetDir
+
+    if offline:
+        ne_downloader = shapereader.NEShpDownloader.default_downloader()
+        cartopy.config['downloaders'][('shapefiles', 'natural_earth')] = OfflineDownloader(ne_downloader.url_template,
+                                                                                           ne_downloader.target_path_template,
+                                                                                           ne_downloader.pre_downloaded_path_template)
+
+    return status
+
+def coastline_geometries(resolution='110m',tolerance=None):
+
+    """
+    coastline_geometries
+    ====================
+
+    Esta função retorna as geometrias das linhas de costa do Natural Earth. Os arquivos são lidos (e as
+    geometrias são simplificadas) apenas na primeira chamada de cada processo; as chamadas seguintes
+    utilizam as geometrias em memória.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        resolution : string com a resolução ('110m' (valor padrão), '50m' ou '10m');
+        tolerance  : tolerância (em graus) da simplificação das geometrias (valor padrão: None, sem simplificação).
+
+    Resultado
+    ---------
+        Tupla com as geometrias (shapely).
+
+    Uso
+    ---
+        import asset_functions as af
+
+        geoms = af.coastline_geometries('50m', tolerance=0.1)
+    """
+
+    key = (resolution, tolerance)
+
+    if key not in coastline_cache:
+
+        fname = shapereader.natural_earth(resolution=resolution, category='physical', name='coastline')
+
+        geoms = tuple(shapereader.Reader(fname).geometries())
+
+        if tolerance is not None:
+            geoms = tuple(geom.simplify(tolerance) for geom in geoms)
+
+        coastline_cache[key] = geoms
+
+    return coastline_cache[key]
+
+def coastline_available(resolution):
+
+    """
+    Verifica se o arquivo das linhas de costa do Natural Earth na resolução indicada está disponível
+    localmente (no diretório configurado com a função set_natural_earth ou no diretório de dados do
+    Cartopy), sem download.
+    """
+
+    downloader = Downloader.from_config(('shapefiles', 'natural_earth', resolution, 'physical', 'coastline'))
+    format_dict = {'config': cartopy.config, 'category': 'physical', 'name': 'coastline', 'resolution': resolution}
+
+    pre_downloaded = downloader.pre_downloaded_path(format_dict)
+
+    return (pre_downloaded is not None and os.path.isfile(pre_downloaded)) or os.path.isfile(downloader.target_path(format_dict))
+
+def coastline_resolution(extent=None):
+
+    """
+    coastline_resolution
+    ====================
+
+    Esta função escolhe a resolução das linhas de costa a partir da extensão do mapa, com os mesmos limites
+    de ax.coastlines() (resolution='auto'), restrita às resoluções cujos arquivos estão disponíveis 
+    localmente (ex.: as preparadas com a função prepare_natural_earth). Se a resolução escolhida não 
+    estiver disponível, é utilizada a resolução disponível mais fina que não a ultrapassa (ou, se não 
+    houver, a mais grossa disponível). Se nenhum arquivo estiver disponível, a escolha é restrita às 
+    resoluções padrão (['110m', '50m']), baixadas pelo Cartopy no primeiro uso.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        extent : tupla (lon0, lon1, lat0, lat1) com a extensão do mapa (ex.: ax.get_extent(ccrs.PlateCarree()));
+                 se extent=None (valor padrão), retorna a resolução para um mapa global.
+
+    Resultado
+    ---------
+        String com a resolução ('110m', '50m' ou '10m').
+
+    Uso
+    ---
+        import asset_functions as af
+
+        resolution = af.coastline_resolution((-85, -30, -60, 15))
+    """
+
+    scale = cfeature.AdaptiveScaler(coastline_resolutions[0], coastline_limits).scale_from_extent(extent)
+
+    available = [res for res in coastline_resolutions if coastline_available(res)]
+
+    if len(available) == 0:
+        available = [res for res in coastline_resolutions if res in ne_resolutions]
+
+    coarser = [res for res in available if coastline_resolutions.index(res) <= coastline_resolutions.index(scale)]
+
+    if coarser:
+        return coarser[-1]
+    else:
+        return available[0]
+
+def coastline_feature(resolution=None,tolerance=None,extent=None):
+
+    """
+    Retorna a feição (ShapelyFeature) das linhas de costa com as geometrias em memória da função
+    coastline_geometries e o mesmo estilo de ax.coastlines(), utilizada com ax.add_feature. Se a 
+    resolução não for informada, ela é escolhida a partir da extensão do mapa extent, como em
+    ax.coastlines() (ver a função coastline_resolution).
+    """
+
+    if resolution is None:
+        resolution = coastline_resolution(extent)
+
+    return cfeature.ShapelyFeature(coastline_geometries(resolution, tolerance), ccrs.PlateCarree(),
+                                   edgecolor='black', facecolor='never')
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Prepara e valida os arquivos do Natural Earth utilizados pelo SCANPLOT.')
+    parser.add_argument('assetDir', help='diretório dos arquivos do Natural Earth')
+    parser.add_argument('-r', '--resolutions', nargs='+', default=ne_resolutions, help='resoluções (padrão: 110m 50m)')
+    parser.add_argument('--check', action='store_true', help='apenas valida os arquivos, sem baixar')
+
+    args = parser.parse_args()
+
+    status = prepare_natural_earth(args.assetDir, resolutions=args.resolutions, download=not args.check)
+
+    for (resolution, category, name), problem in sorted(status.items()):
+        print('{:<36s}{:s}'.format('ne_' + resolution + '_' + name + ' (' + category + ')', 'ok' if problem is None else problem))
+
+    if any(problem is not None for problem in status.values()):
+        sys.exit(1)
+
+    print('Utilize scanplot.set_natural_earth(' + repr(args.assetDir) + ') ou export CARTOPY_DATA_DIR=' + args.assetDir)
+
+if __name__ == '__main__':
+    main()
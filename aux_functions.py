@@ -16,13 +16,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import numpy as np
-import pandas as pd
+import re
+import threading
 
-import skill_metrics as sm
+from contextlib import contextmanager
 
-from scipy.stats import t
-from scipy.stats import ttest_ind
+import numpy as np
+import pandas as pd
 
 # Função proveniente de https://stackoverflow.com/questions/15411967/how-can-i-check-if-code-is-executed-in-the-ipython-notebook
 def isnotebook(shell):
@@ -36,6 +36,183 @@ def isnotebook(shell):
     except NameError:
         return False # Probably standard Python interpreter
 
+# Ambiente de execução, detectado uma única vez (ver a função plot_environment)
+plot_env = None
+
+def plot_environment():
+
+    """
+    plot_environment
+    ================
+
+    Esta função detecta (uma única vez por processo) o ambiente em que o SCANPLOT está sendo executado.
+
+    Resultado
+    ---------
+        String com o ambiente:
+        * 'notebook', Jupyter Notebook ou qtconsole;
+        * 'ipython', terminal do IPython;
+        * 'script', interpretador padrão do Python (ex.: scripts em lote), em que get_ipython() retorna None
+          ou o IPython não está instalado.
+
+    Uso
+    ---
+        from aux_functions import plot_environment
+
+        env = plot_environment()
+    """
+
+    global plot_env
+
+    if plot_env is None:
+
+        try:
+            from IPython import get_ipython
+            shell = get_ipython()
+        except ImportError:
+            shell = None
+
+        if shell is None:
+            plot_env = 'script'
+        elif isnotebook(shell.__class__.__name__):
+            plot_env = 'notebook'
+        else:
+            plot_env = 'ipython'
+
+    return plot_env
+
+# Backend do Matplotlib, configurado uma única vez (ver a função setup_backend)
+plot_backend = None
+backend_lock = threading.Lock()
+
+def setup_backend(showFig):
+
+    """
+    setup_backend
+    =============
+
+    Esta função configura (uma única vez por processo) o backend do Matplotlib utilizado para mostrar
+    as figuras, de acordo com o ambiente de execução (ver a função plot_environment). As figuras que
+    não são mostradas (showFig=False) são criadas fora do pyplot, com o seu próprio canvas Agg (ver a
+    função new_figure), e não dependem do backend: com showFig=False, nada é alterado.
+
+    * Jupyter Notebook: na primeira chamada com showFig=True, utiliza o backend inline (se outro backend
+      estiver em uso, ex.: Agg);
+    * terminal do IPython e scripts: mantém o backend atual.
+
+    As chamadas seguintes não alteram o backend (ex.: um backend escolhido depois pelo usuário com
+    %matplotlib widget é mantido) e, como as chamadas com showFig=False, não alteram nenhum estado
+    global, de forma que as funções de plotagem podem ser executadas simultaneamente em várias threads.
+    A configuração é feita por uma única thread (as demais aguardam a sua conclusão).
+
+    Parâmetros de entrada
+    ---------------------
+        showFig : valor Booleano para mostrar ou não as figuras.
+
+    Resultado
+    ---------
+        String com o nome do backend configurado, ou None se ainda não foi configurado (showFig=False).
+
+    Uso
+    ---
+        from aux_functions import setup_backend
+
+        setup_backend(showFig=True)
+    """
+
+    global plot_backend
+
+    if plot_backend is None and showFig:
+
+        with backend_lock:
+
+            if plot_backend is None:
+
+                import matplotlib as mpl
+
+                if plot_environment() == 'notebook' and 'inline' not in mpl.get_backend().lower():
+                    from IPython import get_ipython
+                    get_ipython().run_line_magic('matplotlib', 'inline')
+
+                plot_backend = mpl.get_backend()
+
+    return plot_backend
+
+class RcLock:
+
+    """
+    Trava dos rcParams do Matplotlib. As figuras são construídas e salvas simultaneamente em várias
+    threads (rc_lock.shared()), enquanto as seções que precisam alterar os rcParams (ex.: a plotagem
+    do SkillMetrics, ver a função plot_dTaylor) são executadas uma de cada vez e sem outras figuras
+    em andamento (rc_lock.exclusive()), de forma que as alterações não são vistas pelas demais figuras.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.readers = 0
+
+    @contextmanager
+    def shared(self):
+        with self.cond:
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.readers -= 1
+                if self.readers == 0:
+                    self.cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        # A trava da condição é mantida durante toda a seção, bloqueando as novas figuras
+        with self.cond:
+            self.cond.wait_for(lambda: self.readers == 0)
+            yield
+
+rc_lock = RcLock()
+
+def new_figure(showFig=False,**kwargs):
+
+    """
+    new_figure
+    ==========
+
+    Esta função cria a figura utilizada pelas funções de plotagem. Com showFig=False, a figura
+    (matplotlib.figure.Figure) é criada com o seu próprio canvas Agg, fora do pyplot: não é registrada
+    no gerenciador de figuras do pyplot (não é necessário fechá-la com plt.close) e pode ser utilizada
+    simultaneamente com outras figuras em várias threads. Com showFig=True, a figura é criada pelo pyplot,
+    para que possa ser mostrada.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        showFig : valor Booleano para mostrar ou não a figura (valor padrão: False);
+        kwargs  : argumentos da figura (ex.: figsize=(8,5)).
+
+    Resultado
+    ---------
+        Objeto matplotlib.figure.Figure.
+
+    Uso
+    ---
+        from aux_functions import new_figure
+
+        fig = new_figure(figsize=(8,5))
+        ax = fig.add_subplot()
+    """
+
+    if showFig:
+        import matplotlib.pyplot as plt
+        return plt.figure(**kwargs)
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+
+    return fig
+
 def concat_tables_and_loc(dTable,dataInicial,dataFinal,Exps,Var,series):
 
     """
@@ -47,7 +224,8 @@ def concat_tables_and_loc(dTable,dataInicial,dataFinal,Exps,Var,series):
     
     Parâmetros de entrada
     ---------------------
-        dTable      : objeto dicionário com uma ou mais tabelas do SCANTEC;
+        dTable      : objeto dicionário com uma ou mais tabelas do SCANTEC ou dataframe no formato 
+                      longo (get_dataframe com tidy=True), caso em que a seleção é feita pelo índice;
         dataInicial : objeto datetime com a data inicial do experimento;
         dataFinal   : objeto datetime com a data final do experimento;
         Exps        : lista com os nomes das estatísticas a serem processadas;
@@ -77,6 +255,10 @@ def concat_tables_and_loc(dTable,dataInicial,dataFinal,Exps,Var,series):
         varlev_exps = scanplot.concat_tables_and_loc(dTable,dataInicial,dataFinal,Exps,Var,series=False)
     """
     
+    # Dataframe no formato longo: as séries são obtidas por meio de consultas ao índice
+    if isinstance(dTable, pd.DataFrame):
+        return loc_long_table(dTable,dataInicial,dataFinal,Exps,Var,series)
+
     datai_fmt = dataInicial.strftime("%Y%m%d%H")
     dataf_fmt = dataFinal.strftime("%Y%m%d%H")
 
@@ -107,6 +289,59 @@ def concat_tables_and_loc(dTable,dataInicial,dataFinal,Exps,Var,series):
         
     return varlev_exps
 
+def loc_long_table(dLong,dataInicial,dataFinal,Exps,Var,series):
+
+    """
+    loc_long_table
+    ==============
+
+    Esta função é equivalente à função concat_tables_and_loc, mas utiliza um dataframe no formato
+    longo (ver tables_to_long) e seleciona as séries por meio do índice, sem concatenar tabelas.
+
+    Parâmetros de entrada
+    ---------------------
+        dLong       : dataframe no formato longo com as tabelas do SCANTEC;
+        dataInicial : objeto datetime com a data inicial do experimento;
+        dataFinal   : objeto datetime com a data final do experimento;
+        Exps        : lista com os nomes dos experimentos;
+        Var         : nome da variável na tabela de correlação de anomalia do SCANTEC (ex.: 'psnm:000');
+        series      : valor Booleano para selecionar as tabelas dos dias dentro do período.
+
+    Resultado
+    ---------
+        Lista com as séries das variáveis e experimentos escolhidos.
+
+    Uso
+    ---
+        import scanplot
+
+        dLong = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir,series=True,tidy=True)
+
+        varlev_dia_exps = scanplot.concat_tables_and_loc(dLong,dataInicial,dataFinal,Exps,Var,series=True)
+    """
+
+    variable, level = (re.split(r'[:-]', str(Var), maxsplit=1) + [''])[0:2]
+
+    acor = dLong.xs(('ACOR', variable.lower(), level), level=('stat', 'variable', 'level'))['value']
+
+    varlev_exps = []
+
+    for exp in Exps:
+
+        acor_exp = acor.xs(str(exp), level='exp')
+
+        starts = pd.DatetimeIndex(acor_exp.index.get_level_values('period_start'))
+        ends = pd.DatetimeIndex(acor_exp.index.get_level_values('period_end'))
+
+        if series:
+            mask = (starts == ends) & (starts >= dataInicial) & (starts <= dataFinal)
+        else:
+            mask = (starts == dataInicial) & (ends == dataFinal)
+
+        varlev_exps.append(pd.Series(acor_exp[mask].to_numpy(), name=str(Var)))
+
+    return varlev_exps
+
 def df_fill_nan(varlev_exps,varlev_dia_exps):
     
     """
@@ -206,6 +441,10 @@ def calc_tStudent(lst_varlev_dia_exps_rsp):
         
         ldrom_exp, ldrosup_exp, ldroinf_exp = scanplot.calc_tStudent(lst_varlev_dia_exps_rsp)
     """
+
+    # O scipy.stats é importado apenas no primeiro uso da função
+    from scipy.stats import t
+    from scipy.stats import ttest_ind
     
     lst_drom_exp = []
     lst_drosup_exp = []
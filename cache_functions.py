@@ -0,0 +1,573 @@
+#! /usr/bin/env python3
+
+# SCANPLOT - Um sistema de plotagem simples para o SCANTEC
+# CC-BY-NC-SA-4.0 2022 INPE
+
+import re
+import os
+import json
+import ntpath
+import hashlib
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+import xarray as xr
+
+# Nomes dos arquivos do cache (dentro do diretório cacheDir); as tabelas são armazenadas 
+# em uma ou mais partes (uma nova parte é escrita a cada atualização incremental)
+table_store = 'scantec_tables-{:04d}.parquet'
+table_manifest = 'scantec_tables.json'
+field_manifest = 'scantec_fields.json'
+
+# Manifesto das figuras (dentro do diretório figDir) e versão das figuras, incluída nos hashes
+# (deve ser incrementada quando uma alteração nas funções de plotagem mudar as figuras)
+figure_manifest = 'scanplot_figures.json'
+figure_version = 1
+
+def source_signature(fname):
+
+    """
+    source_signature
+    ================
+
+    Esta função retorna a assinatura de um arquivo do SCANTEC, utilizada para verificar se
+    o conteúdo armazenado no cache ainda é válido.
+
+    Parâmetros de entrada
+    ---------------------
+        fname : string com o caminho completo do arquivo.
+
+    Resultado
+    ---------
+        Dicionário com o tamanho ('size', em bytes) e a data de modificação ('mtime_ns', em
+        nanossegundos) do arquivo.
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        sig = cf.source_signature("ACORGFS_20200601002020081500T.scan")
+    """
+
+    st = os.stat(fname)
+
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def is_valid(entry,fname,**kwargs):
+
+    """
+    is_valid
+    ========
+
+    Esta função verifica se a entrada do manifesto do cache corresponde ao arquivo fname,
+    comparando o tamanho, a data de modificação e os parâmetros adicionais informados.
+
+    Parâmetros de entrada
+    ---------------------
+        entry  : dicionário com a entrada do manifesto (ou None);
+        fname  : string com o caminho completo do arquivo;
+        kwargs : parâmetros adicionais que devem coincidir com os da entrada (ex.: parser='fast').
+
+    Resultado
+    ---------
+        Valor Booleano indicando se a entrada é válida.
+    """
+
+    if entry is None:
+        return False
+
+    try:
+        sig = source_signature(fname)
+    except OSError:
+        return False
+
+    if entry.get('size') != sig['size'] or entry.get('mtime_ns') != sig['mtime_ns']:
+        return False
+
+    for key in kwargs:
+        if entry.get(key) != kwargs[key]:
+            return False
+
+    return True
+
+def read_manifest(cacheDir,name):
+
+    """
+    Lê o manifesto name do diretório cacheDir (retorna um dicionário vazio se o manifesto não existir).
+    """
+
+    fname = os.path.join(cacheDir, name)
+
+    if not os.path.exists(fname):
+        return {}
+
+    try:
+        with open(fname, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_manifest(cacheDir,name,manifest):
+
+    """
+    Escreve o manifesto name no diretório cacheDir (a escrita é feita em um arquivo temporário
+    exclusivo de cada chamada, que depois substitui o manifesto anterior, de forma que vários
+    processos podem escrever no mesmo diretório).
+    """
+
+    fname = os.path.join(cacheDir, name)
+
+    with tempfile.NamedTemporaryFile('w', dir=cacheDir, prefix=name + '.', suffix='.tmp', delete=False) as f:
+        json.dump(manifest, f)
+
+    try:
+        os.replace(f.name, fname)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+def read_table_manifest(cacheDir):
+
+    """
+    read_table_manifest
+    ===================
+
+    Esta função lê apenas o manifesto do cache das tabelas do SCANTEC, sem ler as tabelas.
+
+    Parâmetros de entrada
+    ---------------------
+        cacheDir : string com o diretório do cache.
+
+    Resultado
+    ---------
+        Dicionário em que as chaves são os nomes das tabelas armazenadas no cache e os valores 
+        são as suas entradas no manifesto (assinatura, leitor, esquema, parte e linhas).
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        manifest = cf.read_table_manifest(cacheDir)
+    """
+
+    cache = read_manifest(cacheDir, table_manifest)
+
+    if not cache:
+        return {}
+
+    return cache['tables']
+
+def load_table_cache(cacheDir,names=None):
+
+    """
+    load_table_cache
+    ================
+
+    Esta função lê o cache das tabelas do SCANTEC (arquivos Parquet e manifesto).
+
+    Parâmetros de entrada
+    ---------------------
+        cacheDir : string com o diretório do cache.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        names : lista com os nomes das tabelas a serem lidas (se não for informada, todas as 
+                tabelas do cache são lidas); apenas as partes que contêm estas tabelas são lidas.
+
+    Resultado
+    ---------
+        Tupla com o manifesto (dicionário com as assinaturas de cada tabela) e o dicionário 
+        com os dataframes armazenados no cache.
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        manifest, ds_table = cf.load_table_cache(cacheDir)
+    """
+
+    cache = read_manifest(cacheDir, table_manifest)
+
+    if not cache:
+        return {}, {}
+
+    schemas = cache['schemas']
+    manifest = cache['tables']
+
+    if names is not None:
+        manifest = {table: manifest[table] for table in names if table in manifest}
+
+    ds_table = {}
+
+    for part in sorted(set(manifest[table]['part'] for table in manifest)):
+
+        fname = os.path.join(cacheDir, table_store.format(part))
+
+        try:
+            store = pd.read_parquet(fname)
+        except (ImportError, OSError, ValueError) as e:
+            print("Não foi possível ler o cache " + fname + ": " + str(e))
+            return {}, {}
+
+        # As colunas de cada esquema (colunas e tipos) são convertidas uma única vez, considerando
+        # apenas as linhas das tabelas com aquele esquema
+        for ischema, (columns, dtypes) in enumerate(schemas):
+            tables = [table for table in manifest 
+                      if manifest[table]['part'] == part and manifest[table]['schema'] == ischema]
+            if len(tables) == 0:
+                continue
+
+            rows = np.concatenate([np.arange(*manifest[table]['rows']) for table in tables])
+            block = store.iloc[rows]
+            arrays = [block[col].to_numpy(dtype=dtype) for col, dtype in zip(columns, dtypes)]
+
+            start = 0
+            for table in tables:
+                end = start + manifest[table]['rows'][1] - manifest[table]['rows'][0]
+                ds_table[table] = pd.DataFrame({col: arr[start:end] for col, arr in zip(columns, arrays)})
+                start = end
+
+    # Mantém a ordem das tabelas do manifesto
+    manifest = {table: manifest[table] for table in manifest if table in ds_table}
+    ds_table = {table: ds_table[table] for table in manifest}
+
+    return manifest, ds_table
+
+def save_table_cache(cacheDir,manifest,ds_table,append=False):
+
+    """
+    save_table_cache
+    ================
+
+    Esta função escreve o cache das tabelas do SCANTEC em arquivos Parquet, acompanhados
+    de um manifesto com as assinaturas dos arquivos de origem, as colunas e os tipos de cada tabela.
+
+    Parâmetros de entrada
+    ---------------------
+        cacheDir : string com o diretório do cache;
+        manifest : dicionário com as assinaturas das tabelas (ver source_signature);
+        ds_table : dicionário com os dataframes das tabelas do SCANTEC.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        append : valor Booleano para acrescentar as tabelas ao cache existente:
+                 * append=False (valor padrão), reescreve o cache apenas com as tabelas de ds_table;
+                 * append=True, escreve as tabelas de ds_table em uma nova parte e mantém as demais
+                   tabelas do cache (o custo da escrita depende apenas do número de tabelas novas).
+
+    Resultado
+    ---------
+        Valor Booleano indicando se o cache foi escrito.
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        cf.save_table_cache(cacheDir, manifest, ds_table)
+    """
+
+    os.makedirs(cacheDir, exist_ok=True)
+
+    cache = read_manifest(cacheDir, table_manifest)
+
+    if append and cache:
+        schemas = {json.dumps(schema): ischema for ischema, schema in enumerate(cache['schemas'])}
+        entries = cache['tables']
+        part = max([entries[table]['part'] for table in entries] + [-1]) + 1
+    else:
+        schemas = {}
+        entries = {}
+        part = 0
+
+    frames = []
+    nrows = 0
+
+    for table in ds_table:
+        df = ds_table[table]
+        key = json.dumps([[str(col) for col in df.columns], [str(dtype) for dtype in df.dtypes]])
+        if key not in schemas:
+            schemas[key] = len(schemas)
+        entry = dict(manifest[table])
+        entry['schema'] = schemas[key]
+        entry['part'] = part
+        entry['rows'] = [nrows, nrows + len(df)]
+        entries[table] = entry
+        frames.append(df)
+        nrows = nrows + len(df)
+
+    if len(frames) == 0:
+        return False
+
+    store = pd.concat(frames, axis=0, ignore_index=True, sort=False)
+
+    fname = os.path.join(cacheDir, table_store.format(part))
+
+    try:
+        store.to_parquet(fname + '.tmp', index=False)
+    except ImportError as e:
+        print("Não foi possível escrever o cache " + fname + ": " + str(e))
+        return False
+
+    os.replace(fname + '.tmp', fname)
+
+    schemas = sorted(schemas, key=schemas.get)
+    write_manifest(cacheDir, table_manifest, {'schemas': [json.loads(key) for key in schemas], 'tables': entries})
+
+    # Remove as partes que deixaram de ser utilizadas
+    parts = set(entries[table]['part'] for table in entries)
+    for name in os.listdir(cacheDir):
+        match = re.match(r'^scantec_tables-(\d{4})\.parquet$', name)
+        if match and int(match.group(1)) not in parts:
+            os.remove(os.path.join(cacheDir, name))
+
+    return True
+
+def field_store(cacheDir,fname):
+
+    """
+    Retorna o caminho do arquivo NetCDF do cache correspondente ao arquivo binário fname.
+    """
+
+    return os.path.join(cacheDir, ntpath.basename(str(fname)) + '.nc')
+
+def load_field_cache(cacheDir,fname,manifest=None):
+
+    """
+    load_field_cache
+    ================
+
+    Esta função lê do cache o dataset correspondente a um arquivo binário do SCANTEC, se o
+    arquivo não tiver sido modificado desde a escrita do cache.
+
+    Parâmetros de entrada
+    ---------------------
+        cacheDir : string com o diretório do cache;
+        fname    : string com o caminho completo do arquivo binário do SCANTEC.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        manifest : dicionário com o manifesto do cache dos campos (se não for informado,
+                   o manifesto é lido do diretório cacheDir).
+
+    Resultado
+    ---------
+        Dataset com os campos do arquivo ou None, se o cache não existir ou não for válido.
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        ds = cf.load_field_cache(cacheDir, "ACORGFS_20200601002020081500F.scan")
+    """
+
+    if manifest is None:
+        manifest = read_manifest(cacheDir, field_manifest)
+
+    name = ntpath.basename(str(fname))
+    store = field_store(cacheDir, fname)
+
+    if not is_valid(manifest.get(name), fname) or not os.path.exists(store):
+        return None
+
+    try:
+        return xr.load_dataset(store)
+    except (ImportError, OSError, ValueError) as e:
+        print("Não foi possível ler o cache " + store + ": " + str(e))
+        return None
+
+def save_field_cache(cacheDir,fname,ds,manifest=None):
+
+    """
+    save_field_cache
+    ================
+
+    Esta função escreve no cache o dataset correspondente a um arquivo binário do SCANTEC,
+    em um arquivo NetCDF comprimido e organizado em blocos de um tempo por variável.
+
+    Parâmetros de entrada
+    ---------------------
+        cacheDir : string com o diretório do cache;
+        fname    : string com o caminho completo do arquivo binário do SCANTEC;
+        ds       : dataset com os campos do arquivo.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        manifest : dicionário com o manifesto do cache dos campos (é atualizado e escrito em disco).
+
+    Resultado
+    ---------
+        Valor Booleano indicando se o cache foi escrito.
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        cf.save_field_cache(cacheDir, "ACORGFS_20200601002020081500F.scan", ds)
+    """
+
+    os.makedirs(cacheDir, exist_ok=True)
+
+    if manifest is None:
+        manifest = read_manifest(cacheDir, field_manifest)
+
+    store = field_store(cacheDir, fname)
+
+    encoding = {}
+    for var in ds.data_vars:
+        encoding[var] = {'zlib': True, 'complevel': 4, 'chunksizes': (1,) + ds[var].shape[1:]}
+
+    try:
+        ds.to_netcdf(store + '.tmp', encoding=encoding)
+    except ValueError:
+        # Backends sem suporte à compressão (ex.: scipy) escrevem o arquivo sem compressão
+        try:
+            ds.to_netcdf(store + '.tmp')
+        except (ImportError, ValueError) as e:
+            print("Não foi possível escrever o cache " + store + ": " + str(e))
+            return False
+    except ImportError as e:
+        print("Não foi possível escrever o cache " + store + ": " + str(e))
+        return False
+
+    os.replace(store + '.tmp', store)
+
+    manifest[ntpath.basename(str(fname))] = source_signature(fname)
+    write_manifest(cacheDir, field_manifest, manifest)
+
+    return True
+
+def content_hash(*data,**params):
+
+    """
+    content_hash
+    ============
+
+    Esta função calcula o hash do conteúdo dos dados e dos parâmetros utilizados em uma figura,
+    registrado no manifesto das figuras (ver a classe FigureManifest).
+
+    Parâmetros de entrada
+    ---------------------
+        data   : dataframes, séries ou arrays com os dados da figura;
+        params : parâmetros da figura (ex.: título, nomes dos eixos e estilos das linhas).
+
+    Resultado
+    ---------
+        String com o hash (SHA-1, hexadecimal).
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        key = cf.content_hash(df.loc[:,['uvel:500', '%Previsao']], title='Vento Zonal @ 500 hPa [m/s]')
+    """
+
+    h = hashlib.sha1(str(figure_version).encode())
+
+    for obj in data:
+        if isinstance(obj, pd.DataFrame):
+            h.update(json.dumps([str(col) for col in obj.columns]).encode())
+            h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        elif isinstance(obj, pd.Series):
+            h.update(str(obj.name).encode())
+            h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        else:
+            arr = np.asarray(obj)
+            if arr.dtype == object:
+                h.update(json.dumps(arr.tolist(), default=str).encode())
+            else:
+                h.update(json.dumps([str(arr.dtype), arr.shape]).encode())
+                h.update(np.ascontiguousarray(arr).tobytes())
+
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+
+    return h.hexdigest()
+
+# Trava da escrita dos manifestos das figuras (chamadas simultâneas em várias threads)
+figure_lock = threading.Lock()
+
+class FigureManifest:
+
+    """
+    FigureManifest
+    ==============
+
+    Esta classe mantém o manifesto das figuras do diretório figDir (arquivo scanplot_figures.json),
+    com o hash dos dados e dos parâmetros de cada figura salva (ver a função content_hash). Nas
+    execuções seguintes, uma figura é plotada novamente apenas se o seu hash mudou ou se o arquivo
+    da figura não existe, de forma que o custo de uma nova execução depende apenas do número de
+    figuras alteradas.
+
+    Parâmetros de entrada
+    ---------------------
+        figDir : string com o diretório das figuras.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        force : valor Booleano para plotar todas as figuras, independentemente do manifesto
+                (valor padrão: False); os hashes das figuras são atualizados.
+
+    Uso
+    ---
+        import cache_functions as cf
+
+        figs = cf.FigureManifest(figDir)
+
+        key = cf.content_hash(df, title=title)
+
+        if not figs.is_current(fig_name, key):
+            fig.savefig(os.path.join(figDir, fig_name))
+            figs.update(fig_name, key)
+
+        figs.save()
+    """
+
+    def __init__(self,figDir,force=False):
+
+        self.figDir = figDir
+        self.force = force
+        self.manifest = read_manifest(figDir, figure_manifest)
+        self.changed = {}
+
+    def is_current(self,fig_name,key):
+
+        """
+        Verifica se a figura fig_name existe e foi salva com o hash key.
+        """
+
+        if self.force:
+            return False
+
+        if self.manifest.get(fig_name) != key:
+            return False
+
+        return os.path.isfile(os.path.join(self.figDir, fig_name))
+
+    def update(self,fig_name,key):
+
+        """
+        Registra o hash key da figura fig_name (salva em disco pelo método save).
+        """
+
+        self.manifest[fig_name] = key
+        self.changed[fig_name] = key
+
+    def save(self):
+
+        """
+        Escreve o manifesto, mantendo as entradas das figuras salvas por outras chamadas (ex.: em
+        outras threads) desde a sua leitura.
+        """
+
+        if not self.changed:
+            return
+
+        with figure_lock:
+            manifest = read_manifest(self.figDir, figure_manifest)
+            manifest.update(self.changed)
+            write_manifest(self.figDir, figure_manifest, manifest)
+
+        self.changed = {}
+
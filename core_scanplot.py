@@ -175,6 +175,155 @@ def read_namelists(basepath,**kwargs):
     else:
         return VarsLevs, Confs
 
+def read_ctl(fname):
+
+    """
+    read_ctl
+    ========
+
+    Esta função lê um arquivo descritor do GrADS (.ctl) que acompanha os arquivos binários do SCANTEC
+    e retorna a geometria dos campos (dimensões, coordenadas, tempos, variáveis, valor indefinido e
+    ordem dos bytes).
+
+    Parâmetros de entrada
+    ---------------------
+        fname : string com o caminho completo do arquivo descritor (.ctl).
+
+    Resultado
+    ---------
+        Dicionário com as chaves:
+            dset       : string com o nome do arquivo binário (com o prefixo ^ substituído pelo diretório do .ctl);
+            undef      : valor indefinido;
+            byteorder  : '<' (little_endian), '>' (big_endian) ou None (não informado);
+            sequential : valor Booleano indicando se o arquivo é sequencial do Fortran (com marcadores);
+            yrev       : valor Booleano indicando se as latitudes estão em ordem decrescente;
+            xdef, ydef, zdef, tdef : número de pontos em cada dimensão;
+            lons, lats : arrays com as longitudes e latitudes;
+            times      : DatetimeIndex com os tempos;
+            vars       : lista com os nomes das variáveis;
+            nrecs      : número de registros (variáveis e níveis) por tempo.
+
+    Uso
+    ---
+        import scanplot
+
+        ctl = scanplot.read_ctl("ACORGFS_20200601002020081500F.ctl")
+    """
+
+    with open(fname, 'r') as f:
+        lines = [line.strip() for line in f if line.strip() and not line.strip().startswith('*')]
+
+    ctl = {'dset': None, 'undef': None, 'byteorder': None, 'sequential': False, 'yrev': False, 
+           'zdef': 1, 'vars': [], 'nrecs': 0}
+
+    # Valores das dimensões definidas com 'levels' podem continuar nas linhas seguintes
+    def dim_values(tokens, n, k):
+        if tokens[2].lower() == 'linear':
+            return float(tokens[3]) + float(tokens[4]) * np.arange(n)
+        values = tokens[3:]
+        while len(values) < n:
+            k += 1
+            values = values + lines[k].split()
+        return np.array(values[:n], dtype=float)
+
+    k = 0
+
+    while k < len(lines):
+
+        tokens = lines[k].split()
+        key = tokens[0].lower()
+
+        if key == 'dset':
+            dset = lines[k].split(None, 1)[1]
+            if dset.startswith('^'):
+                dset = os.path.join(os.path.dirname(fname), dset[1:])
+            ctl['dset'] = dset
+
+        elif key == 'undef':
+            ctl['undef'] = float(tokens[1])
+
+        elif key == 'options':
+            for opt in [opt.lower() for opt in tokens[1:]]:
+                if opt == 'big_endian':
+                    ctl['byteorder'] = '>'
+                elif opt == 'little_endian':
+                    ctl['byteorder'] = '<'
+                elif opt == 'sequential':
+                    ctl['sequential'] = True
+                elif opt == 'yrev':
+                    ctl['yrev'] = True
+
+        elif key == 'xdef':
+            ctl['xdef'] = int(tokens[1])
+            ctl['lons'] = dim_values(tokens, ctl['xdef'], k)
+
+        elif key == 'ydef':
+            ctl['ydef'] = int(tokens[1])
+            ctl['lats'] = dim_values(tokens, ctl['ydef'], k)
+
+        elif key == 'zdef':
+            ctl['zdef'] = int(tokens[1])
+
+        elif key == 'tdef':
+            ctl['tdef'] = int(tokens[1])
+            ctl['times'] = ctl_times(tokens[3], tokens[4], ctl['tdef'])
+
+        elif key == 'vars':
+            nvars = int(tokens[1])
+            for line in lines[k + 1:k + 1 + nvars]:
+                var = line.split()
+                ctl['vars'].append(var[0])
+                ctl['nrecs'] += max(1, int(var[1]))
+            k += nvars
+
+        k += 1
+
+    for key in ['xdef', 'ydef', 'tdef']:
+        if key not in ctl:
+            raise Exception('O arquivo ' + str(fname) + ' não define ' + key + '.')
+
+    if ctl['yrev']:
+        ctl['lats'] = ctl['lats'][::-1]
+
+    return ctl
+
+def ctl_times(start,incr,tdef):
+
+    """
+    Converte a data inicial (ex.: 00Z01JUN2020) e o incremento (ex.: 24hr, 1dy, 1mo) da linha tdef 
+    de um arquivo descritor do GrADS em um DatetimeIndex com tdef tempos.
+    """
+
+    match = re.match(r'^(?:(\d{1,2})(?::(\d{2}))?Z)?(\d{1,2})?([A-Za-z]{3})(\d{4})$', start, re.IGNORECASE)
+
+    if match is None:
+        raise Exception('Data inicial do tdef inválida: ' + start)
+
+    hour, minute, day, month, year = match.groups()
+
+    t0 = datetime.strptime(month.capitalize() + ' ' + year, '%b %Y').replace(day=int(day or 1), hour=int(hour or 0), 
+                                                                             minute=int(minute or 0))
+
+    match = re.match(r'^(\d+)(mn|hr|dy|mo|yr)$', incr, re.IGNORECASE)
+
+    if match is None:
+        raise Exception('Incremento do tdef inválido: ' + incr)
+
+    n, unit = int(match.group(1)), match.group(2).lower()
+
+    if unit == 'mn':
+        freq = timedelta(minutes=n)
+    elif unit == 'hr':
+        freq = timedelta(hours=n)
+    elif unit == 'dy':
+        freq = timedelta(days=n)
+    elif unit == 'mo':
+        freq = pd.DateOffset(months=n)
+    else:
+        freq = pd.DateOffset(years=n)
+
+    return pd.date_range(t0, periods=tdef, freq=freq)
+
 def dummy(**kwargs): 
 
     """
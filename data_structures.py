@@ -7,6 +7,8 @@ import global_variables as gvars
 
 import re
 import os
+import io
+import time
 import ntpath
 
 import numpy as np
@@ -15,134 +17,1847 @@ import pandas as pd
 from datetime import date, datetime, timedelta
 
 import xarray as xr
-import cartopy.crs as ccrs
 
-import pickle as pk
+from xarray.backends import BackendArray
+from xarray.core import indexing
 
-from scipy.io import FortranFile
+import cache_functions as cf
+
+from functools import partial
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+class DataoutIndex:
+
+    """
+    DataoutIndex
+    ============
+
+    Esta classe lista uma única vez o diretório com os resultados do SCANTEC e mantém em memória
+    as informações contidas nos nomes das tabelas e dos arquivos binários (estatística, experimento,
+    datas inicial e final, tipo e extensão). As consultas sobre a existência de um arquivo são 
+    respondidas sem novos acessos ao sistema de arquivos.
+
+    Parâmetros de entrada
+    ---------------------
+        outDir : string com o diretório com as tabelas e os arquivos binários do SCANTEC.
+
+    Atributos
+    ---------
+        outDir  : string com o diretório indexado;
+        entries : dicionário em que as chaves são as tuplas (stat, exp, start, end, kind, ext)
+                  e os valores são os nomes dos arquivos, onde kind é 'T' (tabelas) ou 'F' (campos)
+                  e ext é 'scan' ou 'scam'.
+
+    Uso
+    ---
+        import scanplot
+
+        data_vars, data_conf = scanplot.read_namelists("~/SCANTEC")
+
+        outDir = data_conf["Output directory"]
+
+        dIndex = scanplot.DataoutIndex(outDir)
+
+        Exps = dIndex.exps(kind='T')
+        Stats = dIndex.stats(kind='T')
+        Periods = dIndex.periods(kind='T')
+
+        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir,index=dIndex)
+    """
+
+    # Padrão dos nomes dos arquivos do SCANTEC: STAT + EXP + '_' + data inicial + data final + tipo + '.' + extensão
+    pattern = re.compile(r'^(?P<stat>[A-Z]{4})(?P<exp>.+)_(?P<start>\d{10})(?P<end>\d{10})(?P<kind>[TF])\.(?P<ext>scan|scam)$')
+
+    def __init__(self,outDir):
+        self.outDir = outDir
+        self.refresh()
+
+    def refresh(self):
+
+        """
+        Lista novamente o diretório outDir e reconstrói o índice.
+        """
+
+        self.entries = {}
+
+        with os.scandir(self.outDir) as it:
+            for entry in it:
+                match = self.pattern.match(entry.name)
+                if match:
+                    self.entries[match.groups()] = entry.name
+
+    @classmethod
+    def parse(cls,fname):
+
+        """
+        Retorna a tupla (stat, exp, start, end, kind, ext) a partir do nome de um arquivo do SCANTEC
+        ou None, se o nome não seguir o padrão do SCANTEC.
+        """
+
+        match = cls.pattern.match(ntpath.basename(str(fname)))
+
+        if match:
+            return match.groups()
+        else:
+            return None
+
+    @classmethod
+    def name(cls,key):
+
+        """
+        Retorna o nome do arquivo do SCANTEC correspondente à tupla (stat, exp, start, end, kind, ext).
+        """
+
+        return str(key[0]) + str(key[1]) + '_' + str(key[2]) + str(key[3]) + str(key[4]) + '.' + str(key[5])
+
+    def lookup(self,stat,exp,start,end,kind='T',ext='scan'):
+
+        """
+        Retorna o caminho completo do arquivo correspondente ou None, se o arquivo não existir.
+        As datas podem ser objetos datetime ou strings no formato YYYYMMDDHH.
+        """
+
+        if isinstance(start, (date, datetime)):
+            start = start.strftime('%Y%m%d%H')
+        if isinstance(end, (date, datetime)):
+            end = end.strftime('%Y%m%d%H')
+
+        fname = self.entries.get((str(stat), str(exp), start, end, kind, ext))
+
+        if fname is None:
+            return None
+        else:
+            return os.path.join(self.outDir, fname)
+
+    def select(self,stat=None,exp=None,start=None,end=None,kind=None,ext=None):
+
+        """
+        Retorna a lista ordenada das chaves (stat, exp, start, end, kind, ext) que satisfazem 
+        os filtros informados (os filtros iguais a None são ignorados).
+        """
+
+        filters = (stat, exp, start, end, kind, ext)
+
+        return sorted(key for key in self.entries
+                      if all(f is None or f == k for f, k in zip(filters, key)))
+
+    def stats(self,**kwargs):
+
+        """
+        Retorna a lista das estatísticas disponíveis.
+        """
+
+        return sorted(set(key[0] for key in self.select(**kwargs)))
+
+    def exps(self,**kwargs):
+
+        """
+        Retorna a lista dos experimentos disponíveis.
+        """
+
+        return sorted(set(key[1] for key in self.select(**kwargs)))
+
+    def periods(self,**kwargs):
+
+        """
+        Retorna a lista dos períodos (data inicial, data final) disponíveis.
+        """
+
+        return sorted(set((key[2], key[3]) for key in self.select(**kwargs)))
+
+    def files(self,**kwargs):
+
+        """
+        Retorna a lista dos caminhos completos dos arquivos que satisfazem os filtros informados.
+        """
+
+        return [os.path.join(self.outDir, self.entries[key]) for key in self.select(**kwargs)]
+
+def read_table(table,dataframe=True,content=None):
+
+    """
+    read_table
+    ==========
+
+    Esta função lê uma tabela do SCANTEC (ex.: %Previsao psnm:000 temp:850 ...) considerando o seu
+    formato fixo: uma linha de cabeçalho seguida pelas linhas com os valores numéricos. O conteúdo
+    do arquivo é lido de uma só vez, o cabeçalho é interpretado uma única vez e o bloco numérico é 
+    convertido em um único array float32 do NumPy.
+
+    Parâmetros de entrada
+    ---------------------
+        table : string com o caminho completo da tabela do SCANTEC.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        dataframe : valor Booleano para construir ou não um dataframe com a tabela:
+                    * dataframe=True (valor padrão), retorna um dataframe (a coluna %Previsao é inteira);
+                    * dataframe=False, retorna a lista com os nomes das colunas e o array float32 com os valores;
+        content   : bytes com o conteúdo da tabela, caso o arquivo já tenha sido lido.
+
+    Resultado
+    ---------
+        Dataframe com a tabela do SCANTEC ou tupla com a lista de colunas e o array com os valores.
+        Se a tabela não seguir o formato fixo esperado, é levantada a exceção ValueError.
+
+    Uso
+    ---
+        import data_structures as ds
+
+        df = ds.read_table("ACORGFS_20200601002020081500T.scan")
+
+        columns, values = ds.read_table("ACORGFS_20200601002020081500T.scan", dataframe=False)
+    """
+
+    if content is None:
+        with open(table, 'rb') as f:
+            content = f.read()
+
+    header, _, body = content.partition(b'\n')
+
+    columns = header.decode().split()
+    values = np.array(body.split(), dtype=np.float32)
+
+    if len(columns) == 0 or values.size % len(columns) != 0:
+        raise ValueError('A tabela ' + str(table) + ' não possui o formato esperado.')
+
+    values = values.reshape(-1, len(columns))
+
+    if not dataframe:
+        return columns, values
+
+    df = pd.DataFrame(values, columns=columns)
+
+    # Os tempos de previsão são inteiros (ex.: 000, 024, 048, ...)
+    if columns[0] == '%Previsao':
+        df[columns[0]] = values[:, 0].astype(np.int64)
+
+    return df
+
+def read_table_timed(table,parser='pandas'):
+
+    """
+    read_table_timed
+    ================
+
+    Esta função lê uma tabela do SCANTEC e mede separadamente o tempo gasto com a leitura
+    do arquivo (sistema de arquivos) e com a transformação do seu conteúdo em dataframe.
+
+    Parâmetros de entrada
+    ---------------------
+        table  : string com o caminho completo da tabela do SCANTEC;
+        parser : string com o leitor utilizado na conversão da tabela:
+                 * parser='pandas' (valor padrão), utiliza a função read_csv do Pandas;
+                 * parser='fast', utiliza a função read_table (valores em float32); se a tabela 
+                   não seguir o formato fixo esperado, utiliza a função read_csv do Pandas.
+
+    Resultado
+    ---------
+        Tupla com o dataframe da tabela e um dicionário com os tempos (em segundos) de
+        leitura ('io'), de conversão ('parse') e total ('total').
+
+    Uso
+    ---
+        import data_structures as ds
+
+        df, tempos = ds.read_table_timed("ACORGFS_20200601002020081500T.scan")
+    """
+
+    t0 = time.perf_counter()
+
+    with open(table, 'rb') as f:
+        content = f.read()
+
+    t1 = time.perf_counter()
+
+    df = None
+
+    if parser == 'fast':
+        try:
+            df = read_table(table, content=content)
+        except ValueError:
+            df = None
+
+    if df is None:
+        df = pd.read_csv(io.BytesIO(content), sep=r"\s+")
+
+    t2 = time.perf_counter()
+
+    return df, {'io': t1 - t0, 'parse': t2 - t1, 'total': t2 - t0}
+
+def read_tables(tables,workers=None,pool='thread',parser='pandas'):
+
+    """
+    read_tables
+    ===========
+
+    Esta função lê uma lista de tabelas do SCANTEC, sequencialmente ou de forma concorrente
+    por meio de um conjunto limitado de threads ou processos.
+
+    Parâmetros de entrada
+    ---------------------
+        tables  : lista com os caminhos completos das tabelas do SCANTEC;
+        workers : número máximo de threads ou processos utilizados na leitura:
+                  * workers=None ou workers=1 (valor padrão), lê as tabelas sequencialmente;
+                  * workers=n, lê até n tabelas ao mesmo tempo;
+        pool    : string com o tipo de paralelismo utilizado quando workers > 1:
+                  * pool='thread' (valor padrão), utiliza threads (indicado quando o sistema de arquivos é o gargalo);
+                  * pool='process', utiliza processos (indicado quando a conversão das tabelas é o gargalo);
+        parser  : string com o leitor utilizado na conversão das tabelas:
+                  * parser='pandas' (valor padrão), utiliza a função read_csv do Pandas;
+                  * parser='fast', utiliza a função read_table (valores em float32).
+
+    Resultado
+    ---------
+        Dicionário com o(s) dataframe(s) com a(s) tabela(s) do SCANTEC, na mesma ordem da lista
+        tables, e dataframe com os tempos de leitura de cada tabela.
+
+    Uso
+    ---
+        import data_structures as ds
+
+        ds_table, ds_time = ds.read_tables(tables, workers=8, pool='thread')
+    """
+
+    reader = partial(read_table_timed, parser=parser)
+
+    if workers is None or workers <= 1:
+        results = map(reader, tables)
+    else:
+        if pool == 'thread':
+            executor = ThreadPoolExecutor(max_workers=workers)
+        elif pool == 'process':
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise Exception('O valor de pool deve ser \'thread\' ou \'process\'.')
+
+        # O método map preserva a ordem da lista tables
+        with executor:
+            results = list(executor.map(reader, tables))
+
+    ds_table = {}
+    ds_time = {}
+
+    for table, (df, times) in zip(tables, results):
+        ds_table[ntpath.basename(str(table))] = df
+        ds_time[ntpath.basename(str(table))] = times
+
+    ds_time = pd.DataFrame.from_dict(ds_time, orient='index', columns=['io', 'parse', 'total'])
+
+    return ds_table, ds_time
+
+def read_tables_cached(tables,cacheDir,workers=None,pool='thread',parser='pandas',incremental=False,dTable=None):
+
+    """
+    read_tables_cached
+    ==================
+
+    Esta função lê uma lista de tabelas do SCANTEC utilizando o cache em disco (Parquet).
+    As tabelas cujos arquivos não foram modificados desde a escrita do cache (mesmo nome, 
+    tamanho e data de modificação) são recuperadas do cache e apenas as tabelas novas ou 
+    modificadas são lidas novamente. O cache é atualizado ao final.
+
+    Parâmetros de entrada
+    ---------------------
+        tables   : lista com os caminhos completos das tabelas do SCANTEC;
+        cacheDir : string com o diretório do cache (ou None, para não utilizar o cache em disco).
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        workers, pool, parser : ver a função read_tables;
+        incremental : valor Booleano para a ingestão incremental das tabelas:
+                      * incremental=False (valor padrão), verifica a assinatura de todas as tabelas;
+                      * incremental=True, considera o manifesto do cache como a lista das tabelas já 
+                        ingeridas (sem verificar novamente os seus arquivos) e lê apenas as tabelas 
+                        novas, que são acrescentadas ao cache em uma nova parte;
+        dTable      : dicionário com tabelas já carregadas em memória (ex.: resultado de uma chamada 
+                      anterior da função get_dataframe); as tabelas presentes em dTable não são lidas
+                      novamente quando incremental=True.
+
+    Resultado
+    ---------
+        Dicionário com o(s) dataframe(s) com a(s) tabela(s) do SCANTEC, na mesma ordem da lista
+        tables, e dataframe com os tempos de leitura das tabelas que foram lidas.
+
+    Uso
+    ---
+        import data_structures as ds
+
+        ds_table, ds_time = ds.read_tables_cached(tables, cacheDir)
+    """
+
+    if dTable is None or not incremental:
+        dTable = {}
+
+    names = [ntpath.basename(str(table)) for table in tables]
+
+    if incremental:
+
+        # Tabelas já ingeridas (em memória ou no manifesto do cache)
+        if cacheDir is not None:
+            manifest = cf.read_table_manifest(cacheDir)
+        else:
+            manifest = {}
+
+        ingested = set(name for name in manifest if manifest[name].get('parser') == parser)
+
+        missing = [table for table, name in zip(tables, names) if name not in dTable and name not in ingested]
+
+        cached = [name for name in names if name not in dTable and name in ingested]
+
+        if len(cached) > 0:
+            manifest, ds_cache = cf.load_table_cache(cacheDir, names=cached)
+        else:
+            manifest, ds_cache = {}, {}
+
+    else:
+
+        manifest, ds_cache = cf.load_table_cache(cacheDir)
+
+        # Tabelas novas ou modificadas desde a escrita do cache
+        missing = [table for table in tables 
+                   if not cf.is_valid(manifest.get(ntpath.basename(str(table))), table, parser=parser)]
+
+    ds_read, ds_time = read_tables(missing, workers=workers, pool=pool, parser=parser)
+
+    entries = {}
+
+    for table in missing:
+        name = ntpath.basename(str(table))
+        entry = cf.source_signature(table)
+        entry['parser'] = parser
+        entries[name] = entry
+
+    if len(missing) > 0 and cacheDir is not None:
+        if incremental:
+            cf.save_table_cache(cacheDir, entries, ds_read, append=True)
+        else:
+            manifest.update(entries)
+            ds_cache.update(ds_read)
+            cf.save_table_cache(cacheDir, manifest, ds_cache)
+
+    ds_table = {}
+
+    for name in names:
+        if name in dTable:
+            ds_table[name] = dTable[name]
+        elif name in ds_read:
+            ds_table[name] = ds_read[name]
+        else:
+            ds_table[name] = ds_cache[name]
+
+    return ds_table, ds_time
+
+def tables_to_long(ds_table):
+
+    """
+    tables_to_long
+    ==============
+
+    Esta função transforma um dicionário de tabelas do SCANTEC em um único dataframe no formato 
+    longo ("tidy"), indexado por (stat, exp, period_start, period_end, lead, variable, level).
+    Os níveis do índice são categóricos e os valores são armazenados em float32, o que reduz a 
+    memória utilizada e permite selecionar as estatísticas por meio de consultas ao índice. As
+    estatísticas e os experimentos são ordenados como no dicionário e os demais níveis, em ordem
+    crescente.
+
+    Parâmetros de entrada
+    ---------------------
+        ds_table : dicionário com o(s) dataframe(s) com a(s) tabela(s) do SCANTEC, como o retornado 
+                   pela função get_dataframe (as chaves devem ser os nomes das tabelas).
+
+    Resultado
+    ---------
+        Dataframe com a coluna 'value' e o índice (stat, exp, period_start, period_end, lead, variable, level).
+        As tabelas cujos nomes não seguem o padrão do SCANTEC são ignoradas. A extensão dos nomes das
+        tabelas ('scan' ou 'scam') é mantida no atributo attrs['ext'] do dataframe.
+
+    Uso
+    ---
+        import scanplot
+
+        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir,series=True)
+
+        dLong = scanplot.tables_to_long(dTable)
+
+        # Série da ACOR da PSNM do experimento X126 para todos os dias e tempos de previsão
+        acor = dLong.xs(('ACOR', 'X126', 'psnm', '000'), level=('stat', 'exp', 'variable', 'level'))
+    """
+
+    names = ['stat', 'exp', 'period_start', 'period_end', 'lead', 'variable', 'level']
+
+    # Informações de cada tabela e de cada coluna (variável:nível)
+    tbl_keys = []
+    col_keys = {}
+
+    tbl_codes = []
+    col_codes = []
+    leads = []
+    values = []
+
+    for table in ds_table:
+        key = DataoutIndex.parse(table)
+        if key is None:
+            continue
+
+        df = ds_table[table]
+        columns = list(df.columns)
+
+        block = df.to_numpy(dtype=np.float32)[:, 1:]
+        nlead, nvar = block.shape
+
+        cols = np.array([col_keys.setdefault(col, len(col_keys)) for col in columns[1:]], dtype=np.int64)
+
+        # Os valores são organizados por tempo de previsão e, em seguida, por variável
+        tbl_codes.append(np.full(block.size, len(tbl_keys), dtype=np.int64))
+        col_codes.append(np.tile(cols, nlead))
+        leads.append(np.repeat(df[columns[0]].to_numpy(dtype=np.int64), nvar))
+        values.append(block.ravel())
+
+        tbl_keys.append(key[0:4])
+        ext = key[5]
+
+    if len(tbl_keys) == 0:
+        index = pd.MultiIndex.from_arrays([[]] * len(names), names=names)
+        return pd.DataFrame({'value': np.array([], dtype=np.float32)}, index=index)
+
+    tbl_codes = np.concatenate(tbl_codes)
+    col_codes = np.concatenate(col_codes)
+
+    tbl_keys = np.array(tbl_keys, dtype=object)
+    col_keys = [re.split(r'[:-]', str(col), maxsplit=1) + [''] for col in col_keys]
+
+    # Transforma os rótulos de cada tabela (ou coluna) em um nível categórico do índice; as estatísticas
+    # e os experimentos mantêm a ordem das tabelas (ex.: a ordem das listas Stats e Exps de get_dataframe)
+    def categorical(labels, codes, sort=True):
+        label_codes, categories = pd.factorize(labels, sort=sort)
+        return pd.Categorical.from_codes(label_codes[codes], categories)
+
+    arrays = [categorical(tbl_keys[:, 0], tbl_codes, sort=False),
+              categorical(tbl_keys[:, 1], tbl_codes, sort=False),
+              categorical(pd.to_datetime(tbl_keys[:, 2], format='%Y%m%d%H'), tbl_codes),
+              categorical(pd.to_datetime(tbl_keys[:, 3], format='%Y%m%d%H'), tbl_codes),
+              pd.Categorical(np.concatenate(leads)),
+              categorical(np.array([col[0].lower() for col in col_keys], dtype=object), col_codes),
+              categorical(np.array([col[1] for col in col_keys], dtype=object), col_codes)]
+
+    index = pd.MultiIndex.from_arrays(arrays, names=names)
+
+    dLong = pd.DataFrame({'value': np.concatenate(values)}, index=index).sort_index()
+    dLong.attrs['ext'] = ext
+
+    return dLong
+
+def table_keys(dTable,stat=None,exp=None,start=None,end=None):
+
+    """
+    table_keys
+    ==========
+
+    Esta função retorna as chaves (stat, exp, start, end, kind, ext) das tabelas do SCANTEC contidas em
+    um dicionário de tabelas (a partir dos nomes das tabelas, ver DataoutIndex.parse) ou em um dataframe
+    no formato longo (a partir do índice). As tabelas são identificadas pelos campos dos nomes, e não por
+    partes dos nomes (ex.: um experimento cujo nome é o início do nome de outro experimento).
+
+    Parâmetros de entrada
+    ---------------------
+        dTable : objeto dicionário com uma ou mais tabelas do SCANTEC ou dataframe no formato longo
+                 (get_dataframe com tidy=True).
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        stat  : string com o nome da estatística;
+        exp   : string com o nome do experimento;
+        start : string com a data inicial do período (YYYYMMDDHH);
+        end   : string com a data final do período (YYYYMMDDHH).
+        Os filtros que não forem informados são ignorados.
+
+    Resultado
+    ---------
+        Lista com as chaves das tabelas que satisfazem os filtros, na ordem do dicionário (ou do índice
+        do dataframe). As tabelas cujos nomes não seguem o padrão do SCANTEC são ignoradas.
+
+    Uso
+    ---
+        import scanplot
+
+        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir)
+
+        for key in scanplot.table_keys(dTable, stat='ACOR'):
+            df = scanplot.select_table(dTable, key)
+    """
+
+    if isinstance(dTable, pd.DataFrame):
+        ext = dTable.attrs.get('ext', gvars.tExt)
+        tables = dTable.index.droplevel(['lead', 'variable', 'level']).unique()
+        keys = [(str(s), str(e), pd.Timestamp(t0).strftime('%Y%m%d%H'), pd.Timestamp(t1).strftime('%Y%m%d%H'), 'T', ext)
+                for s, e, t0, t1 in tables]
+    else:
+        keys = [key for key in map(DataoutIndex.parse, dTable) if key is not None]
+
+    filters = (stat, exp, start, end)
+
+    return [key for key in keys if all(f is None or f == k for f, k in zip(filters, key))]
+
+def table_ext(dTable):
+
+    """
+    Retorna a extensão ('scan' ou 'scam') dos nomes das tabelas ou dos arquivos binários do SCANTEC
+    de dTable (dicionário de tabelas ou de datasets, ou dataframe no formato longo), a partir das
+    chaves (ver a função table_keys), ou o valor padrão de tExt, se dTable não contiver nomes do SCANTEC.
+    """
+
+    keys = table_keys(dTable)
+
+    if len(keys) == 0:
+        return gvars.tExt
+    else:
+        return keys[0][5]
+
+def select_table(dTable,key):
+
+    """
+    select_table
+    ============
+
+    Esta função retorna a tabela do SCANTEC correspondente a uma chave (stat, exp, start, end, kind, ext),
+    a partir de um dicionário de tabelas ou de um dataframe no formato longo (por meio de uma consulta
+    ao índice, sem concatenar tabelas).
+
+    Parâmetros de entrada
+    ---------------------
+        dTable : objeto dicionário com uma ou mais tabelas do SCANTEC ou dataframe no formato longo
+                 (get_dataframe com tidy=True);
+        key    : tupla (stat, exp, start, end, kind, ext) com a chave da tabela (ver a função table_keys).
+
+    Resultado
+    ---------
+        Dataframe com a coluna %Previsao e uma coluna por variável (ex.: 'psnm:000'), como as tabelas
+        retornadas pela função get_dataframe. A partir do dataframe no formato longo, os valores são
+        float32 e as colunas das variáveis estão em ordem alfabética. Se a tabela não existir, é
+        levantada uma exceção.
+
+    Uso
+    ---
+        import scanplot
+
+        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir,tidy=True)
+
+        key = scanplot.table_keys(dTable, stat='ACOR', exp='X126')[0]
+
+        df = scanplot.select_table(dTable, key)
+    """
+
+    if not isinstance(dTable, pd.DataFrame):
+        table = DataoutIndex.name(key)
+        if table in dTable:
+            return dTable[table]
+        for table in dTable:
+            if DataoutIndex.parse(table) == tuple(key):
+                return dTable[table]
+        raise Exception('A tabela ' + DataoutIndex.name(key) + ' não foi encontrada.')
+
+    start, end = pd.to_datetime([key[2], key[3]], format='%Y%m%d%H')
+
+    try:
+        values = dTable.xs((key[0], key[1], start, end), level=('stat', 'exp', 'period_start', 'period_end'))['value']
+    except KeyError:
+        raise Exception('A tabela ' + DataoutIndex.name(key) + ' não foi encontrada.')
+
+    # Colunas no formato das tabelas do SCANTEC (variável:nível ou variável-nível, nas versões antigas)
+    if key[5] == 'scan':
+        sep = ':'
+    else:
+        sep = '-'
+
+    table = values.unstack(['variable', 'level'])
+    table.columns = [str(var) + sep + str(lev) if str(lev) else str(var) for var, lev in table.columns]
+    table.insert(0, '%Previsao', np.asarray(table.index, dtype=np.int64))
+
+    return table.reset_index(drop=True)
+
+def compute_scorecard(dTable,Vars,Stats,Exps,**kwargs):
+
+    """
+    compute_scorecard
+    =================
+
+    Esta função calcula o "Ganho Percentual" e a "Mudança Fracional" do segundo experimento com
+    relação ao primeiro, para todas as estatísticas, variáveis e tempos de previsão de uma única vez
+    (sobre um array com as tabelas empilhadas), sem plotar os resultados. O resultado pode ser
+    armazenado, exportado ou plotado pela função plot_scorecard.
+
+    Parâmetros de entrada
+    ---------------------
+        dTable : objeto dicionário com uma ou mais tabelas do SCANTEC ou dataframe no formato longo
+                 (get_dataframe com tidy=True);
+        Vars   : lista com os nomes e níveis das variáveis;
+        Stats  : lista com os nomes das estatísticas a serem processadas;
+        Exps   : lista com os nomes dos dois experimentos (o primeiro é a referência).
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        tExt : string com o extensão dos nomes das tabelas do SCANTEC (se não for informada, é obtida a
+               partir dos nomes das tabelas de dTable, ver a função table_ext):
+               * tExt='scan', considera as tabelas do SCANTEC;
+               * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC.
+
+    Resultado
+    ---------
+        Dataframe no formato longo ("tidy") com as colunas 'ganho' (%) e 'fc' e o índice
+        (stat, ref, exp, period_start, period_end, lead, variable), em que ref e exp são o primeiro e o
+        segundo experimento e variable é o nome da coluna da tabela (ex.: 'uvel:500'). No tempo de
+        previsão inicial (lead=0), os valores podem ser indefinidos (NaN ou inf) e não são plotados
+        nos scorecards. As tabelas de cada estatística são as do primeiro período do primeiro experimento
+        e do mesmo período do segundo experimento; se alguma delas não existir, é levantada uma exceção.
+
+    Uso
+    ---
+        import scanplot
+
+        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,["EXP1", "EXP2"],outDir)
+
+        score = scanplot.compute_scorecard(dTable,Vars,Stats,["EXP1", "EXP2"])
+
+        # Ganho da ACOR do EXP2 com relação ao EXP1 (variáveis x tempos de previsão)
+        ganho = score.xs('ACOR', level='stat')['ganho'].unstack('lead')
+    """
+
+    if not len(Exps) == 2:
+        raise Exception('Para utilizar a função compute_scorecard, são necessários 2 experimentos.')
+
+    if 'tExt' in kwargs:
+        tExt = kwargs['tExt']
+    else:
+        tExt = table_ext(dTable)
+
+    # Colunas das variáveis (em ordem alfabética, como nas tabelas dinâmicas dos scorecards)
+    if tExt == 'scan':
+        list_var = sorted(set(ltuple[0].lower() for ltuple in Vars))
+    else:
+        list_var = sorted(set(ltuple[0] for ltuple in Vars))
+
+    # Chaves (stat, exp, start, end, kind, ext) das tabelas do primeiro e do segundo experimento de cada
+    # estatística, no mesmo período (ver a função table_keys)
+    pairs = []
+
+    for Stat in Stats:
+        keys1 = table_keys(dTable, stat=Stat, exp=str(Exps[0]))
+
+        if len(keys1) == 0:
+            raise Exception('A tabela ' + str(Stat) + ' do experimento ' + str(Exps[0]) + ' não foi encontrada em dTable.')
+
+        keys2 = table_keys(dTable, stat=Stat, exp=str(Exps[1]), start=keys1[0][2], end=keys1[0][3])
+
+        if len(keys2) == 0:
+            raise Exception('A tabela ' + str(Stat) + ' do experimento ' + str(Exps[1]) + ' (' + keys1[0][2] + '-' + 
+                            keys1[0][3] + ') não foi encontrada em dTable.')
+
+        pairs.append((keys1[0], keys2[0]))
+
+    tables = [[select_table(dTable, key) for key in pair] for pair in pairs]
+
+    # Tempos de previsão de todas as tabelas
+    leads = np.unique(np.concatenate([table.loc[:,"%Previsao"].to_numpy(dtype=np.int64)
+                                      for pair in tables for table in pair]))
+
+    # Array (experimento, estatística, tempo de previsão, variável) com as tabelas empilhadas;
+    # os tempos repetidos são substituídos pela média (como em pd.pivot_table)
+    data = np.empty((2, len(pairs), len(leads), len(list_var)), dtype=np.float64)
+
+    for s, pair in enumerate(tables):
+        for e, table in enumerate(pair):
+            df = table.groupby("%Previsao")[list_var].mean()
+            data[e, s] = df.reindex(leads).to_numpy(dtype=np.float64)
+
+    # Valor de referência do ganho de cada estatística (1.0 para ACOR e 0.0 para as demais)
+    ref = np.array([1.0 if Stat == "ACOR" else 0.0 for Stat in Stats])[:, None, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Porcentagem de ganho
+        ganho = ((data[1] - data[0]) / (ref - data[0])) * 100
+        # Mudança fracional
+        fc = 1.0 - (data[1] / data[0])
+
+    # Períodos das tabelas
+    periods = [(pd.to_datetime(key1[2], format='%Y%m%d%H'), pd.to_datetime(key1[3], format='%Y%m%d%H'))
+               for key1, key2 in pairs]
+
+    nstat, nlead, nvar = ganho.shape
+
+    periods = np.array(periods, dtype='datetime64[ns]').reshape(nstat, 2)
+
+    index = pd.MultiIndex.from_arrays([np.repeat(np.array(Stats, dtype=object), nlead * nvar),
+                                       np.full(ganho.size, Exps[0], dtype=object),
+                                       np.full(ganho.size, Exps[1], dtype=object),
+                                       np.repeat(periods[:, 0], nlead * nvar),
+                                       np.repeat(periods[:, 1], nlead * nvar),
+                                       np.tile(np.repeat(leads, nvar), nstat),
+                                       np.tile(np.array(list_var, dtype=object), nstat * nlead)],
+                                      names=['stat', 'ref', 'exp', 'period_start', 'period_end', 'lead', 'variable'])
+
+    return pd.DataFrame({'ganho': ganho.ravel(), 'fc': fc.ravel()}, index=index)
 
 def get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir,**kwargs):
 
     """
-    get_dataframe
+    get_dataframe
+    =============
+    
+    Esta função transforma a(s) tabela(s) do SCANTEC em dataframe(s).
+    
+    Parâmetros de entrada
+    ---------------------
+        dataInicial : objeto datetime com a data inicial do experimento;
+        dataFinal   : objeto datetime com a data final do experimento;
+        Stats       : lista com os nomes das estatísticas a serem processadas;
+        Exps        : lista com os nomes dos experimentos;
+        outDir      : string com o diretório com as tabelas do SCANTEC.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        series : valor Booleano para ler uma série temporal das tabelas do SCANTEC:
+                 * series=False (valor padrão), lê as tabelas do SCANTEC geradas para a avaliação de um período;
+                 * series=True, lê as tabelas do SCANTEC geradas para a avaliação dos dias dentro de um período;
+        tExt   : string com o extensão dos nomes das tabelas do SCANTEC:
+                 * tExt='scan' (valor padrão), considera as tabelas do SCANTEC;
+                 * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC.
+        save   : valor Booleano para utilizar o cache das tabelas em disco:
+                 * save=False (valor padrão), não utiliza o cache;
+                 * save=True, recupera do cache as tabelas que não foram modificadas (mesmo nome, tamanho e 
+                   data de modificação) e lê apenas as tabelas novas ou modificadas, atualizando o cache 
+                   (arquivo Parquet e manifesto no diretório cacheDir);
+        cacheDir : string com o diretório do cache (valor padrão: outDir/scanplot_cache);
+        incremental : valor Booleano para a ingestão incremental das tabelas (ex.: atualização diária 
+                      de uma série):
+                      * incremental=False (valor padrão), lê todas as tabelas (ou as recupera do cache);
+                      * incremental=True, lê apenas as tabelas que ainda não foram ingeridas, isto é, que
+                        não estão em dTable nem no manifesto do cache (se save=True); as tabelas novas são
+                        acrescentadas ao cache sem reescrevê-lo e as tabelas já ingeridas não são verificadas
+                        novamente;
+        dTable  : dicionário de dataframes retornado por uma chamada anterior da função (com tidy=False), 
+                  ao qual as tabelas novas são acrescentadas quando incremental=True;
+        workers : número máximo de threads ou processos utilizados na leitura das tabelas:
+                  * workers=None (valor padrão), lê as tabelas sequencialmente;
+                  * workers=n, lê até n tabelas ao mesmo tempo;
+        pool    : string com o tipo de paralelismo utilizado quando workers > 1:
+                  * pool='thread' (valor padrão), utiliza threads;
+                  * pool='process', utiliza processos;
+        timings : valor Booleano para retornar os tempos de leitura de cada tabela:
+                  * timings=False (valor padrão), não retorna os tempos de leitura;
+                  * timings=True, retorna também um dataframe com os tempos de leitura do arquivo ('io'),
+                    de conversão ('parse') e total ('total') de cada tabela, em segundos;
+        index   : objeto DataoutIndex com o índice do diretório outDir (se não for informado, 
+                  o diretório outDir é listado uma única vez no início da função);
+        parser  : string com o leitor utilizado na conversão das tabelas:
+                  * parser='pandas' (valor padrão), utiliza a função read_csv do Pandas;
+                  * parser='fast', utiliza a função read_table, que lê as tabelas considerando o seu 
+                    formato fixo e armazena os valores em float32 (mais rápido);
+        tidy    : valor Booleano para retornar as tabelas em um único dataframe no formato longo:
+                  * tidy=False (valor padrão), retorna um dicionário de dataframes;
+                  * tidy=True, retorna um único dataframe indexado por (stat, exp, period_start, period_end,
+                    lead, variable, level), com índices categóricos e valores em float32 (ver tables_to_long).
+    
+    Resultado
+    ---------
+        Dicionário com o(s) dataframe(s) com a(s) tabela(s) do SCANTEC (ou dataframe no formato longo,
+        se tidy=True). Se timings=True, retorna também o dataframe com os tempos de leitura.
+    
+    Uso
+    ---
+        import scanplot 
+        
+        data_vars, data_conf = scanplot.read_namelists("~/SCANTEC")
+        
+        dataInicial = data_conf["Starting Time"]
+        dataFinal = data_conf["Ending Time"]
+        Stats =  ["ACOR", "RMSE", "VIES"]
+        Exps = list(data_conf["Experiments"].keys())
+        outDir = data_conf["Output directory"]
+        
+        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir)
+
+        dTable, dTime = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir,series=True,
+                                               workers=16,timings=True)
+
+        # Atualização diária: lê apenas as tabelas produzidas desde a chamada anterior
+        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir,series=True,
+                                        incremental=True,dTable=dTable,save=True)
+    """
+
+    # Verifica se foram passados os argumentos opcionais e atribui os valores
+
+    if 'series' in kwargs:
+        series = kwargs['series']
+    else:
+        series = gvars.series
+
+    if 'tExt' in kwargs:
+        tExt = kwargs['tExt']
+    else:
+        tExt = gvars.tExt
+
+    if 'save' in kwargs:
+        save = kwargs['save']
+    else:
+        save = gvars.save
+
+    if 'cacheDir' in kwargs and kwargs['cacheDir'] is not None:
+        cacheDir = kwargs['cacheDir']
+    elif gvars.cacheDir is not None:
+        cacheDir = gvars.cacheDir
+    else:
+        cacheDir = os.path.join(outDir, 'scanplot_cache')
+
+    if 'incremental' in kwargs:
+        incremental = kwargs['incremental']
+    else:
+        incremental = gvars.incremental
+
+    if 'dTable' in kwargs:
+        dTable = kwargs['dTable']
+    else:
+        dTable = None
+
+    if 'workers' in kwargs:
+        workers = kwargs['workers']
+    else:
+        workers = gvars.workers
+
+    if 'pool' in kwargs:
+        pool = kwargs['pool']
+    else:
+        pool = gvars.pool
+
+    if 'timings' in kwargs:
+        timings = kwargs['timings']
+    else:
+        timings = gvars.timings
+
+    if 'index' in kwargs and kwargs['index'] is not None:
+        index = kwargs['index']
+    else:
+        index = DataoutIndex(outDir)
+
+    if 'parser' in kwargs:
+        parser = kwargs['parser']
+    else:
+        parser = gvars.parser
+
+    if 'tidy' in kwargs:
+        tidy = kwargs['tidy']
+    else:
+        tidy = gvars.tidy
+
+    # Lista com as tabelas a serem lidas (a ordem da lista define a ordem do dicionário)
+    tables = []
+    
+    if series:
+    
+        while (dataInicial <= dataFinal):
+            
+            dataInicial_fmt = dataInicial.strftime("%Y%m%d%H")
+            dataFinal_fmt = dataFinal.strftime("%Y%m%d%H")
+            
+            for stat in Stats:
+    
+                for exp in Exps:
+            
+                    table = index.lookup(stat, exp, dataInicial_fmt, dataInicial_fmt, 'T', tExt)
+
+                    if table is not None:
+                        tables.append(table)
+                        
+            dataInicial = dataInicial + timedelta(hours=24) # pegar esta informação do namelist (timedelta)   
+
+    else:
+        
+        for stat in Stats:
+                   
+            dataInicial_fmt = dataInicial.strftime("%Y%m%d%H")
+            dataFinal_fmt = dataFinal.strftime("%Y%m%d%H")
+    
+            for exp in Exps:
+            
+                table = index.lookup(stat, exp, dataInicial_fmt, dataFinal_fmt, 'T', tExt)
+
+                if table is not None:
+                    tables.append(table)
+
+    # Dicionário com o(s) dataframe(s)
+    if save or incremental:
+        if not save:
+            cacheDir = None
+        ds_table, ds_time = read_tables_cached(tables, cacheDir, workers=workers, pool=pool, parser=parser,
+                                               incremental=incremental, dTable=dTable)
+    else:
+        ds_table, ds_time = read_tables(tables, workers=workers, pool=pool, parser=parser)
+
+    # Transforma o dicionário de dataframes em um único dataframe no formato longo
+    if tidy:
+        ds_table = tables_to_long(ds_table)
+
+    if timings:
+        return ds_table, ds_time
+    else:
+        return ds_table
+
+def select_field_records(fnames,lats,lons,times,variables=None,leads=None,bbox=None,t_step=None):
+
+    """
+    select_field_records
+    ====================
+
+    Esta função converte uma seleção de variáveis, tempos e área em índices dos registros, linhas 
+    e colunas dos arquivos binários do SCANTEC.
+
+    Parâmetros de entrada
+    ---------------------
+        fnames : lista com os nomes das variáveis, na ordem em que aparecem no arquivo;
+        lats   : array com as latitudes;
+        lons   : array com as longitudes;
+        times  : lista com as datas de cada tempo do arquivo.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        variables : lista com os nomes das variáveis (ex.: ['TEMP:850', 'ZGEO:500']);
+        leads     : lista com os tempos de previsão, em horas (int, ex.: [0, 24, 72]), ou com as datas
+                    (datetime ou string) dos tempos do arquivo;
+        bbox      : tupla (lon0, lon1, lat0, lat1) com os limites da área; as longitudes podem ser 
+                    informadas entre -180 e 180 ou entre 0 e 360;
+        t_step    : timedelta com o intervalo entre os tempos (necessário se leads for dado em horas).
+
+    Resultado
+    ---------
+        Tupla (ivars, itimes, rows, cols) com os índices das variáveis, dos tempos, das latitudes (slice)
+        e das longitudes (slice ou array) selecionadas.
+
+    Uso
+    ---
+        import data_structures as ds
+
+        ivars, itimes, rows, cols = ds.select_field_records(fnames, lats, lons, times, variables=['TEMP:850'], 
+                                                            leads=[0, 72], bbox=(-85, -30, -60, 15), t_step=t_step)
+    """
+
+    if variables is None:
+        ivars = list(range(len(fnames)))
+    else:
+        ivars = []
+        for var in variables:
+            if var not in fnames:
+                raise Exception('A variável ' + str(var) + ' não foi encontrada. As variáveis disponíveis são: ' + 
+                                ', '.join(fnames) + '.')
+            ivars.append(fnames.index(var))
+
+    ntimes = len(times)
+
+    if leads is None:
+        itimes = list(range(ntimes))
+    else:
+        itimes = []
+        for lead in leads:
+            if isinstance(lead, (int, np.integer)):
+                it = int(timedelta(hours=int(lead)) / t_step)
+            else:
+                it = pd.DatetimeIndex(times).get_indexer([pd.Timestamp(lead)])[0]
+            if it < 0 or it >= ntimes:
+                raise Exception('O tempo ' + str(lead) + ' não está entre os tempos do arquivo.')
+            itimes.append(it)
+
+    if bbox is None:
+        rows = slice(None)
+        cols = slice(None)
+    else:
+        lon0, lon1, lat0, lat1 = bbox
+
+        irows = np.flatnonzero((lats >= min(lat0, lat1)) & (lats <= max(lat0, lat1)))
+
+        # Longitudes medidas a partir de lon0 (considera as áreas que cruzam o meridiano de origem)
+        if (lon1 - lon0) >= 360:
+            icols = np.arange(len(lons))
+        else:
+            icols = np.flatnonzero(((lons - lon0) % 360) <= ((lon1 - lon0) % 360))
+
+        if len(irows) == 0 or len(icols) == 0:
+            raise Exception('A área ' + str(bbox) + ' não contém pontos da grade.')
+
+        rows = slice(int(irows[0]), int(irows[-1]) + 1)
+
+        if np.all(np.diff(icols) == 1):
+            cols = slice(int(icols[0]), int(icols[-1]) + 1)
+        else:
+            cols = icols
+
+    return ivars, itimes, rows, cols
+
+def selection_key(index):
+
+    """
+    Retorna uma tupla (que pode ser utilizada como chave de um dicionário) a partir de um slice ou de 
+    um array de índices das linhas ou das colunas retornados pela função select_field_records.
+    """
+
+    if isinstance(index, slice):
+        return ('slice', index.start, index.stop, index.step)
+    else:
+        return tuple(int(i) for i in index)
+
+def field_geometry(fname,nvars,xdef,ydef,lats,lons,t0,t_step):
+
+    """
+    field_geometry
+    ==============
+
+    Esta função obtém a geometria exata de um arquivo binário do SCANTEC antes da sua leitura. Se 
+    existir o arquivo descritor do GrADS com o mesmo nome (.ctl), a geometria é lida dele (ver a função
+    read_ctl); caso contrário, a geometria do scantec.conf (xdef, ydef) é utilizada e o número de tempos
+    é obtido a partir do tamanho do arquivo. Em ambos os casos, os marcadores do primeiro e do último 
+    registros (que indicam também a ordem dos bytes) e o tamanho do arquivo são verificados, de forma que
+    os arquivos incompletos ou incompatíveis com a geometria são rejeitados antes da leitura dos campos.
+
+    Parâmetros de entrada
+    ---------------------
+        fname  : string com o caminho completo do arquivo binário do SCANTEC;
+        nvars  : número de variáveis (registros) por tempo (scantec.vars);
+        xdef   : número de pontos na direção zonal (scantec.conf);
+        ydef   : número de pontos na direção meridional (scantec.conf);
+        lats   : array com as latitudes (scantec.conf);
+        lons   : array com as longitudes (scantec.conf);
+        t0     : data do primeiro tempo (scantec.conf);
+        t_step : timedelta com o intervalo entre os tempos (scantec.conf).
+
+    Resultado
+    ---------
+        Dicionário com as chaves xdef, ydef, tdef, undef, byteorder, lats, lons, times e ctl (caminho
+        do arquivo descritor ou None). Se o arquivo estiver incompleto ou não corresponder à geometria, 
+        é gerado um IOError.
+
+    Uso
+    ---
+        import data_structures as ds
+
+        geom = ds.field_geometry(fname, nvars, xdef, ydef, lats, lons, t0, t_step)
+    """
+
+    from core_scanplot import read_ctl
+
+    ctlname = os.path.splitext(str(fname))[0] + '.ctl'
+
+    if os.path.isfile(ctlname):
+
+        ctl = read_ctl(ctlname)
+
+        if not ctl['sequential']:
+            raise IOError('O arquivo ' + str(fname) + ' não é sequencial (options sequential), formato não suportado!')
+
+        if ctl['nrecs'] != nvars:
+            raise IOError('O arquivo ' + ctlname + ' define ' + str(ctl['nrecs']) + ' registros por tempo, mas o ' + 
+                          'arquivo scantec.vars define ' + str(nvars) + ' variáveis!')
+
+        geom = {'xdef': ctl['xdef'], 'ydef': ctl['ydef'], 'tdef': ctl['tdef'], 'undef': ctl['undef'], 
+                'byteorder': ctl['byteorder'], 'lats': ctl['lats'], 'lons': ctl['lons'], 'times': ctl['times'], 
+                'ctl': ctlname}
+
+        if geom['undef'] is None:
+            geom['undef'] = -999.9
+
+    else:
+
+        geom = {'xdef': xdef, 'ydef': ydef, 'tdef': None, 'undef': -999.9, 'byteorder': None, 
+                'lats': lats, 'lons': lons, 'times': None, 'ctl': None}
+
+    rsize = geom['xdef'] * geom['ydef'] * 4
+    rbytes = rsize + 8
+
+    size = os.path.getsize(fname)
+
+    with open(fname, 'rb') as f:
+        head = f.read(4)
+        f.seek(max(0, size - 4))
+        tail = f.read(4)
+
+    if len(head) < 4:
+        raise IOError('O arquivo ' + str(fname) + ' está vazio!')
+
+    # A ordem dos bytes é indicada pelo marcador do primeiro registro
+    byteorder = None
+
+    for order, name in [('<', 'little'), ('>', 'big')]:
+        if int.from_bytes(head, name) == rsize and geom['byteorder'] in [None, order]:
+            byteorder = order
+            break
+
+    if byteorder is None:
+        raise IOError('Os marcadores dos registros do arquivo ' + str(fname) + ' não correspondem a ' + 
+                      'xdef=' + str(geom['xdef']) + ' e ydef=' + str(geom['ydef']) + '!')
+
+    geom['byteorder'] = byteorder
+
+    nrecs = size // rbytes
+
+    if geom['tdef'] is None:
+        geom['tdef'] = nrecs // nvars
+
+    if geom['tdef'] < 1 or nrecs < geom['tdef'] * nvars or size % rbytes != 0 or \
+       int.from_bytes(tail, {'<': 'little', '>': 'big'}[byteorder]) != rsize:
+        if geom['ctl'] is not None:
+            expected = geom['tdef'] * nvars
+        else:
+            expected = (nrecs // nvars + 1) * nvars
+
+        raise IOError('O arquivo ' + str(fname) + ' está incompleto (' + str(size) + ' bytes, ' + str(nrecs) + 
+                      ' registros completos de ' + str(rsize) + ' bytes, são esperados ' + str(expected) + ' registros)!')
+
+    if geom['times'] is None:
+        geom['times'] = pd.date_range(t0, periods=geom['tdef'], freq=t_step)
+
+    return geom
+
+def read_field_file(fname,fnames,xdef,ydef,tdef,lats,lons,times,ivars=None,itimes=None,rows=slice(None),cols=slice(None),
+                    undef=-999.9,byteorder='<'):
+
+    """
+    read_field_file
+    ===============
+
+    Esta função lê um arquivo binário do SCANTEC (registros sequenciais do Fortran, um registro
+    por variável e por tempo) e o transforma em um dataset. Os registros são lidos diretamente em
+    um único array float32 pré-alocado com as dimensões (var, time, lat, lon) e o dataset é criado
+    uma única vez, com as coordenadas compartilhadas por todas as variáveis. Como todos os registros
+    têm o mesmo tamanho, apenas os registros, as linhas e as colunas selecionados são lidos (ver a 
+    função select_field_records).
+
+    Parâmetros de entrada
+    ---------------------
+        fname  : string com o caminho completo do arquivo binário do SCANTEC;
+        fnames : lista com os nomes das variáveis, na ordem em que aparecem no arquivo;
+        xdef   : número de pontos na direção zonal;
+        ydef   : número de pontos na direção meridional;
+        tdef   : número de tempos no arquivo;
+        lats   : array com as latitudes;
+        lons   : array com as longitudes;
+        times  : lista com as datas de cada tempo.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        ivars  : lista com os índices das variáveis a serem lidas (valor padrão: todas);
+        itimes : lista com os índices dos tempos a serem lidos (valor padrão: todos);
+        rows   : slice com as linhas (latitudes) a serem lidas (valor padrão: todas);
+        cols   : slice ou array com as colunas (longitudes) a serem lidas (valor padrão: todas);
+        undef  : valor indefinido, substituído por NaN (valor padrão: -999.9);
+        byteorder : ordem dos bytes do arquivo, '<' (little endian, valor padrão) ou '>' (big endian)
+                    (ver a função field_geometry).
+
+    Resultado
+    ---------
+        Dataset com as variáveis do arquivo, com as dimensões (time, lat, lon).
+
+    Uso
+    ---
+        import data_structures as ds
+
+        dSet = ds.read_field_file(fname, fnames, xdef, ydef, tdef, lats, lons, times)
+    """
+
+    nvars = len(fnames)
+
+    if ivars is None:
+        ivars = range(nvars)
+
+    if itimes is None:
+        itimes = range(tdef)
+
+    # Um único array (float32) para todas as variáveis e tempos selecionados
+    fields = np.empty(field_shape(xdef, ydef, ivars, itimes, rows, cols), dtype=np.float32)
+
+    read_field_records(fname, fields, nvars, xdef, ydef, tdef, ivars, itimes, rows, cols, undef=undef, byteorder=byteorder)
+
+    return field_dataset(fields, fnames, tdef, lats, lons, times, ivars, itimes, rows, cols)
+
+def field_shape(xdef,ydef,ivars,itimes,rows,cols):
+
+    """
+    Retorna a forma (var, time, lat, lon) do array com os registros, linhas e colunas selecionados.
+    """
+
+    r0, r1, _ = rows.indices(ydef)
+
+    return (len(ivars), len(itimes), r1 - r0, len(np.arange(xdef)[cols]))
+
+def read_field_records(fname,fields,nvars,xdef,ydef,tdef,ivars,itimes,rows,cols,undef=-999.9,byteorder='<'):
+
+    """
+    read_field_records
+    ==================
+
+    Esta função lê os registros, linhas e colunas selecionados de um arquivo binário do SCANTEC
+    diretamente no array fields (float32, com a forma dada pela função field_shape), que pode estar
+    em memória compartilhada. O valor indefinido é substituído por NaN. O tamanho do arquivo e os 
+    marcadores dos registros são verificados e, se não corresponderem à geometria, é gerado um IOError.
+
+    Parâmetros de entrada
+    ---------------------
+        ver a função read_field_file.
+
+    Uso
+    ---
+        import data_structures as ds
+
+        fields = np.empty(ds.field_shape(xdef, ydef, ivars, itimes, rows, cols), dtype=np.float32)
+
+        ds.read_field_records(fname, fields, nvars, xdef, ydef, tdef, ivars, itimes, rows, cols)
+    """
+
+    rsize = xdef * ydef * 4
+    rbytes = rsize + 8
+
+    r0, r1, _ = rows.indices(ydef)
+
+    nrows = r1 - r0
+    ncols = fields.shape[3]
+
+    nrecs = os.path.getsize(fname) // rbytes
+
+    if nrecs < tdef * nvars:
+        raise IOError('O arquivo ' + str(fname) + ' tem ' + str(nrecs) + ' registros de ' + str(rsize) + 
+                      ' bytes, mas são esperados ' + str(tdef * nvars) + ' registros!')
+
+    # Linhas lidas quando apenas parte das colunas é selecionada
+    if ncols < xdef:
+        buf = np.empty((nrows, xdef), dtype=np.float32)
+
+    marker = np.empty(1, dtype=byteorder + 'i4')
+
+    with open(fname,'rb') as f:
+
+        for it, t in enumerate(itimes):
+
+            for iv, i in enumerate(ivars):
+
+                # Posição do registro (marcador, xdef*ydef valores e marcador)
+                offset = (t * nvars + i) * rbytes
+
+                f.seek(offset)
+
+                if f.readinto(marker) != 4 or marker[0] != rsize:
+                    raise IOError('Os marcadores dos registros do arquivo ' + str(fname) + ' não correspondem a ' + 
+                                  'xdef=' + str(xdef) + ' e ydef=' + str(ydef) + '!')
+
+                if r0 > 0:
+                    f.seek(offset + 4 + r0 * xdef * 4)
+
+                if ncols < xdef:
+                    f.readinto(buf)
+                    fields[iv, it] = buf[:, cols]
+                else:
+                    f.readinto(fields[iv, it])
+
+    # Os valores são lidos na ordem de bytes do arquivo e convertidos para a ordem nativa
+    if np.dtype(byteorder + 'f4') != np.dtype(np.float32):
+        fields.byteswap(inplace=True)
+
+    fields[fields == np.float32(undef)] = np.nan # substitui o valor indefinido (-999.9) por NaN
+
+def field_dataset(fields,fnames,tdef,lats,lons,times,ivars,itimes,rows,cols):
+
+    """
+    Cria o dataset com as variáveis do array fields (var, time, lat, lon), sem cópia dos dados.
+    """
+
+    coords = {'time': times[:tdef][list(itimes)], 'lat': lats[rows], 'lon': lons[cols]}
+
+    data_vars = {}
+
+    for iv, i in enumerate(ivars):
+        data_vars[fnames[i]] = (('time', 'lat', 'lon'), fields[iv])
+
+    return xr.Dataset(data_vars, coords=coords)
+
+def read_field_shared(fname,offset,block,shape,nvars,xdef,ydef,tdef,ivars,itimes,rows,cols,undef=-999.9,byteorder='<'):
+
+    """
+    Lê um arquivo binário do SCANTEC no bloco de memória compartilhada block (função executada pelos
+    processos da função read_field_files). Retorna None ou a mensagem de erro.
+    """
+
+    fields = np.memmap(block, dtype=np.float32, mode='r+', offset=offset, shape=shape)
+
+    try:
+        read_field_records(fname, fields, nvars, xdef, ydef, tdef, ivars, itimes, rows, cols, undef=undef, byteorder=byteorder)
+    except IOError as err:
+        return str(err)
+    finally:
+        del fields
+
+    return None
+
+def read_field_files(files,fnames,xdef,ydef,tdef,lats,lons,times,workers=None,pool='thread',
+                     ivars=None,itimes=None,rows=slice(None),cols=slice(None),undef=-999.9,byteorder='<'):
+
+    """
+    read_field_files
+    ================
+
+    Esta função lê uma lista de arquivos binários do SCANTEC, sequencialmente ou de forma concorrente
+    por meio de um conjunto limitado de threads ou processos. Os campos de todos os arquivos são lidos
+    em um único bloco de memória pré-alocado: com threads, os registros são lidos diretamente no bloco;
+    com processos, o bloco é um arquivo mapeado em memória compartilhada (/dev/shm) e cada processo 
+    escreve nele os campos do seu arquivo, sem que os arrays sejam serializados e copiados de volta. 
+    Os datasets são criados sobre o bloco, sem cópia.
+
+    Parâmetros de entrada
+    ---------------------
+        files   : lista com os caminhos completos dos arquivos binários do SCANTEC;
+        fnames, xdef, ydef, tdef, lats, lons, times : ver a função read_field_file.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        workers : número máximo de threads ou processos utilizados na leitura:
+                  * workers=None ou workers=1 (valor padrão), lê os arquivos sequencialmente;
+                  * workers=n, lê até n arquivos ao mesmo tempo;
+        pool    : string com o tipo de paralelismo utilizado quando workers > 1:
+                  * pool='thread' (valor padrão), utiliza threads;
+                  * pool='process', utiliza processos e memória compartilhada;
+        ivars, itimes, rows, cols, undef, byteorder : ver a função read_field_file.
+
+    Resultado
+    ---------
+        Dicionário com os datasets dos arquivos lidos, na mesma ordem da lista files (os arquivos
+        que não puderam ser lidos são informados e ignorados).
+
+    Uso
+    ---
+        import data_structures as ds
+
+        ds_field = ds.read_field_files(files, fnames, xdef, ydef, tdef, lats, lons, times, workers=16, pool='process')
+    """
+
+    nvars = len(fnames)
+
+    if ivars is None:
+        ivars = list(range(nvars))
+
+    if itimes is None:
+        itimes = list(range(tdef))
+
+    shape = field_shape(xdef, ydef, ivars, itimes, rows, cols)
+    shape = (len(files),) + shape
+
+    if workers is None or workers <= 1 or len(files) <= 1:
+
+        ds_field = {}
+
+        for fname in files:
+            try:
+                ds_field[ntpath.basename(str(fname))] = read_field_file(fname, fnames, xdef, ydef, tdef, lats, lons, times,
+                                                                        ivars=ivars, itimes=itimes, rows=rows, cols=cols,
+                                                                        undef=undef, byteorder=byteorder)
+            except IOError as err:
+                print(err)
+
+        return ds_field
+
+    if pool == 'thread':
+
+        block = np.empty(shape, dtype=np.float32)
+
+        def reader(n):
+            try:
+                read_field_records(files[n], block[n], nvars, xdef, ydef, tdef, ivars, itimes, rows, cols, 
+                                   undef=undef, byteorder=byteorder)
+            except IOError as err:
+                return str(err)
+            return None
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = list(executor.map(reader, range(len(files))))
+
+    elif pool == 'process':
+
+        import tempfile
+
+        # Bloco em memória compartilhada (tmpfs em /dev/shm, quando disponível)
+        if os.path.isdir('/dev/shm'):
+            shmDir = '/dev/shm'
+        else:
+            shmDir = None
+
+        fd, block = tempfile.mkstemp(prefix='scanplot-', suffix='.f4', dir=shmDir)
+        os.close(fd)
+
+        nbytes = int(np.prod(shape[1:])) * 4
+
+        try:
+            os.truncate(block, max(1, len(files) * nbytes))
+
+            reader = partial(read_field_shared, block=block, shape=shape[1:], nvars=nvars, xdef=xdef, ydef=ydef, 
+                             tdef=tdef, ivars=ivars, itimes=itimes, rows=rows, cols=cols, undef=undef, byteorder=byteorder)
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                errors = list(executor.map(reader, files, [n * nbytes for n in range(len(files))]))
+
+            fields = np.memmap(block, dtype=np.float32, mode='r+', shape=shape)
+        finally:
+            # O arquivo é removido, mas a memória permanece mapeada enquanto existirem datasets sobre ela
+            os.remove(block)
+
+        block = np.asarray(fields)
+
+    else:
+        raise Exception('O valor de pool deve ser \'thread\' ou \'process\'.')
+
+    ds_field = {}
+
+    for n, fname in enumerate(files):
+        if errors[n] is not None:
+            print(errors[n])
+            continue
+        ds_field[ntpath.basename(str(fname))] = field_dataset(block[n], fnames, tdef, lats, lons, times, ivars, itimes, rows, cols)
+
+    return ds_field
+
+class FieldArray(BackendArray):
+
+    """
+    FieldArray
+    ==========
+
+    Esta classe envolve uma variável de um arquivo binário do SCANTEC mapeado em memória (ver a 
+    classe FieldMap) e aplica a máscara do valor indefinido (-999.9 substituído por NaN) apenas na
+    parte do campo que é efetivamente acessada.
+
+    Parâmetros de entrada
+    ---------------------
+        fmap  : objeto FieldMap com o arquivo mapeado em memória;
+        i     : índice da variável no arquivo.
+    """
+
+    def __init__(self,fmap,i):
+        self.fmap = fmap
+        self.i = i
+        self.undef = np.float32(fmap.undef)
+        self.shape = (fmap.shape[0],) + fmap.shape[2:]
+        self.dtype = np.dtype(np.float32)
+
+    def __getitem__(self,key):
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.BASIC, self.read)
+
+    def read(self,key):
+
+        """
+        Lê do disco a parte do campo indicada por key (índices do NumPy sobre as dimensões 
+        (time, lat, lon)) e substitui o valor indefinido (-999.9) por NaN.
+        """
+
+        field = np.array(self.fmap.data[:, self.i][key], dtype=np.float32)
+        field[field == self.undef] = np.nan # substitui o valor indefinido (-999.9) por NaN
+        return field
+
+def read_field_chunk(farray,key,asarray=True,lock=None):
+
+    """
+    Lê um bloco de um FieldArray (função de leitura utilizada pelo dask.array.from_array).
+    """
+
+    return farray.read(key)
+
+class FieldMap:
+
+    """
+    FieldMap
+    ========
+
+    Esta classe mapeia em memória (np.memmap) um arquivo binário do SCANTEC. Como todos os registros
+    do arquivo têm o mesmo tamanho (marcador de 4 bytes, xdef*ydef valores float32 e marcador de 4 bytes),
+    as posições dos registros são calculadas aritmeticamente e os campos são expostos como uma visão 
+    com as dimensões (time, var, lat, lon), sem cópia. Apenas as partes do arquivo que são acessadas
+    são lidas do disco. Ao ser serializado (ex.: enviado para outro processo), o objeto guarda apenas
+    o nome e a geometria do arquivo, que é mapeado novamente no destino.
+
+    Parâmetros de entrada
+    ---------------------
+        fname  : string com o caminho completo do arquivo binário do SCANTEC;
+        nvars  : número de variáveis (registros) por tempo;
+        xdef   : número de pontos na direção zonal;
+        ydef   : número de pontos na direção meridional;
+        tdef   : número de tempos no arquivo (se não for informado, é obtido a partir do tamanho do arquivo);
+        undef  : valor indefinido, substituído por NaN (valor padrão: -999.9);
+        byteorder : ordem dos bytes do arquivo, '<' (little endian, valor padrão) ou '>' (big endian).
+
+    Atributos
+    ---------
+        record : dtype estruturado de um registro ('head', 'data', 'tail');
+        raw    : np.memmap com os registros, com as dimensões (time, var);
+        data   : visão dos campos, com as dimensões (time, var, lat, lon).
+
+    Uso
+    ---
+        import data_structures as ds
+
+        fmap = ds.FieldMap(fname, nvars, xdef, ydef, tdef)
+
+        field = fmap[0, 2] # primeiro tempo, terceira variável (-999.9 substituído por NaN)
+    """
+
+    def __init__(self,fname,nvars,xdef,ydef,tdef=None,undef=-999.9,byteorder='<'):
+
+        self.fname = fname
+        self.nvars = nvars
+        self.xdef = xdef
+        self.ydef = ydef
+        self.undef = undef
+        self.byteorder = byteorder
+
+        rsize = xdef * ydef * 4
+
+        self.record = np.dtype([('head', byteorder + 'i4'), ('data', byteorder + 'f4', (ydef, xdef)), ('tail', byteorder + 'i4')])
+
+        nrecs = os.path.getsize(fname) // self.record.itemsize
+
+        if tdef is None:
+            tdef = nrecs // nvars
+
+        if tdef < 1 or nrecs < tdef * nvars:
+            raise IOError('O arquivo ' + str(fname) + ' tem ' + str(nrecs) + ' registros de ' + str(rsize) + 
+                          ' bytes, mas são esperados ' + str(tdef * nvars) + ' registros!')
+
+        self.tdef = tdef
+
+        self.raw = np.memmap(fname, dtype=self.record, mode='r', shape=(tdef, nvars))
+
+        # Verifica os marcadores do primeiro registro
+        if self.raw[0, 0]['head'] != rsize or self.raw[0, 0]['tail'] != rsize:
+            raise IOError('Os marcadores dos registros do arquivo ' + str(fname) + ' não correspondem a ' + 
+                          'xdef=' + str(xdef) + ' e ydef=' + str(ydef) + '!')
+
+        self.data = self.raw['data']
+        self.shape = self.data.shape
+
+    def __getstate__(self):
+        return (self.fname, self.nvars, self.xdef, self.ydef, self.tdef, self.undef, self.byteorder)
+
+    def __setstate__(self,state):
+        self.__init__(*state)
+
+    def __getitem__(self,key):
+        field = np.array(self.data[key], dtype=np.float32)
+        field[field == np.float32(self.undef)] = np.nan # substitui o valor indefinido (-999.9) por NaN
+        return field
+
+    def variable(self,i,chunks=None):
+
+        """
+        Retorna o array da i-ésima variável, com as dimensões (time, lat, lon), mascarado apenas 
+        quando acessado. Se chunks for informado (ex.: (1, ydef, xdef), um bloco por registro), 
+        retorna um dask array com os blocos indicados.
+        """
+
+        if chunks is None:
+            return indexing.LazilyIndexedArray(FieldArray(self, i))
+
+        import dask.array as da
+
+        name = 'scantec-' + ntpath.basename(str(self.fname)) + '-' + str(i) + '-' + str(os.path.getmtime(self.fname))
+
+        return da.from_array(FieldArray(self, i), chunks=chunks, name=name, lock=False, 
+                             getitem=read_field_chunk, meta=np.empty((0, 0, 0), dtype=np.float32))
+
+def memory_budget(memory,rsize):
+
+    """
+    memory_budget
     =============
-    
-    Esta função transforma a(s) tabela(s) do SCANTEC em dataframe(s).
-    
+
+    Esta função calcula a configuração do dask para que o processamento dos datasets preguiçosos 
+    (lazy=True) respeite um limite de memória: o número de threads é limitado para que cada thread
+    disponha de pelo menos 4 blocos (registros) na memória, e o tamanho máximo dos blocos criados 
+    pelo dask em reduções e reagrupamentos é limitado à memória disponível para cada thread. A 
+    configuração global do dask não é alterada.
+
     Parâmetros de entrada
     ---------------------
-        dataInicial : objeto datetime com a data inicial do experimento;
-        dataFinal   : objeto datetime com a data final do experimento;
-        Stats       : lista com os nomes das estatísticas a serem processadas;
-        Exps        : lista com os nomes dos experimentos;
-        outDir      : string com o diretório com as tabelas do SCANTEC.
+        memory : limite de memória em bytes (int) ou string (ex.: '2GB');
+        rsize  : tamanho em bytes de um registro (xdef*ydef*4).
+
+    Resultado
+    ---------
+        Dicionário com a configuração do dask ('num_workers' e 'array.chunk-size'), a ser aplicada
+        por meio de dask.config.set apenas durante o processamento.
+
+    Uso
+    ---
+        import dask
+        import data_structures as ds
+
+        with dask.config.set(ds.memory_budget('2GB', xdef*ydef*4)):
+            mean = dSet[fname].mean('time').compute()
+    """
+
+    from dask.utils import parse_bytes
+
+    if isinstance(memory, str):
+        memory = parse_bytes(memory)
+
+    nworkers = int(max(1, min(os.cpu_count(), memory // (4 * rsize))))
+
+    return {'num_workers': nworkers, 'array.chunk-size': int(max(rsize, memory // nworkers))}
+
+def dask_budget(ds):
+
+    """
+    dask_budget
+    ===========
+
+    Esta função retorna um gerenciador de contexto que aplica ao dask, apenas dentro do bloco with,
+    o limite de memória registrado em um dataset obtido com get_dataset(lazy=True, memory=...) 
+    (atributos dask_num_workers e dask_chunk_size, ver a função memory_budget). Para os demais 
+    datasets, o contexto não altera a configuração do dask.
+
+    Parâmetros de entrada
+    ---------------------
+        ds : dataset ou dataarray com os campos do SCANTEC.
+
+    Resultado
+    ---------
+        Gerenciador de contexto (dask.config.set ou contextlib.nullcontext).
+
+    Uso
+    ---
+        import scanplot
+
+        dSet = scanplot.get_dataset(data_conf,data_vars,Stats,Exps,outDir,lazy=True,memory='2GB')
+
+        with scanplot.dask_budget(dSet[fname]):
+            mean = dSet[fname].mean('time').compute()
+    """
+
+    if 'dask_num_workers' not in ds.attrs:
+        return nullcontext()
+
+    import dask
+
+    return dask.config.set({'num_workers': int(ds.attrs['dask_num_workers']), 
+                            'array.chunk-size': int(ds.attrs['dask_chunk_size'])})
+
+def open_field_file(fname,fnames,xdef,ydef,tdef,lats,lons,times,lazy=False,ivars=None,itimes=None,rows=slice(None),cols=slice(None),
+                    undef=-999.9,byteorder='<'):
+
+    """
+    open_field_file
+    ===============
+
+    Esta função abre um arquivo binário do SCANTEC mapeado em memória (ver a classe FieldMap) e o 
+    transforma em um dataset sem ler os campos. Os valores são lidos do disco (e o valor -999.9 é
+    substituído por NaN) apenas quando as variáveis do dataset são acessadas.
+
+    Parâmetros de entrada
+    ---------------------
+        ver a função read_field_file.
 
     Parâmetros de entrada opcionais
     -------------------------------
-        series : valor Booleano para ler uma série temporal das tabelas do SCANTEC:
-                 * series=False (valor padrão), lê as tabelas do SCANTEC geradas para a avaliação de um período;
-                 * series=True, lê as tabelas do SCANTEC geradas para a avaliação dos dias dentro de um período;
-        tExt   : string com o extensão dos nomes das tabelas do SCANTEC:
-                 * tExt='scan' (valor padrão), considera as tabelas do SCANTEC;
-                 * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC.
-        save   : valor Booleano para salvar o dicionário de dataframes em disco:
-                 * save=False (valor padrão), não salva o dicionário de dataframes em disco;
-                 * save=True, utiliza o pickle para salvar o dicionário de dataframes em disco (cria um arquivo binário).
-    
+        lazy : valor Booleano para criar as variáveis como dask arrays, com um bloco por registro
+               (variável e tempo) do arquivo:
+               * lazy=False (valor padrão), as variáveis são arrays preguiçosos do Xarray;
+               * lazy=True, as variáveis são dask arrays (as reduções e os gráficos são processados
+                 bloco a bloco);
+        ivars, itimes, rows, cols : seleção dos registros, linhas e colunas (ver a função read_field_file);
+                 a seleção é aplicada sem ler os campos;
+        undef, byteorder : ver a função read_field_file.
+
     Resultado
     ---------
-        Dicionário com o(s) dataframe(s) com a(s) tabela(s) do SCANTEC.
-    
+        Dataset com as variáveis do arquivo, com as dimensões (time, lat, lon).
+
     Uso
     ---
-        import scanplot 
-        
-        data_vars, data_conf = scanplot.read_namelists("~/SCANTEC")
-        
-        dataInicial = data_conf["Starting Time"]
-        dataFinal = data_conf["Ending Time"]
-        Stats =  ["ACOR", "RMSE", "VIES"]
-        Exps = list(data_conf["Experiments"].keys())
-        outDir = data_conf["Output directory"]
-        
-        dTable = scanplot.get_dataframe(dataInicial,dataFinal,Stats,Exps,outDir)
-    """
+        import data_structures as ds
 
-    # Verifica se foram passados os argumentos opcionais e atribui os valores
+        dSet = ds.open_field_file(fname, fnames, xdef, ydef, tdef, lats, lons, times)
+    """
 
-    global tExt
+    fmap = FieldMap(fname, len(fnames), xdef, ydef, tdef, undef=undef, byteorder=byteorder)
 
-    if 'series' in kwargs:
-        series = kwargs['series']
+    if lazy:
+        chunks = (1, ydef, xdef)
     else:
-        series = gvars.series
+        chunks = None
 
-    if 'tExt' in kwargs:
-        tExt = kwargs['tExt']
-        # Atualiza o valor global de tExt
-        gvars.tExt = tExt
-    else:
-        tExt = gvars.tExt
+    data_vars = {}
 
-    if 'save' in kwargs:
-        save = kwargs['save']
-    else:
-        save = gvars.save
+    for i in range(len(fnames)):
+        data_vars[fnames[i]] = xr.Variable(('time', 'lat', 'lon'), fmap.variable(i, chunks=chunks))
 
-    # Dicionário com o(s) dataframe(s)
-    ds_table = {}       
-    
-    if series:
-    
-        while (dataInicial <= dataFinal):
-            
-            dataInicial_fmt = dataInicial.strftime("%Y%m%d%H")
-            dataFinal_fmt = dataFinal.strftime("%Y%m%d%H")
-            
-            for stat in Stats:
-    
-                for exp in Exps:
-            
-                    table_name = stat + exp + '_' + dataInicial_fmt + dataInicial_fmt + 'T.' + tExt
-                    table = os.path.join(outDir, table_name) 
+    ds = xr.Dataset(data_vars, coords={'time': times[:tdef], 'lat': lats, 'lon': lons})
 
-                    lista_n = []
-    
-                    if os.path.exists(table):
-                        df_n = pd.read_csv(table, sep="\s+")
-    
-                        ds_table[ntpath.basename(str(table))] = df_n    
-                        
-            dataInicial = dataInicial + timedelta(hours=24) # pegar esta informação do namelist (timedelta)   
+    if ivars is not None:
+        ds = ds[[fnames[i] for i in ivars]]
 
-        # No final do loop temporal, salva o dicionário em disco
-        if save:
-            pk.dump(ds_table, open(os.path.join(outDir, 'scantec_ds_table-series.pkl'), 'wb'))
+    if itimes is not None:
+        ds = ds.isel(time=list(itimes))
 
-    else:
-        
-        for stat in Stats:
-                   
-            dataInicial_fmt = dataInicial.strftime("%Y%m%d%H")
-            dataFinal_fmt = dataFinal.strftime("%Y%m%d%H")
-    
-            for exp in Exps:
-            
-                table_name = stat + exp + '_' + dataInicial_fmt + dataFinal_fmt + 'T.' + tExt 
-                table = os.path.join(outDir, table_name) 
+    return ds.isel(lat=rows, lon=cols)
 
-                lista_n = []
-    
-                if os.path.exists(table):
-                    df_n = pd.read_csv(table, sep="\s+")
-    
-                    ds_table[ntpath.basename(str(table))] = df_n    
-        
-        # No final do loop temporal, salva o dicionário em disco
-        if save:
-            pk.dump(ds_table, open(os.path.join(outDir, 'scantec_ds_table.pkl'), 'wb'))
+def iter_fields(dSet,variables=None,times=None):
+
+    """
+    iter_fields
+    ===========
 
-    return ds_table
+    Este gerador percorre um dicionário de datasets (arquivo -> tempo -> variável) e fornece um campo
+    bidimensional (lat, lon) de cada vez. Com os datasets obtidos com get_dataset(mmap=True) ou 
+    get_dataset(lazy=True), cada campo é lido do disco apenas quando é solicitado e pode ser descartado
+    logo após o uso, de forma que a memória utilizada não depende do número de arquivos e de tempos.
+
+    Parâmetros de entrada
+    ---------------------
+        dSet : dicionário com os datasets dos arquivos binários do SCANTEC (ver a função get_dataset).
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        variables : lista com os nomes das variáveis (valor padrão: todas as variáveis de cada dataset);
+        times     : lista ou slice com os índices dos tempos (valor padrão: todos os tempos de cada dataset).
+
+    Resultado
+    ---------
+        Tuplas (fname, var, field), em que fname é a chave do dicionário dSet, var é o nome da variável
+        e field é o dataarray (lat, lon) com o campo, já lido para a memória.
+
+    Uso
+    ---
+        import scanplot
+
+        dSet = scanplot.get_dataset(data_conf,data_vars,Stats,Exps,outDir,mmap=True)
+
+        for fname, var, field in scanplot.iter_fields(dSet, times=slice(0, -1)):
+            print(fname, var, float(field.mean()))
+    """
+
+    for fname in dSet:
+
+        ntime = len(dSet[fname].time)
+
+        if times is None:
+            itimes = range(ntime)
+        elif isinstance(times, slice):
+            itimes = range(ntime)[times]
+        else:
+            itimes = times
+
+        if variables is None:
+            fvars = list(dSet[fname].data_vars)
+        else:
+            fvars = variables
+
+        for t in itimes:
+
+            for var in fvars:
+
+                field = dSet[fname][var].isel(time=t).load()
+
+                yield fname, var, field
 
 def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
        
@@ -169,9 +1884,45 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
         tExt   : string com o extensão dos nomes das tabelas do SCANTEC:
                  * tExt='scan' (valor padrão), considera as tabelas do SCANTEC;
                  * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC.
-        save   : valor Booleano para salvar o dicionário de dataframes em disco:
-                 * save=False (valor padrão), não salva o dicionário de dataframes em disco;
-                 * save=True, utiliza o pickle para salvar o dicionário de dataframes em disco (cria um arquivo binário).
+        save   : valor Booleano para utilizar o cache dos campos em disco:
+                 * save=False (valor padrão), não utiliza o cache;
+                 * save=True, recupera do cache os campos dos arquivos que não foram modificados (mesmo nome, 
+                   tamanho e data de modificação) e lê apenas os arquivos novos ou modificados, atualizando o 
+                   cache (um arquivo NetCDF comprimido por arquivo binário no diretório cacheDir);
+        cacheDir : string com o diretório do cache (valor padrão: outDir/scanplot_cache);
+        mmap   : valor Booleano para mapear os arquivos binários em memória:
+                 * mmap=False (valor padrão), lê todos os campos dos arquivos;
+                 * mmap=True, abre os arquivos com np.memmap (ver a classe FieldMap), sem ler os campos; 
+                   os valores são lidos do disco apenas quando acessados (o cache dos campos não é utilizado);
+        lazy   : valor Booleano para retornar datasets com dask arrays (um bloco por registro, ie., por 
+                 arquivo, variável e tempo), para séries de campos maiores do que a memória disponível:
+                 * lazy=False (valor padrão), não utiliza o dask;
+                 * lazy=True, abre os arquivos como em mmap=True e cria as variáveis como dask arrays; 
+                   as reduções, gráficos e exportações processam os dados bloco a bloco;
+        memory : limite de memória para o processamento dos datasets com lazy=True, em bytes ou como 
+                 string (ex.: memory='2GB'; valor padrão: None, sem limite); a configuração do dask 
+                 correspondente (ver a função memory_budget) é registrada nos atributos dask_num_workers
+                 e dask_chunk_size de cada dataset e aplicada apenas dentro do contexto da função 
+                 dask_budget, sem alterar a configuração global do dask;
+        variables : lista com os nomes das variáveis a serem lidas (ex.: variables=['TEMP:850', 'ZGEO:500'];
+                    valor padrão: None, lê todas as variáveis);
+        times  : lista com os tempos de previsão a serem lidos, em horas (ex.: times=[0, 24, 72]) ou como 
+                 datas (valor padrão: None, lê todos os tempos);
+        bbox   : tupla (lon0, lon1, lat0, lat1) com os limites da área a ser lida (ex.: bbox=(-85, -30, -60, 15)
+                 para a América do Sul; valor padrão: None, lê todo o domínio);
+                 com variables, times ou bbox, apenas os registros, linhas e colunas selecionados são lidos
+                 dos arquivos (com save=True, os campos já presentes no cache são recortados e os demais 
+                 são lidos sem atualizar o cache);
+        workers : número máximo de threads ou processos utilizados na leitura dos arquivos binários
+                  (nas séries, os arquivos de todos os dias são distribuídos entre eles):
+                  * workers=None ou workers=1 (valor padrão), lê os arquivos sequencialmente;
+                  * workers=n, lê até n arquivos ao mesmo tempo;
+        pool    : string com o tipo de paralelismo utilizado quando workers > 1:
+                  * pool='thread' (valor padrão), utiliza threads;
+                  * pool='process', utiliza processos, que escrevem os campos em um bloco de memória
+                    compartilhada (sem cópia dos arrays para o processo principal);
+        index  : objeto DataoutIndex com o índice do diretório outDir (se não for informado, 
+                 o diretório outDir é listado uma única vez no início da função).
     
     Resultado
     ---------
@@ -193,8 +1944,6 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
 
     # Verifica se foram passados os argumentos opcionais e atribui os valores
 
-    global tExt
-
     if 'series' in kwargs:
         series = kwargs['series']
     else:
@@ -202,8 +1951,6 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
 
     if 'tExt' in kwargs:
         tExt = kwargs['tExt']
-        # Atualiza o valor global de tExt
-        gvars.tExt = tExt
     else:
         tExt = gvars.tExt
 
@@ -212,16 +1959,56 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
     else:
         save = gvars.save
 
+    if 'mmap' in kwargs:
+        mmap = kwargs['mmap']
+    else:
+        mmap = gvars.mmap
+
+    if 'lazy' in kwargs:
+        lazy = kwargs['lazy']
+    else:
+        lazy = gvars.lazy
+
+    if 'memory' in kwargs:
+        memory = kwargs['memory']
+    else:
+        memory = gvars.memory
+
+    if 'workers' in kwargs:
+        workers = kwargs['workers']
+    else:
+        workers = gvars.workers
+
+    if 'pool' in kwargs:
+        pool = kwargs['pool']
+    else:
+        pool = gvars.pool
+
+    if 'variables' in kwargs:
+        variables = kwargs['variables']
+    else:
+        variables = None
+
+    if 'times' in kwargs:
+        leads = kwargs['times']
+    else:
+        leads = None
+
+    if 'bbox' in kwargs:
+        bbox = kwargs['bbox']
+    else:
+        bbox = None
+
     dataInicial = data_conf['Starting Time']
     dataFinal = data_conf['Ending Time']
-    t_step = str(data_conf['Forecast Time Step']) + 'H'
+    t_step = timedelta(hours=int(data_conf['Forecast Time Step']))
     dataInicial_fmt = dataInicial.strftime('%Y%m%d%H')
     dataFinal_fmt = dataFinal.strftime('%Y%m%d%H')
 
-    ftime = np.int(data_conf['Forecast Total Time'])
-    atime = np.int(data_conf['Analisys Time Step'])
-    tdef = np.int((ftime / atime) + 1) # verificar, pois no arquivo CTL esta é a conta que é feita, mas no arquivo binário não!
-    dataFinal2 = dataInicial + timedelta(hours=np.int(tdef)*np.int(data_conf['Forecast Time Step']))
+    ftime = int(data_conf['Forecast Total Time'])
+    atime = int(data_conf['Analisys Time Step'])
+    tdef = int((ftime / atime) + 1) # o número de tempos de cada arquivo é obtido pela função field_geometry
+    dataFinal2 = dataInicial + timedelta(hours=int(tdef)*int(data_conf['Forecast Time Step']))
 
     times = pd.date_range(dataInicial, dataFinal, freq=t_step)  
 #    tdef = len([*times])                     
@@ -244,8 +2031,8 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
     gdx = np.float32(data_conf['run domain resolution dx'])
     gdy = np.float32(data_conf['run domain resolution dy'])
                                
-    xdef = np.int(((urlon - lllon) / gdx) + 1)
-    ydef = np.int(((urlat - lllat) / gdy) + 1)
+    xdef = int(((urlon - lllon) / gdx) + 1)
+    ydef = int(((urlat - lllat) / gdy) + 1)
 
     # Latitudes e longitudes                           
     lats = np.linspace(lllat, urlat, num=ydef)
@@ -254,6 +2041,18 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
 #    lons = np.arange(lllon, urlon, gdx) # fica com tamanho menor (-1 ponto)
 
     outDir = data_conf['Output directory']
+
+    if 'index' in kwargs and kwargs['index'] is not None:
+        index = kwargs['index']
+    else:
+        index = DataoutIndex(outDir)
+
+    if 'cacheDir' in kwargs and kwargs['cacheDir'] is not None:
+        cacheDir = kwargs['cacheDir']
+    elif gvars.cacheDir is not None:
+        cacheDir = gvars.cacheDir
+    else:
+        cacheDir = os.path.join(outDir, 'scanplot_cache')
     
     # Variáveis                           
     fnames = []
@@ -264,9 +2063,12 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
     nvars = len(fnames)
     
     #print(nvars,fnames)
+
+    # Registros, linhas e colunas a serem lidos
+    subset = variables is not None or leads is not None or bbox is not None
     
-    # Dicionário com o(s) dataset(s)
-    ds_field = {}
+    # Lista com os arquivos binários a serem lidos (a ordem da lista define a ordem do dicionário)
+    files = []
     
     if series:
     
@@ -280,52 +2082,15 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
                 for exp in Exps:
                 
                     file_name = str(stat) + str(exp) + '_' + str(dataInicial_fmt) + str(dataInicial_fmt) + 'F.' + tExt
-                    fname = os.path.join(outDir, file_name)
-        
-                    lista_n = []
+                    fname = index.lookup(stat, exp, dataInicial_fmt, dataInicial_fmt, 'F', tExt)
         
-                    try:                              
-        
-                        dsl = []
-                        ds = xr.Dataset()                           
-        
-                        with open(fname,'rb') as f:
-                                              
-                            for t in np.arange(tdef): 
-                                               
-                                for i in np.arange(nvars):
-        
-                                    # Leitura utilizando o SciPy
-                                    data = FortranFile(f, 'r')
-                                    field = data.read_record('f4').reshape(xdef, ydef, order='F') 
-        
-                                    field[field == -999.9] = np.nan # substitui o valor -999.9 por NaN
-        
-                                    #print('time=',t,'stat=',stat,'exp=',exp,'var=',i)
-                                    
-                                    ds[fnames[i]] = (('lon','lat'), field)
-                                    ds.coords['lat'] = ('lat', lats)
-                                    ds.coords['lon'] = ('lon', lons)
-                                    ds.coords['time'] = [times[t]]
-                                               
-                                    dst = ds.transpose('time', 'lat', 'lon')
-                                               
-                                dsl.append(dst)
-                        
-                            dsc = xr.concat(dsl, dim='time')                
-                        
-                        ds_field[ntpath.basename(str(fname))] = xr.concat(dsl, dim='time')
-                        
-                    except IOError:
-        
-                        print("Arquivo " + fname + " não existe!")
+                    if fname is None:
+                        print("Arquivo " + os.path.join(outDir, file_name) + " não existe!")
+                    else:
+                        files.append(fname)
                         
             dataInicial = dataInicial + timedelta(hours=24) # pegar esta informação do namelist (timedelta)   
 
-        # No final do loop temporal, salva o dicionário em disco
-        if save:
-            pk.dump(ds_field, open(os.path.join(outDir, 'scantec_ds_field-series.pkl'), 'wb'))
-
     else:
         
         for stat in Stats:
@@ -336,48 +2101,117 @@ def get_dataset(data_conf,data_vars,Stats,Exps,outDir,**kwargs):
             for exp in Exps:
             
                 file_name = str(stat) + str(exp) + '_' + str(dataInicial_fmt) + str(dataFinal_fmt) + 'F.' + tExt
-                fname = os.path.join(outDir, file_name)
-    
-                lista_n = []
-    
-                try:                              
-    
-                    dsl = []
-                    ds = xr.Dataset()                           
-    
-                    with open(fname,'rb') as f:
-                                          
-                        for t in np.arange(tdef): 
-                                           
-                            for i in np.arange(nvars):
-    
-                                # Leitura utilizando o SciPy
-                                data = FortranFile(f, 'r')
-                                field = data.read_record('f4').reshape(xdef, ydef, order='F') 
+                fname = index.lookup(stat, exp, dataInicial_fmt, dataFinal_fmt, 'F', tExt)
     
-                                field[field == -999.9] = np.nan # substitui o valor -999.9 por NaN
-    
-                                #print('time=',t,'stat=',stat,'exp=',exp,'var=',i)
-                                
-                                ds[fnames[i]] = (('lon','lat'), field)
-                                ds.coords['lat'] = ('lat', lats)
-                                ds.coords['lon'] = ('lon', lons)
-                                ds.coords['time'] = [times[t]]
-                                           
-                                dst = ds.transpose('time', 'lat', 'lon')
-                                           
-                            dsl.append(dst)
-                    
-                        dsc = xr.concat(dsl, dim='time')                
-                    
-                    ds_field[ntpath.basename(str(fname))] = xr.concat(dsl, dim='time')
-                    
-                except IOError:
-    
-                    print("Arquivo " + fname + " não existe!")
+                if fname is None:
+                    print("Arquivo " + os.path.join(outDir, file_name) + " não existe!")
+                else:
+                    files.append(fname)
+
+    # Geometria de cada arquivo (arquivo .ctl ou tamanho e marcadores dos registros); os arquivos
+    # incompletos ou incompatíveis são descartados antes da leitura
+    geoms = {}
+
+    for fname in files:
+        try:
+            geoms[fname] = field_geometry(fname, nvars, xdef, ydef, lats, lons, times[0], t_step)
+        except IOError as err:
+            print(err)
+
+    files = [fname for fname in files if fname in geoms]
+
+    # Registros, linhas e colunas de cada arquivo
+    selection = {}
+
+    for fname in files:
+        geom = geoms[fname]
+        selection[fname] = select_field_records(fnames, geom['lats'], geom['lons'], geom['times'], variables=variables, 
+                                                leads=leads, bbox=bbox, t_step=t_step)
+
+    # Configuração do dask para o limite de memória, registrada nos atributos dos datasets
+    budget = {}
+
+    if lazy:
+        mmap = True
+        if memory is not None:
+            config = memory_budget(memory, xdef * ydef * 4)
+            budget = {'dask_num_workers': config['num_workers'], 'dask_chunk_size': config['array.chunk-size']}
+
+    # Manifesto do cache dos campos
+    if save and not mmap:
+        manifest = cf.read_manifest(cacheDir, cf.field_manifest)
+
+    # Dicionário com o(s) dataset(s)
+    ds_field = {}
+
+    # Arquivos que não estão no cache, agrupados pela geometria
+    missing = {}
+
+    for fname in files:
+
+        geom = geoms[fname]
 
-        # No final do loop temporal, salva o dicionário em disco
+        ivars, itimes, rows, cols = selection[fname]
+
+        # Mapeia o arquivo em memória, sem ler os campos
+        if mmap:
+            try:
+                ds_field[ntpath.basename(str(fname))] = open_field_file(fname, fnames, geom['xdef'], geom['ydef'], geom['tdef'], 
+                                                                          geom['lats'], geom['lons'], geom['times'], lazy=lazy,
+                                                                          ivars=ivars, itimes=itimes, rows=rows, cols=cols,
+                                                                          undef=geom['undef'], byteorder=geom['byteorder'])
+                ds_field[ntpath.basename(str(fname))].attrs.update(budget)
+            except IOError as err:
+                print(err)
+            continue
+
+        # Recupera o dataset do cache, se o arquivo não tiver sido modificado
         if save:
-            pk.dump(ds_field, open(os.path.join(outDir, 'scantec_ds_field.pkl'), 'wb'))
+            ds = cf.load_field_cache(cacheDir, fname, manifest=manifest)
+            if ds is not None:
+                if subset:
+                    ds = ds[[fnames[i] for i in ivars]].isel(time=itimes, lat=rows, lon=cols)
+                ds_field[ntpath.basename(str(fname))] = ds
+                continue
+
+        ds_field[ntpath.basename(str(fname))] = None
+
+        # Os arquivos de um grupo são lidos com os mesmos registros, linhas e colunas: a seleção de cada
+        # arquivo (ex.: os índices dos tempos obtidos a partir do seu próprio arquivo .ctl) faz parte da chave
+        key = (geom['xdef'], geom['ydef'], geom['tdef'], geom['undef'], geom['byteorder'], 
+               geom['lats'][0], geom['lats'][-1], geom['lons'][0], geom['lons'][-1],
+               tuple(ivars), tuple(itimes), selection_key(rows), selection_key(cols))
+
+        missing.setdefault(key, []).append(fname)
+
+    # Cada grupo de arquivos com a mesma geometria é lido em um único bloco de memória
+    for group in missing.values():
+
+        geom = geoms[group[0]]
+
+        ivars, itimes, rows, cols = selection[group[0]]
+
+        ds_read = read_field_files(group, fnames, geom['xdef'], geom['ydef'], geom['tdef'], geom['lats'], geom['lons'], 
+                                   geom['times'], workers=workers, pool=pool, ivars=ivars, itimes=itimes, rows=rows, 
+                                   cols=cols, undef=geom['undef'], byteorder=geom['byteorder'])
+
+        for fname in group:
+
+            name = ntpath.basename(str(fname))
+
+            if name not in ds_read:
+                del ds_field[name]
+                continue
+
+            ds = ds_read[name]
+
+            # Tempos do arquivo .ctl de cada arquivo
+            if geoms[fname]['ctl'] is not None:
+                ds = ds.assign_coords(time=geoms[fname]['times'][list(itimes)])
+
+            if save and not subset:
+                cf.save_field_cache(cacheDir, fname, ds, manifest=manifest)
+
+            ds_field[name] = ds
 
     return ds_field
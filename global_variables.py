@@ -14,4 +14,20 @@ save = False
 hvplot = False
 avaltype = None
 scanconf = False
-returnpath = False
\ No newline at end of file
+returnpath = False
+workers = None
+pool = 'thread'
+timings = False
+parser = 'pandas'
+tidy = False
+cacheDir = None
+incremental = False
+mmap = False
+lazy = False
+memory = None
+stream = False
+render = 'contour'
+rasterize = False
+animation = None
+fps = 4
+force = False
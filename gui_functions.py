@@ -5,17 +5,9 @@
 
 import numpy as np
 import pandas as pd
-import holoviews as hv
-import param
-import panel as pn
-from tkinter import Tk, filedialog
-#from ttkthemes import ThemedTk
 
-pn.extension('perspective', sizing_mode='stretch_width')
-
-import cartopy.crs as ccrs
-from cartopy.feature import NaturalEarthFeature, LAND, COASTLINE
-from cartopy.mpl.gridliner import LONGITUDE_FORMATTER, LATITUDE_FORMATTER
+# As bibliotecas da interface gráfica (panel, holoviews, tkinter e Cartopy) são importadas e
+# inicializadas apenas quando a interface é aberta (ver a função show_interface)
 
 # Não deveria ser necessário carregar este módulo aqui, mas por horas
 # vamos manter dessa forma
@@ -44,6 +36,17 @@ def show_interface():
         scanplot.show_interface()
     """
 
+    import holoviews as hv
+    import hvplot.xarray
+    import param
+    import panel as pn
+    from tkinter import Tk, filedialog
+    #from ttkthemes import ThemedTk
+
+    import cartopy.crs as ccrs
+
+    pn.extension('perspective', sizing_mode='stretch_width')
+
     class SCANPLOT(param.Parameterized):  
       
         #
@@ -264,6 +267,7 @@ def show_interface():
                                           label='5. Ler Campos Espaciais')
     
         fields_loaded = None
+        levels = None
         
         # method keeps on watching whether button is triggered
         @param.depends('button_get_dataset', watch=True)
@@ -283,6 +287,10 @@ def show_interface():
             
             self.dataset = sc.get_dataset(data_conf, data_vars, Stats, 
                                           Exps, outDir)
+
+            # Níveis de cores de cada estatística e variável, calculados uma única vez
+            self.levels = sc.field_levels(self.dataset)
+
             self.fields_loaded = True        
     
     #    # method is watching whether model_trained is updated
@@ -337,8 +345,14 @@ def show_interface():
                             name='Variables')
     
                 def get_plot(file, var):
+                    lv = self.levels.get((file.split('_')[0][0:4], var))
+                    if lv is not None:
+                        clim = (lv['levels'][0], lv['levels'][-1])
+                    else:
+                        clim = None
                     return self.dataset[file][var].hvplot(groupby='time', 
                                                   colorbar=True,
+                                                  clim=clim,
                                                   #levels=10,
                                                   coastline=True,
                                                   #global_extend=True,
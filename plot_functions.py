@@ -11,33 +11,15 @@ import pandas as pd
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from matplotlib import rcParams
 
-import cartopy.crs as ccrs
-from cartopy.feature import NaturalEarthFeature, LAND, COASTLINE
-from cartopy.mpl.gridliner import LONGITUDE_FORMATTER, LATITUDE_FORMATTER
+from contextlib import nullcontext
 
-from IPython import get_ipython
+from aux_functions import setup_backend, new_figure, rc_lock
+from cache_functions import FigureManifest, content_hash
+from data_structures import iter_fields, compute_scorecard, table_keys, table_ext, select_table
 
-import seaborn as sns
-
-import skill_metrics as sm
-
-from scipy.stats import t
-from scipy.stats import ttest_ind
-
-from aux_functions import isnotebook
-
-import hvplot.xarray
-import holoviews as hv
-from holoviews import opts
-import panel as pn
-import param
-
-# Esta instrução é utilizada em conjunto com a opção showFig
-# para determinar se o script está sendo chamado a partir de uma seção
-# iterativa ou pelo shell padrão do Python
-ipython = get_ipython()
+# As bibliotecas utilizadas apenas por algumas das funções (ex.: Seaborn, SkillMetrics, Cartopy, hvplot
+# e panel) são importadas no primeiro uso de cada função, reduzindo o tempo de importação do SCANPLOT
 
 def plot_lines(dTable,Vars,Stats,outDir,**kwargs):
 
@@ -49,7 +31,8 @@ def plot_lines(dTable,Vars,Stats,outDir,**kwargs):
     
     Parâmetros de entrada
     ---------------------
-        dTable : objeto dicionário com uma ou mais tabelas do SCANTEC;
+        dTable : objeto dicionário com uma ou mais tabelas do SCANTEC ou dataframe no formato longo
+                 (get_dataframe com tidy=True);
         Vars   : lista com os nomes e níveis das variáveis;
         Stats  : lista com os nomes das estatísticas a serem processadas;
         outDir : string com o diretório com as tabelas do SCANTEC.
@@ -68,9 +51,15 @@ def plot_lines(dTable,Vars,Stats,outDir,**kwargs):
         combine    : valor Booleano para combinar as curvas dos experimentos em um só gráfico:
                      * combine=False (valor padrão), plota as curvas em gráficos separados;
                      * combine=True, plota as curvas das mesmas estatísticas no mesmo gráfico;
-        tExt       : string com o extensão dos nomes das tabelas do SCANTEC:
-                     * tExt='scan' (valor padrão), considera as tabelas do SCANTEC;
-                     * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC.
+        tExt       : string com o extensão dos nomes das tabelas do SCANTEC (valor padrão: a extensão
+                     dos nomes das tabelas de dTable):
+                     * tExt='scan', considera as tabelas do SCANTEC;
+                     * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC;
+        force      : valor Booleano para plotar novamente as figuras que não mudaram (opção saveFig=True):
+                     * force=False (valor padrão), as figuras cujos dados e parâmetros são os mesmos da última
+                       execução (hashes registrados no manifesto scanplot_figures.json, em figDir) não são
+                       plotadas novamente;
+                     * force=True, plota todas as figuras.
    
     Resultado
     ---------
@@ -98,9 +87,6 @@ def plot_lines(dTable,Vars,Stats,outDir,**kwargs):
         
         scanplot.plot_lines(dTable,Vars,Stats,outDir,showFig=True,saveFig=True,lineStyles=lineStyles,figDir=figDir)
     """
-  
-    # tExt é uma variável global e o seu valor é sempre atualizado
-    global tExt
 
     # Verifica se foram passados os argumentos opcionais e atribui os valores
     if 'combine' in kwargs:
@@ -110,10 +96,9 @@ def plot_lines(dTable,Vars,Stats,outDir,**kwargs):
 
     if 'tExt' in kwargs:
         tExt = kwargs['tExt']      
-        # Atualiza o valor global de tExt
-        gvars.tExt = tExt
     else:
-        tExt = gvars.tExt
+        # Extensão dos nomes das tabelas (ou dos arquivos binários) de dTable
+        tExt = table_ext(dTable)
 
     if 'figDir' in kwargs:
         figDir = kwargs['figDir']
@@ -138,172 +123,202 @@ def plot_lines(dTable,Vars,Stats,outDir,**kwargs):
     else:
         lineStyles = gvars.lineStyles
 
-    # Define o backend de plotagem do matplotlib
-    # Agg: não mostra os gráficos
-    # inline: mostra os gráficos
-    # Refs:
-    # * https://stackoverflow.com/questions/43545050/using-matplotlib-notebook-after-matplotlib-inline-in-jupyter-notebook-doesnt
-    # * https://www.codegrepper.com/code-examples/python/use+ipython+magic+in+script
-    ipython.magic("matplotlib Agg")           
-    ipython.magic("matplotlib Agg")           
-    import matplotlib.pyplot as plt
+    if 'force' in kwargs:
+        force = kwargs['force']
+    else:
+        force = gvars.force
+
+    # As figuras que não são mostradas são criadas fora do pyplot (ver a função new_figure); o backend
+    # utilizado para mostrar as figuras é configurado uma única vez (ver a função setup_backend)
+    setup_backend(showFig)
 
-    # Reseta os parâmetros de aspecto do Seaborn
-    sns.reset_orig()
+    # Manifesto das figuras salvas em figDir (ver a classe FigureManifest): as figuras cujos dados e
+    # parâmetros não mudaram desde a última execução não são plotadas novamente (exceto com showFig=True)
+    if saveFig:
+        figs = FigureManifest(figDir, force=force or showFig)
 
-    # Opção combine=True    
-    if combine:
-    
-        if isnotebook(get_ipython().__class__.__name__): # seções iterativas
-            if showFig:
-                ipython.magic('matplotlib inline')           
-                #mpl.rc('figure', max_open_warning = 0)
-                mpl.rcParams.update({'figure.max_open_warning': 0})
-            else:
-                ipython.magic('matplotlib agg')           
-        else: # seções não iterativas
-            if not showFig:
-                mpl.use('agg')
-                mpl.rcParams.update({'figure.max_open_warning': 0})
+    # As figuras são construídas e salvas sem alterar os rcParams e podem ser plotadas simultaneamente
+    # em várias threads (ver a classe RcLock)
+    with rc_lock.shared():
 
-        for var in range(len(Vars)):
+        # Opção combine=True    
+        if combine:
+    
+            for var in range(len(Vars)):
        
-            for Stat in Stats:
-                # Nomes das tabelas
-                Tables = list(filter(lambda x:Stat in x, [*dTable.keys()]))
+                for Stat in Stats:
+                    # Chaves (stat, exp, start, end, kind, ext) das tabelas da estatística (ver a função table_keys)
+                    Tables = table_keys(dTable, stat=Stat)
+
+                    if len(Tables) == 0:
+                        continue
        
-                # Lista de tabelas a serem plotadas
-                dfTables = []
+                    # Lista de tabelas a serem plotadas
+                    dfTables = []
     
-                for table in Tables:
-                    if tExt == 'scan':
-                        df_exp = dTable[table].loc[:,[Vars[var][0].lower()]]
-                    else:
-                        df_exp = dTable[table].loc[:,[Vars[var][0]]]
-                    dfTables.append(df_exp)
+                    for tkey in Tables:
+                        table = select_table(dTable, tkey)
+                        if tExt == 'scan':
+                            df_exp = table.loc[:,[Vars[var][0].lower()]]
+                        else:
+                            df_exp = table.loc[:,[Vars[var][0]]]
+                        dfTables.append(df_exp)
         
-                fcts = dTable[table].loc[:,"%Previsao"].values
+                    fcts = table.loc[:,"%Previsao"].values
 
-                # Cria o objeto com o gráfico principal
-                # Se lineStyles=True
-                if lineStyles:
-                    ax = pd.concat(dfTables,axis=1).plot(title=Vars[var][1],
-                                                         figsize=(8,5),
-                                                         fontsize=12,
-                                                         linewidth=1.5,
-                                                         style=lineStyles)
-                # Se lineStyles=False (padrão)
-                else:
-                    ax = pd.concat(dfTables,axis=1).plot(title=Vars[var][1],
-                                                         figsize=(8,5),
-                                                         fontsize=12,
-                                                         linewidth=1.5,
-                                                         marker='o')
+                    # Legendas
+                    enames = [tkey[1] for tkey in Tables]
+
+                    if saveFig: 
+                        #fig_name = table.replace(str(tExt),'') + Vars[var][0] + '-combined.png'
+                        if tExt == 'scan':
+                            fig_name = Stat + 'EXPS_' + tkey[2] + tkey[3] + Vars[var][0].replace(':','') + '-combined.png'
+                        else:
+                            fig_name = Stat + 'EXPS_' + tkey[2] + tkey[3] + Vars[var][0].replace('-','') + '-combined.png'
+
+                        key = content_hash(pd.concat(dfTables,axis=1), table.index, fcts, title=Vars[var][1],
+                                           ylabel=Stat, enames=enames, lineStyles=lineStyles)
+
+                        # A figura não mudou desde a última execução
+                        if figs.is_current(fig_name, key):
+                            continue
+
+                    # Cria o objeto com o gráfico principal
+                    fig = new_figure(showFig, figsize=(8,5))
+                    ax = fig.add_subplot()
+
+                    # Se lineStyles=True
+                    if lineStyles:
+                        pd.concat(dfTables,axis=1).plot(ax=ax,
+                                                        title=Vars[var][1],
+                                                        fontsize=12,
+                                                        linewidth=1.5,
+                                                        style=lineStyles)
+                    # Se lineStyles=False (padrão)
+                    else:
+                        pd.concat(dfTables,axis=1).plot(ax=ax,
+                                                        title=Vars[var][1],
+                                                        fontsize=12,
+                                                        linewidth=1.5,
+                                                        marker='o')
 
-                ax.set_xticks(dTable[table].index)
-                ax.set_xticklabels(fcts)
+                    ax.set_xticks(table.index)
+                    ax.set_xticklabels(fcts)
 
-                # Legendas
-                enames=[]
-                for table in Tables:
-                    enames.append(table.split('_')[0][4:])
-                    
-                ax.legend(enames)
+                    ax.legend(enames)
                 
-                plt.ylabel(Stat)
-                plt.xlabel('Horas de Integração')
-                plt.xticks(rotation=90)
+                    ax.set_ylabel(Stat)
+                    ax.set_xlabel('Horas de Integração')
+                    ax.tick_params(axis='x', labelrotation=90)
 
-                # Plota y=0.5 para ACOR e y=0.0 para demais tabelas
-                if Stat == 'ACOR':
-                    plt.axhline(y=0.5, color='black', linestyle='-', linewidth=1)
-                else:
-                    plt.axhline(y=0.0, color='black', linestyle='-', linewidth=1)
+                    # Plota y=0.5 para ACOR e y=0.0 para demais tabelas
+                    if Stat == 'ACOR':
+                        ax.axhline(y=0.5, color='black', linestyle='-', linewidth=1)
+                    else:
+                        ax.axhline(y=0.0, color='black', linestyle='-', linewidth=1)
   
-                # Grade do gráfico
-                plt.grid(color='grey', linestyle='--', linewidth=0.5)
+                    # Grade do gráfico
+                    ax.grid(color='grey', linestyle='--', linewidth=0.5)
                
-                # Se saveFig=True
-                if saveFig: 
-                    #fig_name = table.replace(str(tExt),'') + Vars[var][0] + '-combined.png'
+                    # Se saveFig=True
+                    if saveFig: 
+                        fig.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
+                        figs.update(fig_name, key)
+
+            if showFig:
+                plt.show()
+
+        # Opção combine=False (padrão)
+        else:
+
+            # Sem showFig, uma única figura (eixos, curva, linha de referência, grade e legenda) é criada
+            # e reutilizada em todos os gráficos (ver a classe LineTemplate)
+            if not showFig:
+                from render_functions import LineTemplate
+                tmpl = LineTemplate()
+            
+            # Chaves (stat, exp, start, end, kind, ext) de todas as tabelas (ver a função table_keys)
+            for tkey in table_keys(dTable):
+                table = select_table(dTable, tkey)
+                Stat = tkey[0]
+                fcts = table.loc[:,"%Previsao"].values
+
+                for var in range(len(Vars)):
+                    vname = Vars[var]
+
+                    #fig_name = table.replace(str(tExt),'') + Vars[var][0] + '.png'
                     if tExt == 'scan':
-                        fig_name = table.replace(table[4:table.find('_')],'EXPS').replace('T.'+str(tExt),'') + Vars[var][0].replace(':','') + '-combined.png'
+                        fig_name = Stat + tkey[1] + '_' + tkey[2] + tkey[3] + '_' + Vars[var][0].replace(':','') + '.png'
+                        series = table.loc[:,Vars[var][0].lower()]
                     else:
-                        fig_name = table.replace(table[4:table.find('_')],'EXPS').replace('T.'+str(tExt),'') + Vars[var][0].replace('-','') + '-combined.png'
-                    plt.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
+                        fig_name = Stat + tkey[1] + '_' + tkey[2] + tkey[3] + '_' + Vars[var][0].replace('-','') + '.png'
+                        series = table.loc[:,Vars[var][0]]
 
-        if showFig:
-            plt.show()
+                    ename = tkey[1]
 
-        plt.close()
+                    if saveFig:
+                        key = content_hash(series, fcts, title=Vars[var][1], ylabel=Stat, enames=[ename])
 
-    # Opção combine=False (padrão)
-    else:
-            
-        if isnotebook(get_ipython().__class__.__name__):
-            if showFig:
-                ipython.magic('matplotlib inline')           
-                mpl.rcParams.update({'figure.max_open_warning': 0})
-            else:
-                ipython.magic('matplotlib agg')           
-        else:
-            if not showFig:
-                mpl.use('agg')
-                mpl.rcParams.update({'figure.max_open_warning': 0})
+                        # A figura não mudou desde a última execução
+                        if figs.is_current(fig_name, key):
+                            continue
 
-        for table in list(dTable.keys()):
-            Stat = table[0:4]
-            fcts = dTable[table].loc[:,"%Previsao"].values
+                    if not showFig:
 
-            fig, ax = plt.subplots()
-            plt.rcParams.update({'figure.max_open_warning': 0})
+                        if Stat == 'ACOR':
+                            yref = 0.5
+                        else:
+                            yref = 0.0
 
-            for var in range(len(Vars)):
-                vname = Vars[var]
-
-                if tExt == 'scan':            
-                    ax = dTable[table].loc[:,[Vars[var][0].lower()]].plot(title=Vars[var][1], 
-                                                                          figsize=(8,5),
-                                                                          fontsize=12,
-                                                                          linewidth=1.5,
-                                                                          marker='o')
-                else:
-                    ax = dTable[table].loc[:,[Vars[var][0]]].plot(title=Vars[var][1], 
-                                                                  figsize=(8,5),
-                                                                  fontsize=12,
-                                                                  linewidth=1.5,
-                                                                  marker='o')
+                        tmpl.render(table.index, series, fcts, Vars[var][1], Stat, ename, yref=yref)
+
+                        if saveFig:
+                            tmpl.save(os.path.join(figDir, fig_name))
+                            figs.update(fig_name, key)
+
+                        continue
+
+                    fig = new_figure(showFig, figsize=(8,5))
+                    ax = fig.add_subplot()
+
+                    if tExt == 'scan':            
+                        table.loc[:,[Vars[var][0].lower()]].plot(ax=ax,
+                                                                 title=Vars[var][1], 
+                                                                 fontsize=12,
+                                                                 linewidth=1.5,
+                                                                 marker='o')
+                    else:
+                        table.loc[:,[Vars[var][0]]].plot(ax=ax,
+                                                         title=Vars[var][1], 
+                                                         fontsize=12,
+                                                         linewidth=1.5,
+                                                         marker='o')
  
-                ax.set_xticks(dTable[table].index)
-                ax.set_xticklabels(fcts)
-       
-                ename = table.split('_')[0][4:]
+                    ax.set_xticks(table.index)
+                    ax.set_xticklabels(fcts)
 
-                ax.legend([ename])
+                    ax.legend([ename])
             
-                plt.ylabel(Stat)
-                plt.xlabel('Horas de Integração')
-                plt.xticks(rotation=90)
+                    ax.set_ylabel(Stat)
+                    ax.set_xlabel('Horas de Integração')
+                    ax.tick_params(axis='x', labelrotation=90)
       
-                if Stat == 'ACOR':
-                    plt.axhline(y=0.5, color='black', linestyle='-', linewidth=1)
-                else:
-                    plt.axhline(y=0.0, color='black', linestyle='-', linewidth=1)
+                    if Stat == 'ACOR':
+                        ax.axhline(y=0.5, color='black', linestyle='-', linewidth=1)
+                    else:
+                        ax.axhline(y=0.0, color='black', linestyle='-', linewidth=1)
   
-                plt.grid(color='grey', linestyle='--', linewidth=0.5)
+                    ax.grid(color='grey', linestyle='--', linewidth=0.5)
  
-                if saveFig:            
-                    #fig_name = table.replace(str(tExt),'') + Vars[var][0] + '.png'
-                    if tExt == 'scan':
-                        fig_name = table.replace('T.'+str(tExt),'') + '_' + Vars[var][0].replace(':','') + '.png'
-                    else:
-                        fig_name = table.replace('T.'+str(tExt),'') + '_' + Vars[var][0].replace('-','') + '.png'
-                    plt.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
+                    if saveFig:            
+                        fig.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
+                        figs.update(fig_name, key)
                 
-            if showFig:
-                plt.show()
+                if showFig:
+                    plt.show()
 
-            plt.close()
+    if saveFig:
+        figs.save()
         
     return
 
@@ -378,9 +393,6 @@ def plot_lines_tStudent(dataInicial,dataFinal,dTable_series,Exps,Var,VarName,ldr
         * Na presente versão, apenas uma variável e nível pode ser plotada. 
     """        
 
-    # tExt é uma variável global e o seu valor é sempre atualizado
-    global tExt
-
 #    # Verifica se foram passados os argumentos opcionais e atribui os valores
 #    if 'combine' in kwargs:
 #        combine = kwargs['combine']
@@ -389,10 +401,9 @@ def plot_lines_tStudent(dataInicial,dataFinal,dTable_series,Exps,Var,VarName,ldr
 
     if 'tExt' in kwargs:
         tExt = kwargs['tExt']      
-        # Atualiza o valor global de tExt
-        gvars.tExt = tExt
     else:
-        tExt = gvars.tExt
+        # Extensão dos nomes das tabelas (ou dos arquivos binários) de dTable_series
+        tExt = table_ext(dTable_series)
 
     if 'figDir' in kwargs:
         figDir = kwargs['figDir']
@@ -419,86 +430,78 @@ def plot_lines_tStudent(dataInicial,dataFinal,dTable_series,Exps,Var,VarName,ldr
         lineStyles = gvars.lineStyles
         colors = ['black', 'red', 'green', 'blue', 'orange', 'brown', 'cyan', 'magenta']
 
-    if isnotebook(get_ipython().__class__.__name__):
-        if showFig:
-            ipython.magic('matplotlib inline')           
-            mpl.rcParams.update({'figure.max_open_warning': 0})
-        else:
-            ipython.magic('matplotlib agg')           
-    else:
-        if not showFig:
-            mpl.use('agg')
-            mpl.rcParams.update({'figure.max_open_warning': 0})
-
-    # Ignore Seaborn and respect rcParams
-    sns.reset_orig()    
+    setup_backend(showFig)
    
     datai = dataInicial.strftime('%Y%m%d%H')
     dataf = dataFinal.strftime('%Y%m%d%H')
  
-    fig, axs = plt.subplots(2, sharex=True, sharey=False, gridspec_kw={'hspace': 0}, figsize = (8,6))
+    # As figuras são construídas e salvas sem alterar os rcParams e podem ser plotadas simultaneamente
+    # em várias threads (ver a classe RcLock)
+    with rc_lock.shared():
+
+        fig = new_figure(showFig, figsize = (8,6))
+        axs = fig.subplots(2, sharex=True, sharey=False, gridspec_kw={'hspace': 0})
     
-    j = 0
+        j = 0
    
-    # Curvas da correlação de anomalias 
-    for i, varlev_exp in enumerate(varlev_exps):
-        if i == 0:
-            axs[0].plot(varlev_exp, color=colors[j], linestyle='--', label=str(Exps[j]), linewidth=1.5)
-        else:
-            axs[0].plot(varlev_exp, color=colors[j], label=str(Exps[j]), linewidth=1.5)
+        # Curvas da correlação de anomalias 
+        for i, varlev_exp in enumerate(varlev_exps):
+            if i == 0:
+                axs[0].plot(varlev_exp, color=colors[j], linestyle='--', label=str(Exps[j]), linewidth=1.5)
+            else:
+                axs[0].plot(varlev_exp, color=colors[j], label=str(Exps[j]), linewidth=1.5)
           
-        axs[0].grid(color='grey', linestyle='--', linewidth=0.5)
-        axs[0].legend()
+            axs[0].grid(color='grey', linestyle='--', linewidth=0.5)
+            axs[0].legend()
         
-        j += 1
+            j += 1
         
-    j = 1
+        j = 1
         
-    # Curvas do teste t-Student
-    for drosup_exp, droinf_exp, drom_exp in zip(ldrosup_exp,ldroinf_exp,ldrom_exp):
+        # Curvas do teste t-Student
+        for drosup_exp, droinf_exp, drom_exp in zip(ldrosup_exp,ldroinf_exp,ldrom_exp):
         
-        axs[1].bar(range(0, len(drosup_exp)), drosup_exp, color=(0, 0, 0, 0), edgecolor=colors[j], align='center', linestyle='-', linewidth=1.5)
-        axs[1].bar(range(0, len(droinf_exp)), droinf_exp, color=(0, 0, 0, 0), edgecolor=colors[j], align='center', linestyle='-', linewidth=1.5)
+            axs[1].bar(range(0, len(drosup_exp)), drosup_exp, color=(0, 0, 0, 0), edgecolor=colors[j], align='center', linestyle='-', linewidth=1.5)
+            axs[1].bar(range(0, len(droinf_exp)), droinf_exp, color=(0, 0, 0, 0), edgecolor=colors[j], align='center', linestyle='-', linewidth=1.5)
         
-        axs[1].plot(drom_exp, color=colors[j])
+            axs[1].plot(drom_exp, color=colors[j])
 
-        j += 1
+            j += 1
         
-    axs[1].axhline(color='black', linewidth=0.5)
-    axs[1].grid(color='grey', linestyle='--', linewidth=0.5)
+        axs[1].axhline(color='black', linewidth=0.5)
+        axs[1].grid(color='grey', linestyle='--', linewidth=0.5)
         
-    for ax in axs:
-        ax.label_outer()        
-
-    axs[0].axhline(y=0.5, color='black', linestyle='-', linewidth=1)
-
-    axs[0].set_title(str(VarName))
-    axs[1].set_xlabel('Horas de Integração')
-    axs[0].set_ylabel('ACOR')
-    axs[1].set_ylabel('Valor Crítico')        
-    plt.xticks(rotation=90)
-
-    axs[1].text(0.01, 0.93, "Diferença em relação a " + Exps[0], transform=ax.transAxes);
-    axs[1].text(0.01, 0.18, "Diferenças na ACOR possuem significância", transform=ax.transAxes);
-    axs[1].text(0.01, 0.10, "de 95% quando as curvas estão fora das", transform=ax.transAxes);
-    axs[1].text(0.01, 0.02, "suas respectivas barras", transform=ax.transAxes);
-
-    fcts = dTable_series[list(dTable_series.keys())[0]].loc[:,"%Previsao"].values
-    axs[1].set_xticks(dTable_series[list(dTable_series.keys())[0]].index)
-    axs[1].set_xticklabels(fcts)
-
-    if saveFig:            
-        #fig_name = 'ACOREXPS' + str(datai) + str(dataf) + '_' + Var.replace(':','').upper() + '-' + 'tStudent.png'
-        if tExt == 'scan':
-            fig_name = 'ACOREXPS_' + str(datai) + str(dataf) + '_' + Var.replace(':','').upper() + '-' + 'tStudent.png'
-        else:
-            fig_name = 'ACOREXPS_' + str(datai) + str(dataf) + '_' + Var.replace('-','').upper() + '-' + 'tStudent.png'
-        plt.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
+        for ax in axs:
+            ax.label_outer()        
+
+        axs[0].axhline(y=0.5, color='black', linestyle='-', linewidth=1)
+
+        axs[0].set_title(str(VarName))
+        axs[1].set_xlabel('Horas de Integração')
+        axs[0].set_ylabel('ACOR')
+        axs[1].set_ylabel('Valor Crítico')        
+        axs[1].tick_params(axis='x', labelrotation=90)
+
+        axs[1].text(0.01, 0.93, "Diferença em relação a " + Exps[0], transform=ax.transAxes);
+        axs[1].text(0.01, 0.18, "Diferenças na ACOR possuem significância", transform=ax.transAxes);
+        axs[1].text(0.01, 0.10, "de 95% quando as curvas estão fora das", transform=ax.transAxes);
+        axs[1].text(0.01, 0.02, "suas respectivas barras", transform=ax.transAxes);
+
+        table = select_table(dTable_series, table_keys(dTable_series)[0])
+        fcts = table.loc[:,"%Previsao"].values
+        axs[1].set_xticks(table.index)
+        axs[1].set_xticklabels(fcts)
+
+        if saveFig:            
+            #fig_name = 'ACOREXPS' + str(datai) + str(dataf) + '_' + Var.replace(':','').upper() + '-' + 'tStudent.png'
+            if tExt == 'scan':
+                fig_name = 'ACOREXPS_' + str(datai) + str(dataf) + '_' + Var.replace(':','').upper() + '-' + 'tStudent.png'
+            else:
+                fig_name = 'ACOREXPS_' + str(datai) + str(dataf) + '_' + Var.replace('-','').upper() + '-' + 'tStudent.png'
+            fig.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
 
-    if showFig:
-        plt.show()
-    else:
-        plt.close()
+        if showFig:
+            plt.show()
 
     return
 
@@ -518,7 +521,8 @@ def plot_scorecard(dTable,Vars,Stats,Tstat,Exps,outDir,**kwargs):
     
     Parâmetros de entrada
     ---------------------
-        dTable : objeto dicionário com uma ou mais tabelas do SCANTEC;
+        dTable : objeto dicionário com uma ou mais tabelas do SCANTEC ou dataframe no formato longo
+                 (get_dataframe com tidy=True);
         Vars   : lista com os nomes e níveis das variáveis;
         Stats  : lista com os nomes das estatísticas a serem processadas;
         Tstat  : tipo de score a ser calculado;
@@ -533,9 +537,15 @@ def plot_scorecard(dTable,Vars,Stats,Tstat,Exps,outDir,**kwargs):
                   * saveFig=False (valor padrão), não salva as figuras;
                   * saveFig=True, salva as figuras;
         figDir  : string com o diretório onde as figuras serão salvas;
-        tExt    : string com o extensão dos nomes das tabelas do SCANTEC:
-                  * tExt='scan' (valor padrão), considera as tabelas do SCANTEC;
-                  * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC.
+        tExt    : string com o extensão dos nomes das tabelas do SCANTEC (valor padrão: a extensão
+                  dos nomes das tabelas de dTable):
+                  * tExt='scan', considera as tabelas do SCANTEC;
+                  * tExt='scam', considera os nomes das tabelas das versões antigas do SCANTEC;
+        force   : valor Booleano para plotar novamente as figuras que não mudaram (opção saveFig=True):
+                  * force=False (valor padrão), as figuras cujos dados e parâmetros são os mesmos da última
+                    execução (hashes registrados no manifesto scanplot_figures.json, em figDir) não são
+                    plotadas novamente;
+                  * force=True, plota todas as figuras.
 
     Resultado
     ---------
@@ -570,19 +580,18 @@ def plot_scorecard(dTable,Vars,Stats,Tstat,Exps,outDir,**kwargs):
         ao 'EXP1' ou que a mudança fracional é maior.
     """
 
+    import seaborn as sns
+
     if not len(Exps) == 2:
         raise Exception('Para utilizar a função plot_scorecard, são necessários 2 experimentos.')
 
     # Verifica se foram passados os argumentos opcionais e atribui os valores
 
-    global tExt
-
     if 'tExt' in kwargs:
         tExt = kwargs['tExt']      
-        # Atualiza o valor global de tExt
-        gvars.tExt = tExt
     else:
-        tExt = gvars.tExt
+        # Extensão dos nomes das tabelas (ou dos arquivos binários) de dTable
+        tExt = table_ext(dTable)
 
     if 'figDir' in kwargs:
         figDir = kwargs['figDir']
@@ -599,105 +608,101 @@ def plot_scorecard(dTable,Vars,Stats,Tstat,Exps,outDir,**kwargs):
     else:
         saveFig = gvars.saveFig
 
-    if isnotebook(get_ipython().__class__.__name__):
-        if showFig:
-            ipython.magic('matplotlib inline')           
-            mpl.rcParams.update({'figure.max_open_warning': 0})
-        else:
-            ipython.magic('matplotlib agg')           
+    if 'force' in kwargs:
+        force = kwargs['force']
     else:
-        if not showFig:
-            mpl.use('agg')
-            mpl.rcParams.update({'figure.max_open_warning': 0})
+        force = gvars.force
 
-    if tExt == 'scan': 
-        list_var = [ltuple[0].lower() for ltuple in Vars]
-    else:
-        list_var = [ltuple[0] for ltuple in Vars]
+    setup_backend(showFig)
 
-    for Stat in Stats:
-        Tables = list(filter(lambda x:Stat in x, [*dTable.keys()]))
-    
-        exp1 = [s for s in Tables if Exps[0] in s][0]
-        exp2 = [s for s in Tables if Exps[1] in s][0]
+    # Manifesto das figuras salvas em figDir (ver a classe FigureManifest)
+    if saveFig:
+        figs = FigureManifest(figDir, force=force or showFig)
+
+    # Ganho e mudança fracional de todas as estatísticas, variáveis e tempos de previsão (ver a função compute_scorecard)
+    score = compute_scorecard(dTable, Vars, Stats, Exps, tExt=tExt)
+
+    # Estilo "whitegrid" do Seaborn (font_scale=0.90), aplicado diretamente aos elementos das figuras,
+    # sem alterar os rcParams (sns.set), o que permite executar a função simultaneamente em várias threads
+    style = sns.axes_style("whitegrid")
+    context = sns.plotting_context(font_scale=0.90)
+    ticks = {"size": 1.5, "width": 0.5}
+
+    # As figuras são construídas e salvas sem alterar os rcParams e podem ser plotadas simultaneamente
+    # em várias threads (ver a classe RcLock)
+    with rc_lock.shared():
+
+        for Stat in Stats:
+            score_stat = score.xs(Stat, level='stat')[Tstat]
+
+            # Período das tabelas (YYYYMMDDHH)
+            datai = score_stat.index.get_level_values('period_start')[0].strftime('%Y%m%d%H')
+            dataf = score_stat.index.get_level_values('period_end')[0].strftime('%Y%m%d%H')
     
-        p_table1 = pd.pivot_table(dTable[exp1], index="%Previsao", values=list_var)
-        p_table2 = pd.pivot_table(dTable[exp2], index="%Previsao", values=list_var)
- 
-        if Tstat == "ganho":
-            # Porcentagem de ganho
-            if Stat == "ACOR":
-                score_table = ((p_table2[1:].T - p_table1[1:].T) / (1.0 - p_table1[1:].T)) * 100
-            elif Stat == "RMSE" or Stat == "VIES":
-                score_table = ((p_table2[1:].T - p_table1[1:].T) / (0.0 - p_table1[1:].T)) * 100
-        elif Tstat == "fc":
-            # Mudança fracional
-            score_table = (1.0 - (p_table2[1:].T / p_table1[1:].T))
-
-        # Tentativa de substituir os NaN - que aparecem quando vies e rmse são iguais a zero
-        score_table = score_table.fillna(0.0000001)
-
-        # Figura
-        plt.figure(figsize = (15,10))
-        
-        sns.set(style="whitegrid", font_scale=0.90)
-        sns.set_context(rc={"xtick.major.size":  1.5,  "ytick.major.size": 1.5,
-                            "xtick.major.pad":   0.05,  "ytick.major.pad": 0.05,
-                            "xtick.major.width": 0.5, "ytick.major.width": 0.5,
-                            "xtick.minor.size":  1.5,  "ytick.minor.size": 1.5,
-                            "xtick.minor.pad":   0.05,  "ytick.minor.pad": 0.05,
-                            "xtick.minor.width": 0.5, "ytick.minor.width": 0.5})
+            # Tabela com as variáveis nas linhas e os tempos de previsão (exceto o inicial) nas colunas
+            score_table = score_stat.droplevel(['ref', 'exp', 'period_start', 'period_end'])
+            score_table = score_table.unstack('lead').iloc[:, 1:].rename_axis(index=None, columns="%Previsao")
+
+            # Tentativa de substituir os NaN - que aparecem quando vies e rmse são iguais a zero
+            score_table = score_table.fillna(0.0000001)
+
+            if saveFig:
+                fig_name = "SCORECARD_" + str(Tstat).upper() + "_" + str(Stat) + "_" + str(Exps[0]) + "_" + str(Exps[1]) + "_" + datai + dataf + ".png"
+
+                key = content_hash(score_table, Tstat=Tstat, Stat=Stat, Exps=Exps[:2], period=datai + dataf)
+
+                # A figura não mudou desde a última execução
+                if figs.is_current(fig_name, key):
+                    continue
+
+            # Figura
+            fig = new_figure(showFig, figsize = (15,10))
+            ax = fig.add_subplot()
  
-        if Tstat == "ganho":
-            ax = sns.heatmap(score_table, annot=True, fmt="1.0f", cmap="RdYlGn", 
-                               vmin=-100, vmax=100, center=0, linewidths=0.25, square=False,
-                               cbar_kws={"shrink": 1.0, 
-                                         "ticks": np.arange(-100,110,10),
-                                         "pad": 0.01,
-                                         "orientation": "vertical"})
+            if Tstat == "ganho":
+                sns.heatmap(score_table, annot=True, fmt="1.0f", cmap="RdYlGn", 
+                            vmin=-100, vmax=100, center=0, linewidths=0.25, square=False, ax=ax,
+                            annot_kws={"size": context["font.size"]},
+                            cbar_kws={"shrink": 1.0, 
+                                      "ticks": np.arange(-100,110,10),
+                                      "pad": 0.01,
+                                      "orientation": "vertical"})
  
-            cbar = ax.collections[0].colorbar
-            cbar.set_ticks([-100, -50, 0, 50, 100])
-            cbar.set_ticklabels(["pior", "-50%", "0", "50%", "melhor"])
-            cbar.ax.tick_params(labelsize=12)    
+                cbar = ax.collections[0].colorbar
+                cbar.set_ticks([-100, -50, 0, 50, 100])
+                cbar.set_ticklabels(["pior", "-50%", "0", "50%", "melhor"])
                 
-            plt.title("Ganho " + str(Stat) + " (%) - " + str(Tables[0][9:19]) + "-" + str(Tables[0][19:29]) + "\n" + Exps[0] + " Vs. " + Exps[1], fontsize=14)
-            
-            fig = ax.get_figure()
+                ax.set_title("Ganho " + str(Stat) + " (%) - " + datai + "-" + dataf + "\n" + Exps[0] + " Vs. " + Exps[1], fontsize=14, color=style["text.color"])
  
-        elif Tstat == "fc":
-            ax = sns.heatmap(score_table, annot=True, fmt="1.0f", cmap="RdYlGn", 
-                               vmin=-1, vmax=1, center=0, linewidths=0.25, square=False,
-                               cbar_kws={"shrink": 1.0, 
-                                         "ticks": np.arange(-1,2,1),
-                                         "pad": 0.01,
-                                         "orientation": "vertical"})
+            elif Tstat == "fc":
+                sns.heatmap(score_table, annot=True, fmt="1.0f", cmap="RdYlGn", 
+                            vmin=-1, vmax=1, center=0, linewidths=0.25, square=False, ax=ax,
+                            annot_kws={"size": context["font.size"]},
+                            cbar_kws={"shrink": 1.0, 
+                                      "ticks": np.arange(-1,2,1),
+                                      "pad": 0.01,
+                                      "orientation": "vertical"})
  
-            cbar = ax.collections[0].colorbar
-            cbar.set_ticks([-1, -0.5, 0, 0.5, 1])
-            cbar.set_ticklabels(["pior", "-0.5", "0", "0.5", "melhor"])
-            cbar.ax.tick_params(labelsize=12)    
+                cbar = ax.collections[0].colorbar
+                cbar.set_ticks([-1, -0.5, 0, 0.5, 1])
+                cbar.set_ticklabels(["pior", "-0.5", "0", "0.5", "melhor"])
  
-            plt.title("Mudança Fracional " + str(Stat) + " - " + str(Tables[0][9:19]) + "-" + str(Tables[0][19:29]) + "\n" + Exps[0] + " Vs. " + Exps[1], fontsize=14)
-   
-            fig = ax.get_figure()
+                ax.set_title("Mudança Fracional " + str(Stat) + " - " + datai + "-" + dataf + "\n" + Exps[0] + " Vs. " + Exps[1], fontsize=14, color=style["text.color"])
 
-        plt.xlabel("Horas de Integração")
-        plt.yticks(fontsize=12)
-        plt.xticks(rotation=90, fontsize=12)
-    
-        plt.figure()
-        plt.tight_layout()
+            ax.set_xlabel("Horas de Integração", fontsize=context["axes.labelsize"], color=style["axes.labelcolor"])
+            ax.tick_params(which="both", labelsize=12, colors=style["xtick.color"], bottom=False, left=False, **ticks)
+            ax.tick_params(axis="x", labelrotation=90)
+            cbar.ax.tick_params(which="both", labelsize=12, colors=style["ytick.color"], **ticks)
 
-        if saveFig:
-            fig_name = "SCORECARD_" + str(Tstat).upper() + "_" + str(Stat) + "_" + str(Exps[0]) + "_" + str(Exps[1]) + "_" + str(Tables[0][9:19]) + str(Tables[0][19:29]) + ".png"
-
-            fig.savefig(os.path.join(figDir, fig_name), bbox_inches="tight", dpi=120)
-        
-        plt.close()
+            if saveFig:
+                fig.savefig(os.path.join(figDir, fig_name), bbox_inches="tight", dpi=120)
+                figs.update(fig_name, key)
     
-        if showFig:
-            plt.show()
+            if showFig:
+                plt.show()
+
+    if saveFig:
+        figs.save()
         
     return
 
@@ -714,7 +719,8 @@ def plot_dTaylor(dTable,data_conf,Vars,Stats,outDir,**kwargs):
     
     Parâmetros de entrada
     ---------------------
-        dTable    : objeto dicionário com uma ou mais tabelas do SCANTEC;
+        dTable    : objeto dicionário com uma ou mais tabelas do SCANTEC ou dataframe no formato longo
+                    (get_dataframe com tidy=True);
         Vars      : lista com os nomes e níveis das variáveis;
         data_conf : objeto dicionário com as configurações do SCANTEC;
         Stats     : lista com os nomes das estatísticas a serem processadas
@@ -729,7 +735,12 @@ def plot_dTaylor(dTable,data_conf,Vars,Stats,outDir,**kwargs):
         saveFig : valor Booleano para salvar ou não as figuras durante a plotagem:
                   * saveFig=False (valor padrão), não salva as figuras;
                   * saveFig=True, salva as figuras;
-        figDir  : string com o diretório onde as figuras serão salvas.
+        figDir  : string com o diretório onde as figuras serão salvas;
+        force   : valor Booleano para plotar novamente as figuras que não mudaram (opção saveFig=True):
+                  * force=False (valor padrão), as figuras cujos dados e parâmetros são os mesmos da última
+                    execução (hashes registrados no manifesto scanplot_figures.json, em figDir) não são
+                    plotadas novamente;
+                  * force=True, plota todas as figuras.
 
     Resultado
     ---------
@@ -759,15 +770,16 @@ def plot_dTaylor(dTable,data_conf,Vars,Stats,outDir,**kwargs):
     -----------
         Experimental, esta função considera o devio-padrão como a raiz quadrada do RMSE.
     """
+
+    import skill_metrics as sm
     
     # Verifica se foram passados os argumentos opcionais e atribui os valores
 
     if 'tExt' in kwargs:
         tExt = kwargs['tExt']      
-        # Atualiza o valor global de tExt
-        gvars.tExt = tExt
     else:
-        tExt = gvars.tExt
+        # Extensão dos nomes das tabelas (ou dos arquivos binários) de dTable
+        tExt = table_ext(dTable)
 
     if 'figDir' in kwargs:
         figDir = kwargs['figDir']
@@ -784,16 +796,16 @@ def plot_dTaylor(dTable,data_conf,Vars,Stats,outDir,**kwargs):
     else:
         saveFig = gvars.saveFig
 
-    if isnotebook(get_ipython().__class__.__name__):
-        if showFig:
-            ipython.magic('matplotlib inline')           
-            mpl.rcParams.update({'figure.max_open_warning': 0})
-        else:
-            ipython.magic('matplotlib agg')           
+    if 'force' in kwargs:
+        force = kwargs['force']
     else:
-        if not showFig:
-            mpl.use('agg')
-            mpl.rcParams.update({'figure.max_open_warning': 0})
+        force = gvars.force
+
+    setup_backend(showFig)
+
+    # Manifesto das figuras salvas em figDir (ver a classe FigureManifest)
+    if saveFig:
+        figs = FigureManifest(figDir, force=force or showFig)
 
     dataInicial = data_conf["Starting Time"]
     dataFinal = data_conf["Ending Time"]
@@ -801,31 +813,36 @@ def plot_dTaylor(dTable,data_conf,Vars,Stats,outDir,**kwargs):
     datai = dataInicial.strftime('%Y%m%d%H')
     dataf = dataFinal.strftime('%Y%m%d%H')
 
-    # Ignore Seaborn and respect rcParams
-    sns.reset_orig()
-    
     # Set the figure properties (optional)
-    rcParams["figure.figsize"] = [8.0, 6.5]
-    rcParams['lines.linewidth'] = 1 # line width for plots
-    rcParams.update({'font.size': 12}) # font size of axes text
-    rcParams['axes.titlepad'] = 40 # title vertical distance from plot
+    # O SkillMetrics plota por meio do pyplot (na figura atual) e lê os rcParams: os parâmetros abaixo
+    # são aplicados apenas durante a plotagem de cada diagrama (mpl.rc_context), executada com acesso
+    # exclusivo aos rcParams (ver a classe RcLock)
+    rc = {"figure.figsize": [8.0, 6.5], # figure size
+          "lines.linewidth": 1, # line width for plots
+          "font.size": 12, # font size of axes text
+          "axes.titlepad": 40} # title vertical distance from plot
     
     Exps = [*data_conf['Experiments'].keys()]
-    
-    fig = plt.figure()
        
     for exp in range(len(Exps)): 
+
+        # Tabelas ACOR, RMSE e VIES do experimento (ver as funções table_keys e select_table)
+        tables = []
+
+        for Stat in ['ACOR', 'RMSE', 'VIES']:
+            tkeys = table_keys(dTable, stat=Stat, exp=str(Exps[exp]))
+            if len(tkeys) == 0:
+                raise Exception('A tabela ' + Stat + ' do experimento ' + str(Exps[exp]) + ' não foi encontrada em dTable.')
+            tables.append(select_table(dTable, tkeys[0]))
+
+        tAcor, tRmse, tVies = tables
         
         for var in range(len(Vars)):
-        
-            tAcor = list(filter(lambda x:'ACOR' in x, [*dTable.keys()]))[exp]
-            tRmse = list(filter(lambda x:'RMSE' in x, [*dTable.keys()]))[exp]
-            tVies = list(filter(lambda x:'VIES' in x, [*dTable.keys()]))[exp]
     
-            bias  = dTable[tVies].loc[:,[Vars[var][0].lower()]].to_numpy()
-            ccoef = dTable[tAcor].loc[:,[Vars[var][0].lower()]].to_numpy()
-            crmsd = dTable[tRmse].loc[:,[Vars[var][0].lower()]].to_numpy()
-            sdev  = (dTable[tRmse].loc[:,[Vars[var][0].lower()]]**(1/2)).to_numpy() # rever
+            bias  = tVies.loc[:,[Vars[var][0].lower()]].to_numpy()
+            ccoef = tAcor.loc[:,[Vars[var][0].lower()]].to_numpy()
+            crmsd = tRmse.loc[:,[Vars[var][0].lower()]].to_numpy()
+            sdev  = (tRmse.loc[:,[Vars[var][0].lower()]]**(1/2)).to_numpy() # rever
 
             biasT = bias.T
             ccoefT = ccoef.T
@@ -837,23 +854,7 @@ def plot_dTaylor(dTable,data_conf,Vars,Stats,outDir,**kwargs):
             crmsd = np.squeeze(crmsdT)
             sdev = np.squeeze(sdevT)
     
-            label = [*dTable[tVies].loc[:,"%Previsao"].values]
-        
-            if not showFig:
-                plt.figure()    
-
-            plt.tight_layout()
-    
-            sm.taylor_diagram(sdev, crmsd, ccoef, markerLabel = label, 
-                              locationColorBar = 'EastOutside',
-                              markerDisplayed = 'colorBar', titleColorBar = 'Bias',
-                              markerLabelColor='black', markerSize=10,
-                              markerLegend='off', cmapzdata=bias,
-                              colRMS='g', styleRMS=':',  widthRMS=2.0, titleRMS='on',
-                              colSTD='b', styleSTD='-.', widthSTD=1.0, titleSTD ='on',
-                              colCOR='k', styleCOR='--', widthCOR=1.0, titleCOR='on')
-        
-            plt.title("Diagrama de Taylor " + str(Exps[exp]) + '\n' + str(Vars[var][1]), fontsize=14)
+            label = [*tVies.loc[:,"%Previsao"].values]
 
             if saveFig:
                 #fig_name = 'dtaylor-' + str(Exps[exp]) + '-' + Vars[var][0] + '.png'
@@ -861,14 +862,40 @@ def plot_dTaylor(dTable,data_conf,Vars,Stats,outDir,**kwargs):
                     fig_name = 'DTAYLOR_' + str(Exps[exp]) + '_' + str(datai) + str(dataf) + '_' + Vars[var][0].replace(':', '') + '.png'
                 else:
                     fig_name = 'DTAYLOR_' + str(Exps[exp]) + '_' + str(datai) + str(dataf) + '_' + Vars[var][0].replace('-','') + '.png'
-                plt.savefig(os.path.join(figDir, fig_name), bbox_inches="tight", dpi=120)
 
-            if showFig:
-                plt.show()
-            else:
-                plt.close(fig)     
+                key = content_hash(sdev, crmsd, ccoef, bias, label, title=str(Exps[exp]) + '\n' + str(Vars[var][1]))
+
+                # A figura não mudou desde a última execução
+                if figs.is_current(fig_name, key):
+                    continue
+        
+            # Sem showFig, a figura do pyplot não é mostrada pelo backend atual (modo interativo desligado)
+            with rc_lock.exclusive(), mpl.rc_context(rc), (nullcontext() if showFig else plt.ioff()):
+
+                fig = plt.figure()
+    
+                sm.taylor_diagram(sdev, crmsd, ccoef, markerLabel = label, 
+                                  locationColorBar = 'EastOutside',
+                                  markerDisplayed = 'colorBar', titleColorBar = 'Bias',
+                                  markerLabelColor='black', markerSize=10,
+                                  markerLegend='off', cmapzdata=bias,
+                                  colRMS='g', styleRMS=':',  widthRMS=2.0, titleRMS='on',
+                                  colSTD='b', styleSTD='-.', widthSTD=1.0, titleSTD ='on',
+                                  colCOR='k', styleCOR='--', widthCOR=1.0, titleCOR='on')
+        
+                plt.title("Diagrama de Taylor " + str(Exps[exp]) + '\n' + str(Vars[var][1]), fontsize=14)
+
+                if saveFig:
+                    fig.savefig(os.path.join(figDir, fig_name), bbox_inches="tight", dpi=120)
+                    figs.update(fig_name, key)
+
+                if showFig:
+                    plt.show()
+                else:
+                    plt.close(fig)     
 
-    plt.close(fig)     
+    if saveFig:
+        figs.save()
 
     return
 
@@ -901,12 +928,48 @@ def plot_fields(dSet,Vars,Stats,outDir,**kwargs):
         combine    : valor Booleano para combinar os campos das estatísticas dos experimentos em um só gráfico:
                      * combine=False (valor padrão), plota os campos em gráficos separados;
                      * combine=True, plota os campos das mesmas estatísticas no mesmo gráfico (painel);
-        tExt       : string com o extensão dos nomes das tabelas do SCANTEC:
-                     * tExt='scan' (valor padrão), considera os arquivos binários do SCANTEC;
+        tExt       : string com o extensão dos nomes das tabelas do SCANTEC (valor padrão: a extensão
+                     dos nomes dos arquivos binários de dSet):
+                     * tExt='scan', considera os arquivos binários do SCANTEC;
                      * tExt='scam', considera os nomes dos arquivos binários das versões antigas do SCANTEC.
         hvplot     : valor Booleano para apresentar utilizar o hvplot (holoviews) e controlar o loop temporal das figuras por meio de widgets
                      * hvplot=False (valor padrão), apresenta os campos como um painel
                      * hvplot=True, apresenta os campos como um loop controlado por widgets
+        stream     : valor Booleano para plotar os campos um de cada vez (opção combine=False e hvplot=False):
+                     * stream=False (valor padrão), plota os campos a partir dos datasets em memória;
+                     * stream=True, lê cada campo bidimensional apenas no momento em que é plotado e o descarta
+                       em seguida (ver a função iter_fields); com os datasets obtidos com get_dataset(mmap=True)
+                       ou get_dataset(lazy=True), a memória utilizada é constante, independentemente do número
+                       de arquivos e de tempos;
+        workers    : número de processos utilizados na plotagem (opção combine=False e hvplot=False):
+                     * workers=None (valor padrão), plota as figuras sequencialmente;
+                     * workers=n, distribui as figuras entre n processos, cada um com a sua própria figura
+                       (canvas Agg, GeoAxes e linhas de costa criados uma única vez, ver a função render_fields);
+                       as figuras são salvas com os mesmos nomes (e não são mostradas) e o progresso e a taxa
+                       de figuras por segundo são informados durante a plotagem; requer saveFig=True;
+        render     : string com a forma de plotagem dos campos:
+                     * render='contour' (valor padrão), plota os contornos preenchidos (contourf);
+                     * render='raster', plota a grade regular diretamente como imagem (imshow no Matplotlib e
+                       image no hvplot), sem o cálculo dos contornos; o tempo de plotagem e o tamanho dos
+                       gráficos interativos não dependem do número de níveis dos contornos;
+        rasterize  : valor Booleano para rasterizar os campos no servidor (datashader) nos gráficos interativos
+                     (opção hvplot=True e render='raster'):
+                     * rasterize=False (valor padrão), envia a grade completa ao navegador;
+                     * rasterize=True, envia ao navegador apenas a imagem na resolução da tela (requer o datashader);
+        levels     : níveis de cores dos campos:
+                     * levels=None (valor padrão), os níveis de cada figura são calculados a partir do próprio campo;
+                     * levels=True, calcula uma única vez os níveis de cada par (estatística, variável) a partir de
+                       todos os campos de dSet (ver a função field_levels), utilizados em todas as figuras;
+                     * levels=dicionário obtido com a função field_levels (ex.: com as opções robust e sample);
+        animation  : string com o formato das animações da evolução temporal dos campos (opção combine=False e hvplot=False):
+                     * animation=None (valor padrão), salva uma figura PNG por campo e tempo;
+                     * animation='mp4', salva um vídeo MP4 (requer o ffmpeg) por estatística, experimento e variável;
+                     * animation='gif', salva um GIF animado por estatística, experimento e variável;
+                     os quadros são enviados diretamente ao codificador, sem figuras intermediárias, com uma única
+                     figura por animação e a mesma escala de cores em todos os quadros (ver a função animate_fields);
+                     com series=True, os arquivos diários de uma mesma estatística, experimento e variável formam
+                     uma única animação;
+        fps        : número de quadros por segundo das animações (valor padrão: 4);
 
     Resultado
     ---------
@@ -934,10 +997,16 @@ def plot_fields(dSet,Vars,Stats,outDir,**kwargs):
 
         scanplot.plot_fields(dSet,Vars,Stats,outDir,showFig=True,saveFig=True,lineStyles=lineStyles,figDir=figDir)
     """
-  
-    # tExt é uma variável global e o seu valor é sempre atualizado
-    global tExt
 
+    import cartopy.crs as ccrs
+    import hvplot.xarray
+    import holoviews as hv
+    import panel as pn
+    import param
+
+    from render_functions import field_names, field_levels, render_fields, animate_fields, plot_field, map_gridlines, MapTemplate
+    from asset_functions import coastline_feature
+  
     # Verifica se foram passados os argumentos opcionais e atribui os valores
     if 'combine' in kwargs:
         combine = kwargs['combine']
@@ -946,10 +1015,9 @@ def plot_fields(dSet,Vars,Stats,outDir,**kwargs):
 
     if 'tExt' in kwargs:
         tExt = kwargs['tExt']      
-        # Atualiza o valor global de tExt
-        gvars.tExt = tExt
     else:
-        tExt = gvars.tExt
+        # Extensão dos nomes das tabelas (ou dos arquivos binários) de dSet
+        tExt = table_ext(dSet)
 
     if 'figDir' in kwargs:
         figDir = kwargs['figDir']
@@ -984,28 +1052,82 @@ def plot_fields(dSet,Vars,Stats,outDir,**kwargs):
     else:
         avaltype = gvars.avaltype
 
+    if 'stream' in kwargs:
+        stream = kwargs['stream']
+    else:
+        stream = gvars.stream
+
+    if 'workers' in kwargs:
+        workers = kwargs['workers']
+    else:
+        workers = None
+
+    if 'render' in kwargs:
+        render = kwargs['render']
+    else:
+        render = gvars.render
+
+    if render not in ['contour', 'raster']:
+        raise Exception("Opção render inválida: " + str(render) + " (utilize render='contour' ou render='raster').")
+
+    if 'rasterize' in kwargs:
+        rasterize = kwargs['rasterize']
+    else:
+        rasterize = gvars.rasterize
+
+    if rasterize:
+        try:
+            import datashader
+        except ImportError:
+            print('O datashader não está instalado, os campos serão enviados sem rasterização (rasterize=False).')
+            rasterize = False
+
+    if 'levels' in kwargs:
+        levels = kwargs['levels']
+    else:
+        levels = None
+
+    if 'animation' in kwargs:
+        animation = kwargs['animation']
+    else:
+        animation = gvars.animation
+
+    if 'fps' in kwargs:
+        fps = kwargs['fps']
+    else:
+        fps = gvars.fps
+
+    # Os níveis de cores são calculados uma única vez para todas as figuras
+    if levels is True:
+        levels = field_levels(dSet)
+
+    def get_levels(file, var):
+        if levels is None:
+            return None
+        return levels.get((file.split('_')[0][0:4], var))
 
     # Opção combine=True    
     if combine and hvplot:
     
-        if isnotebook(get_ipython().__class__.__name__): # seções iterativas
-            if showFig:
-                ipython.magic('matplotlib inline')           
-                #mpl.rc('figure', max_open_warning = 0)
-                mpl.rcParams.update({'figure.max_open_warning': 0})
-            else:
-                ipython.magic('matplotlib agg')           
-        else: # seções não iterativas
-            if not showFig:
-                mpl.use('agg')
-                mpl.rcParams.update({'figure.max_open_warning': 0})
+        setup_backend(showFig)
 
         #print('combine=True and hvplot=True')
 
         def display_field(filename, variable, time):
             tmp = dSet[filename][variable].isel(time=time).load()
+            lv = get_levels(filename, variable)
+            if render == 'raster':
+                opts = {'rasterize': rasterize}
+                if lv is not None:
+                    opts['clim'] = (lv['levels'][0], lv['levels'][-1])
+                return tmp.hvplot.image(colorbar=True, coastline=True, global_extent=True, frame_height=450, 
+                                        crs=ccrs.PlateCarree(), projection=ccrs.PlateCarree(), **opts)
+            if lv is not None:
+                opts = {'levels': list(lv['levels'])}
+            else:
+                opts = {'levels': 10}
             return tmp.hvplot.contourf(colorbar=True, coastline=True, global_extent=True, frame_height=450, 
-                                       crs=ccrs.PlateCarree(), projection=ccrs.PlateCarree(), levels=10)
+                                       crs=ccrs.PlateCarree(), projection=ccrs.PlateCarree(), **opts)
         
         filenames = list(dSet.keys())
         variables = list(dSet[filenames[0]].data_vars)
@@ -1030,40 +1152,32 @@ def plot_fields(dSet,Vars,Stats,outDir,**kwargs):
 
     elif combine and not hvplot:
 
-        if isnotebook(get_ipython().__class__.__name__): # seções iterativas
-            if showFig:
-                ipython.magic('matplotlib inline')           
-                #mpl.rc('figure', max_open_warning = 0)
-                mpl.rcParams.update({'figure.max_open_warning': 0})
-            else:
-                ipython.magic('matplotlib agg')           
-        else: # seções não iterativas
-            if not showFig:
-                mpl.use('agg')
-                mpl.rcParams.update({'figure.max_open_warning': 0})
+        setup_backend(showFig)
 
         #print('combine=True and hvplot=False')
 
     elif not combine and hvplot:
 
-        if isnotebook(get_ipython().__class__.__name__): # seções iterativas
-            if showFig:
-                ipython.magic('matplotlib inline')           
-                #mpl.rc('figure', max_open_warning = 0)
-                mpl.rcParams.update({'figure.max_open_warning': 0})
-            else:
-                ipython.magic('matplotlib agg')           
-        else: # seções não iterativas
-            if not showFig:
-                mpl.use('agg')
-                mpl.rcParams.update({'figure.max_open_warning': 0})
+        setup_backend(showFig)
 
         #print('combine=False and hvplot=True')
 
         def plot(fname, var, title):
+            lv = get_levels(fname, var)
+            if render == 'raster':
+                opts = {'rasterize': rasterize}
+                if lv is not None:
+                    opts['clim'] = (lv['levels'][0], lv['levels'][-1])
+                return dSet[fname][var].hvplot.image(groupby='time', title=title, colorbar=True, coastline=True, 
+                                                     global_extent=True, frame_height=100, crs=ccrs.PlateCarree(),
+                                                     projection=ccrs.PlateCarree(), **opts)
+            if lv is not None:
+                opts = {'levels': list(lv['levels'])}
+            else:
+                opts = {'levels': 10}
             return dSet[fname][var].hvplot.contourf(groupby='time', title=title, colorbar=True, coastline=True, 
                                                     global_extent=True, frame_height=100, crs=ccrs.PlateCarree(),
-                                                    projection=ccrs.PlateCarree(), levels=10)
+                                                    projection=ccrs.PlateCarree(), **opts)
 
         def playout(obj_lst):
                 layout = hv.Layout(fld_obj_lst).cols(3)
@@ -1090,16 +1204,7 @@ def plot_fields(dSet,Vars,Stats,outDir,**kwargs):
     # Opção combine=False (padrão)
     else:
             
-        if isnotebook(get_ipython().__class__.__name__):
-            if showFig:
-                ipython.magic('matplotlib inline')           
-                mpl.rcParams.update({'figure.max_open_warning': 0})
-            else:
-                ipython.magic('matplotlib agg')           
-        else:
-            if not showFig:
-                mpl.use('agg')
-                mpl.rcParams.update({'figure.max_open_warning': 0})
+        setup_backend(showFig)
 
         #print('combine=False and hvplot=False') # Faz um loop simples dentro do dicionário para plotar todas as figuras
 
@@ -1118,60 +1223,93 @@ def plot_fields(dSet,Vars,Stats,outDir,**kwargs):
             cax = divider.append_axes(loc, '5%', pad='3%', axes_class=mpl.pyplot.Axes)
             ax.get_figure().colorbar(mappable, cax=cax, orientation=orientation)
 
-        for file in list(dSet.keys()):
+        # Animações (arquivo -> variável -> tempo)
+        if animation is not None:
 
-            ntime = len(dSet[file].time)-1
+            if showFig:
+                print('As animações não são mostradas, apenas salvas.')
 
-            for time in range(ntime):
+            animate_fields(dSet, figDir, fmt=animation, fps=fps, render=render, levels=levels)
 
-                for var in list(dSet[file].data_vars):
+            return pn
 
-                    file_s = file.split('_')
-                    file_p1 = file_s[0]
-                    file_p2 = file_s[1].split('F.scan')[0]
-        
-                    stat = file_p1[0:4]
-                    exp = file_p1[4:8]
-        
-                    datai = file_p2[0:10]
-                    dataf = file_p2[10:20]
-        
-                    stime = dSet[file][var].isel(time=time).coords['time'].values
-                    pd_stime = pd.to_datetime(str(stime)) 
-                    ftime = pd_stime.strftime('%Y-%m-%d-%H')
-
-                    # Tamanho da figura
-                    plt.figure(figsize=(10,9))
-
-                    # Projeção
-                    ax = plt.subplot(projection=ccrs.PlateCarree())
-
-                    # Plota
-                    im = dSet[file][var].isel(time=time).plot.contourf(ax=ax, 
-                                                                      transform=ccrs.PlateCarree(),
-                                                                      add_colorbar=False)
-                    
-                    # Linhas de grade, costa e rótulos 
-                    gl = ax.gridlines(color='grey', linestyle='--', linewidth=0.5, draw_labels=True) 
-                    gl.xlabels_top, gl.ylabels_right = False, False
-                    #gl.toplabels_top, gl.rightlabels_right = False, False
-                    ax.coastlines()
-                    ax.set_aspect('equal') 
-
-                    # Barra de cores 
-                    make_colorbar(ax, im, orientation='vertical')
-
-                    # Título
-                    ax.set_title(stat + ' ' + exp + ' ' + var + ' (' + ftime + ')')
+        # Campos a serem plotados (arquivo -> tempo -> variável)
+        if workers is not None and workers > 1:
+            # Os processos apenas salvam as figuras (ver a função render_fields)
+            if not saveFig:
+                raise Exception("A opção workers > 1 requer saveFig=True (as figuras plotadas pelos processos são apenas salvas).")
 
-                    # Se saveFig=True
-                    if saveFig: 
-                        fig_name = stat + '_' + exp + '_' + var + '-' + ftime  + str('.png')
-                        plt.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
+            # Os campos são lidos pelos processos (ver a função render_fields)
+            fields = ((file, var, dSet[file][var].isel(time=time)) for file in list(dSet.keys()) 
+                      for time in range(len(dSet[file].time)-1) for var in list(dSet[file].data_vars))
 
-                    if showFig:
-                        plt.draw()
-                    else:
-                        plt.close() 
+            total = sum((len(dSet[file].time)-1) * len(dSet[file].data_vars) for file in list(dSet.keys()))
+
+            if showFig:
+                print('As figuras plotadas pelos processos (workers > 1) não são mostradas, apenas salvas.')
+
+            render_fields(fields, figDir, workers, total=total, render=render, levels=levels)
+
+            return pn
+
+        elif stream:
+            # Um campo de cada vez, lido do disco (ou da visão mapeada em memória) apenas quando é plotado
+            fields = iter_fields(dSet, times=slice(0, -1))
+        else:
+            fields = ((file, var, dSet[file][var].isel(time=time)) for file in list(dSet.keys()) 
+                      for time in range(len(dSet[file].time)-1) for var in list(dSet[file].data_vars))
+
+        # Sem showFig, uma única figura (projeção, linhas de grade e de costa e eixo da barra de cores)
+        # é criada e reutilizada em todos os campos (ver a classe MapTemplate)
+        if not showFig:
+            tmpl = MapTemplate(render=render)
+
+        for file, var, field in fields:
+
+            stat, exp, ftime, title, fig_name = field_names(file, var, field)
+
+            if not showFig:
+
+                tmpl.render(field, title, levels=get_levels(file, var))
+
+                # Se saveFig=True
+                if saveFig:
+                    tmpl.save(os.path.join(figDir, fig_name))
+
+                tmpl.clear()
+
+                # Descarta o campo antes de ler o próximo
+                del field
+
+                continue
+
+            # Com showFig=True, cada campo é plotado em uma figura do pyplot (mostrada pelo backend)
+            fig = plt.figure(figsize=(10,9))
+
+            # Projeção
+            ax = fig.add_subplot(projection=ccrs.PlateCarree())
+
+            # Plota
+            im = plot_field(field, ax, render=render, levels=get_levels(file, var))
+            
+            # Linhas de grade, costa e rótulos (ver a função map_gridlines)
+            map_gridlines(ax)
+            ax.add_feature(coastline_feature(extent=ax.get_extent(ccrs.PlateCarree())))
+            ax.set_aspect('equal') 
+
+            # Barra de cores 
+            make_colorbar(ax, im, orientation='vertical')
+
+            # Título
+            ax.set_title(title)
+
+            # Se saveFig=True
+            if saveFig: 
+                fig.savefig(os.path.join(figDir, fig_name), bbox_inches='tight', dpi=120)
+
+            fig.canvas.draw_idle()
+
+            # Descarta o campo antes de ler o próximo
+            del field, im
 
         return pn
@@ -0,0 +1,741 @@
+#! /usr/bin/env python3
+
+# SCANPLOT - Um sistema de plotagem simples para o SCANTEC
+# CC-BY-NC-SA-4.0 2022 INPE
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from matplotlib import animation
+from matplotlib.axes import Axes
+from matplotlib.image import AxesImage
+from matplotlib.ticker import MaxNLocator
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+import cartopy.crs as ccrs
+from cartopy.mpl.ticker import LongitudeFormatter, LatitudeFormatter, LongitudeLocator, LatitudeLocator
+
+from asset_functions import coastline_feature
+from data_structures import dask_budget
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+def field_names(file,var,field):
+
+    """
+    field_names
+    ===========
+
+    Esta função obtém, a partir do nome do arquivo binário do SCANTEC, da variável e do campo, a
+    estatística, o experimento, a data, o título e o nome da figura utilizados pela função plot_fields.
+
+    Parâmetros de entrada
+    ---------------------
+        file  : string com o nome do arquivo binário do SCANTEC (ex.: ACORX126_20200601002020081500F.scan);
+        var   : string com o nome da variável;
+        field : dataarray (lat, lon) com o campo de um tempo.
+
+    Resultado
+    ---------
+        Tupla (stat, exp, ftime, title, fig_name).
+
+    Uso
+    ---
+        import render_functions as rf
+
+        stat, exp, ftime, title, fig_name = rf.field_names(file, var, field)
+    """
+
+    file_s = file.split('_')
+    file_p1 = file_s[0]
+
+    stat = file_p1[0:4]
+    exp = file_p1[4:8]
+
+    stime = field.coords['time'].values
+    pd_stime = pd.to_datetime(str(stime))
+    ftime = pd_stime.strftime('%Y-%m-%d-%H')
+
+    title = stat + ' ' + exp + ' ' + var + ' (' + ftime + ')'
+    fig_name = stat + '_' + exp + '_' + var + '-' + ftime  + str('.png')
+
+    return stat, exp, ftime, title, fig_name
+
+def field_levels(dSet,nlevels=10,robust=False,sample=None):
+
+    """
+    field_levels
+    ============
+
+    Esta função calcula, em uma única passagem pelos datasets, os níveis de cores de cada par
+    (estatística, variável), de forma que todas as figuras de uma mesma estatística e variável
+    (de todos os experimentos e tempos) utilizem a mesma escala de cores e que os limites das cores
+    não precisem ser calculados novamente a cada figura.
+
+    Parâmetros de entrada
+    ---------------------
+        dSet : objeto dicionário com um ou mais arquivos binários do SCANTEC (ver a função get_dataset).
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        nlevels : número (aproximado) de intervalos entre os níveis (valor padrão: 10);
+        robust  : valor Booleano para utilizar os percentis de 2% e 98% no lugar dos valores mínimo e máximo:
+                  * robust=False (valor padrão), utiliza os valores mínimo e máximo;
+                  * robust=True, utiliza os percentis de 2% e 98% (os valores extremos não determinam a escala);
+        sample  : número máximo de tempos de cada arquivo (igualmente espaçados) considerados no cálculo
+                  (útil para séries muito longas); se sample=None (valor padrão), todos os tempos são considerados.
+
+    Resultado
+    ---------
+        Dicionário com as chaves (estatística, variável) e valores {'levels': array com os níveis,
+        'extend': 'neither' ou 'both'}, utilizado pela função plot_fields (opção levels) e pela interface gráfica.
+
+    Uso
+    ---
+        import scanplot
+
+        levels = scanplot.field_levels(dSet, robust=True, sample=10)
+
+        scanplot.plot_fields(dSet, Vars, Stats, outDir, saveFig=True, levels=levels)
+    """
+
+    values = {}
+
+    for file in dSet.keys():
+
+        stat = file.split('_')[0][0:4]
+
+        dsf = dSet[file]
+
+        if sample is not None and sample < dsf.sizes['time']:
+            itimes = np.unique(np.linspace(0, dsf.sizes['time']-1, num=sample).round().astype(int))
+            dsf = dsf.isel(time=itimes)
+
+        for var in dsf.data_vars:
+
+            # Com get_dataset(lazy=True, memory=...), o limite de memória é aplicado apenas durante a leitura
+            with dask_budget(dsf):
+                field = np.asarray(dsf[var].values).ravel()
+            field = field[np.isfinite(field)]
+
+            if field.size == 0:
+                continue
+
+            # Os percentis são calculados com os valores de todos os arquivos da mesma estatística;
+            # sem a opção robust, apenas os valores mínimo e máximo de cada arquivo são mantidos
+            if robust:
+                values.setdefault((stat, var), []).append(field)
+            else:
+                values.setdefault((stat, var), []).append(np.array([field.min(), field.max()]))
+
+    levels = {}
+
+    for key, fields in values.items():
+
+        if robust:
+            vmin, vmax = np.percentile(np.concatenate(fields), [2, 98])
+            extend = 'both'
+        else:
+            vmin = min(field[0] for field in fields)
+            vmax = max(field[1] for field in fields)
+            extend = 'neither'
+
+        levels[key] = {'levels': MaxNLocator(nlevels).tick_values(vmin, vmax), 'extend': extend}
+
+    return levels
+
+def raster_field(field):
+
+    """
+    raster_field
+    ============
+
+    Esta função prepara um campo para a plotagem direta da grade regular (render='raster'): as longitudes
+    são convertidas para o intervalo [-180, 180) da projeção PlateCarree e ordenadas (os pontos repetidos,
+    como 0 e 360, são descartados), de forma que a imagem pode ser desenhada sem reprojeção.
+
+    Parâmetros de entrada
+    ---------------------
+        field : dataarray (lat, lon) com o campo de um tempo.
+
+    Resultado
+    ---------
+        Dataarray com as longitudes em [-180, 180), ou None se a grade resultante não for regular
+        (ex.: domínios que cruzam a longitude 180 ou grades definidas por níveis).
+
+    Uso
+    ---
+        import render_functions as rf
+
+        image = rf.raster_field(field)
+    """
+
+    lons = ((field['lon'].values + 180.) % 360.) - 180.
+    lons, ilons = np.unique(lons, return_index=True)
+
+    lats = field['lat'].values
+
+    for coord in (lons, lats):
+        if coord.size > 2:
+            step = np.diff(coord)
+            if not np.allclose(step, step[0], rtol=1e-3):
+                return None
+
+    return field.isel(lon=ilons).assign_coords(lon=lons)
+
+def plot_field(field,ax,render='contour',levels=None):
+
+    """
+    plot_field
+    ==========
+
+    Esta função plota um campo no GeoAxes ax (projeção PlateCarree), sem a barra de cores.
+
+    Parâmetros de entrada
+    ---------------------
+        field : dataarray (lat, lon) com o campo de um tempo;
+        ax    : GeoAxes onde o campo será plotado.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        render : string com a forma de plotagem do campo:
+                 * render='contour' (valor padrão), plota os contornos preenchidos (contourf);
+                 * render='raster', plota a grade regular diretamente como imagem (imshow), sem
+                   o cálculo dos contornos; se a grade não for regular, utiliza o pcolormesh;
+        levels : dicionário com os níveis de cores do campo ({'levels': ..., 'extend': ...}, ver a função
+                 field_levels); se levels=None (valor padrão), os níveis são calculados a partir do campo.
+
+    Resultado
+    ---------
+        Objeto do Matplotlib com o campo plotado (utilizado na barra de cores).
+
+    Uso
+    ---
+        import render_functions as rf
+
+        im = rf.plot_field(field, ax, render='raster')
+    """
+
+    if levels is not None:
+        kwargs = {'levels': levels['levels'], 'extend': levels['extend']}
+    else:
+        kwargs = {}
+
+    if render == 'raster':
+        image = raster_field(field)
+        if image is not None:
+            return image.plot.imshow(ax=ax, transform=ccrs.PlateCarree(), add_colorbar=False, add_labels=False, interpolation='nearest', **kwargs)
+        else:
+            return field.plot.pcolormesh(ax=ax, transform=ccrs.PlateCarree(), add_colorbar=False, add_labels=False, **kwargs)
+    elif render == 'contour':
+        return field.plot.contourf(ax=ax, transform=ccrs.PlateCarree(), add_colorbar=False, add_labels=False, **kwargs)
+    else:
+        raise Exception("Opção render inválida: " + str(render) + " (utilize render='contour' ou render='raster').")
+
+def map_gridlines(ax):
+
+    """
+    map_gridlines
+    =============
+
+    Esta função desenha as linhas de grade e os rótulos de longitude e latitude do GeoAxes ax (projeção
+    PlateCarree), com as posições calculadas uma única vez a partir da extensão atual do mapa. As linhas
+    de grade e os rótulos são os ticks e a grade dos eixos do Matplotlib (posições fixas), que não são
+    recalculados a cada desenho da figura, como ocorre com o Gridliner do Cartopy (ax.gridlines).
+
+    Parâmetros de entrada
+    ---------------------
+        ax : GeoAxes (projeção PlateCarree) com a extensão já definida (ex.: após a plotagem do campo).
+
+    Uso
+    ---
+        import render_functions as rf
+
+        im = rf.plot_field(field, ax)
+        rf.map_gridlines(ax)
+    """
+
+    x0, x1, y0, y1 = ax.get_extent(ccrs.PlateCarree())
+
+    xticks = np.asarray(LongitudeLocator().tick_values(x0, x1))
+    yticks = np.asarray(LatitudeLocator().tick_values(y0, y1))
+
+    ax.set_xticks(xticks[(xticks >= x0 - 1e-6) & (xticks <= x1 + 1e-6)], crs=ccrs.PlateCarree())
+    ax.set_yticks(yticks[(yticks >= y0 - 1e-6) & (yticks <= y1 + 1e-6)], crs=ccrs.PlateCarree())
+
+    ax.xaxis.set_major_formatter(LongitudeFormatter())
+    ax.yaxis.set_major_formatter(LatitudeFormatter())
+
+    # Linhas de grade sobre o campo
+    ax.grid(color='grey', linestyle='--', linewidth=0.5)
+    ax.set_axisbelow('line')
+
+class MapTemplate:
+
+    """
+    MapTemplate
+    ===========
+
+    Esta classe cria uma única vez a figura (com um canvas Agg próprio, sem o pyplot), o GeoAxes
+    com a projeção, as linhas de costa, as linhas de grade e o eixo da barra de cores utilizados nas
+    figuras da função plot_fields. A cada campo, apenas os contornos, a barra de cores e o título são
+    substituídos. A extensão do mapa (e, com ela, a resolução das linhas de costa e as posições das
+    linhas de grade e dos seus rótulos, ver a função map_gridlines) é fixada no primeiro campo plotado
+    (todos os campos plotados com o mesmo modelo devem ter a mesma grade).
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        figsize : tupla com o tamanho da figura (valor padrão: (10, 9));
+        render  : string com a forma de plotagem dos campos (ver a função plot_field):
+                  * render='contour' (valor padrão), plota os contornos preenchidos;
+                  * render='raster', plota a grade regular diretamente como imagem.
+
+    Uso
+    ---
+        import render_functions as rf
+
+        tmpl = rf.MapTemplate()
+
+        tmpl.render(field, 'ACOR X126 TEMP:850 (2020-06-01-00)')
+        tmpl.save('ACOR_X126_TEMP:850-2020-06-01-00.png')
+    """
+
+    def __init__(self,figsize=(10,9),render='contour'):
+
+        self.render_mode = render
+
+        self.fig = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.fig)
+
+        # Projeção
+        self.ax = self.fig.add_subplot(projection=ccrs.PlateCarree())
+
+        self.ax.set_aspect('equal')
+
+        # Eixo da barra de cores
+        # Ref.: https://github.com/pydata/xarray/issues/619#issuecomment-459888596
+        divider = make_axes_locatable(self.ax)
+        self.cax = divider.append_axes('right', '5%', pad='3%', axes_class=Axes)
+        self.cax_locator = self.cax.get_axes_locator()
+
+        self.im = None
+        self.coastlines = None
+
+    def remove_field(self):
+
+        """
+        Remove os contornos (ou a imagem) do último campo plotado, mantendo a barra de cores.
+        """
+
+        if self.im is not None:
+            try:
+                self.im.remove()
+            except AttributeError:
+                # Contornos (ContourSet) nas versões do Matplotlib anteriores à 3.8
+                for coll in self.im.collections:
+                    coll.remove()
+            self.im = None
+
+    def clear(self):
+
+        """
+        Remove os contornos e a barra de cores do último campo plotado.
+        """
+
+        self.remove_field()
+
+        # A barra de cores altera o posicionamento do seu eixo (ex.: com as extensões das opções
+        # extend), que é restaurado para que a próxima barra de cores ocupe o mesmo espaço
+        self.cax.clear()
+        self.cax.set_axes_locator(self.cax_locator)
+
+    def render(self,field,title,levels=None):
+
+        """
+        Plota o campo (dataarray com as dimensões lat e lon) com o título indicado e, opcionalmente,
+        com os níveis de cores levels (ver a função field_levels).
+        """
+
+        self.clear()
+
+        self.im = plot_field(field, self.ax, render=self.render_mode, levels=levels)
+
+        # Fixa a extensão do mapa a partir do primeiro campo
+        self.ax.set_autoscale_on(False)
+
+        # Linhas de costa com as geometrias em memória (lidas uma única vez por processo), na resolução
+        # escolhida a partir da extensão do mapa (ver a função coastline_resolution), e linhas de grade
+        # e rótulos em posições fixas (ver a função map_gridlines)
+        if self.coastlines is None:
+            self.coastlines = self.ax.add_feature(coastline_feature(extent=self.ax.get_extent(ccrs.PlateCarree())))
+            map_gridlines(self.ax)
+
+        # Barra de cores
+        self.fig.colorbar(self.im, cax=self.cax, orientation='vertical')
+
+        # Título
+        self.ax.set_title(title)
+
+    def update(self,field,title,levels=None):
+
+        """
+        Substitui o campo plotado mantendo a barra de cores (utilizado nas animações, em que todos os
+        campos têm os mesmos níveis de cores). Com render='raster', apenas os dados da imagem são
+        atualizados; com render='contour', os contornos são recalculados.
+        """
+
+        if self.im is None:
+            self.render(field, title, levels=levels)
+            return
+
+        if isinstance(self.im, AxesImage):
+            self.im.set_data(np.ma.masked_invalid(raster_field(field).values))
+        else:
+            self.remove_field()
+            self.im = plot_field(field, self.ax, render=self.render_mode, levels=levels)
+
+        self.ax.set_title(title)
+
+    def save(self,fname):
+
+        """
+        Salva a figura no arquivo fname.
+        """
+
+        self.fig.savefig(fname, bbox_inches='tight', dpi=120)
+
+class LineTemplate:
+
+    """
+    LineTemplate
+    ============
+
+    Esta classe cria uma única vez a figura (com um canvas Agg próprio, sem o pyplot), os eixos, a curva,
+    a linha de referência, a grade e a legenda dos gráficos de linha da função plot_lines (opção
+    combine=False). A cada gráfico, apenas os dados da curva, o título, os rótulos do eixo x (quando
+    mudam), o nome do eixo y, a legenda e os limites dos eixos são atualizados. As figuras são iguais
+    às plotadas com o pandas (DataFrame.plot).
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        figsize : tupla com o tamanho da figura (valor padrão: (8, 5)).
+
+    Uso
+    ---
+        import render_functions as rf
+
+        tmpl = rf.LineTemplate()
+
+        tmpl.render(df.index, df['uvel:500'], df['%Previsao'], 'Vento Zonal @ 500 hPa [m/s]', 'ACOR', 'X126', yref=0.5)
+        tmpl.save('ACORX126_20200601002020081500_UVEL500.png')
+    """
+
+    def __init__(self,figsize=(8,5)):
+
+        self.fig = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.fig)
+
+        self.ax = self.fig.add_subplot()
+
+        # Curva (mesmo estilo da função plot_lines)
+        self.line, = self.ax.plot([], [], linewidth=1.5, marker='o')
+
+        # Linha de referência (y=0.5 para ACOR e y=0.0 para as demais estatísticas)
+        self.href = self.ax.axhline(y=0.0, color='black', linestyle='-', linewidth=1)
+
+        self.ax.set_xlabel('Horas de Integração')
+        self.ax.tick_params(labelsize=12)
+        self.ax.tick_params(axis='x', labelrotation=90)
+
+        # Grade do gráfico
+        self.ax.grid(color='grey', linestyle='--', linewidth=0.5)
+
+        self.legend = self.ax.legend([self.line], [''])
+
+        self.xticks = None
+
+    def render(self,x,y,fcts,title,ylabel,ename,yref=0.0):
+
+        """
+        Plota a curva y(x) com os rótulos fcts no eixo x (horas de integração), o título, o nome do
+        eixo y, o nome do experimento na legenda e a linha de referência em y=yref.
+        """
+
+        x = np.asarray(x)
+
+        self.line.set_data(x, np.asarray(y))
+        self.href.set_ydata([yref, yref])
+
+        # Os rótulos do eixo x são substituídos apenas quando mudam (ex.: tabelas com outros tempos)
+        xticks = (tuple(x), tuple(fcts))
+
+        if xticks != self.xticks:
+            self.ax.set_xticks(x)
+            self.ax.set_xticklabels(fcts)
+            self.xticks = xticks
+
+        self.ax.set_title(title)
+        self.ax.set_ylabel(ylabel)
+        self.legend.get_texts()[0].set_text(ename)
+
+        # Limites dos eixos a partir da curva; como em ax.axhline, a linha de referência é incluída
+        # apenas quando está fora dos limites da curva
+        self.ax.ignore_existing_data_limits = True
+        self.ax.update_datalim(self.line.get_xydata())
+        self.ax.autoscale_view()
+
+        ymin, ymax = self.ax.get_ybound()
+
+        if not ymin <= yref <= ymax:
+            self.ax.update_datalim([[x[0], yref]])
+            self.ax.autoscale_view(scalex=False)
+
+    def save(self,fname):
+
+        """
+        Salva a figura no arquivo fname.
+        """
+
+        self.fig.savefig(fname, bbox_inches='tight', dpi=120)
+
+# Modelo da figura e níveis de cores de cada processo da função render_fields (criados uma única vez por processo)
+worker_template = None
+worker_levels = None
+
+def init_worker(render='contour',levels=None):
+    global worker_template, worker_levels
+    worker_template = MapTemplate(render=render)
+    worker_levels = levels
+
+def render_field(task,figDir):
+
+    """
+    Plota e salva um campo com o modelo de figura do processo (função executada pelos processos
+    da função render_fields). Retorna o nome da figura.
+    """
+
+    file, var, field = task
+
+    stat, exp, ftime, title, fig_name = field_names(file, var, field)
+
+    if worker_levels is not None:
+        levels = worker_levels.get((stat, var))
+    else:
+        levels = None
+
+    worker_template.render(field.load(), title, levels=levels)
+    worker_template.save(os.path.join(figDir, fig_name))
+    worker_template.clear()
+
+    return fig_name
+
+def render_fields(fields,figDir,workers,total=None,report=100,render='contour',levels=None):
+
+    """
+    render_fields
+    =============
+
+    Esta função distribui a plotagem de uma sequência de campos entre um conjunto de processos. Cada
+    processo cria uma única vez a sua figura (canvas Agg, GeoAxes, linhas de costa e de grade e eixo da
+    barra de cores, ver a classe MapTemplate) e a reutiliza em todos os campos que plotar. Os nomes das
+    figuras são os mesmos da função plot_fields. O número de campos enviados aos processos e ainda não
+    plotados é limitado, de forma que a memória utilizada não depende do número de campos.
+
+    Parâmetros de entrada
+    ---------------------
+        fields  : sequência (ou gerador) de tuplas (file, var, field), em que field é o dataarray (lat, lon)
+                  do campo de um tempo; os campos de datasets obtidos com get_dataset(mmap=True) ou
+                  get_dataset(lazy=True) são lidos do disco pelos próprios processos;
+        figDir  : string com o diretório onde as figuras serão salvas;
+        workers : número de processos.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        total  : número total de campos (utilizado no relatório de progresso);
+        report : intervalo (em número de figuras) entre os relatórios de progresso (valor padrão: 100);
+        render : string com a forma de plotagem dos campos, 'contour' (valor padrão) ou 'raster' (ver a
+                 função plot_field);
+        levels : dicionário com os níveis de cores de cada par (estatística, variável) (ver a função field_levels);
+                 se levels=None (valor padrão), os níveis são calculados a partir de cada campo.
+
+    Resultado
+    ---------
+        Lista com os nomes das figuras salvas, na ordem em que foram concluídas.
+
+    Uso
+    ---
+        import render_functions as rf
+
+        fig_names = rf.render_fields(fields, figDir, workers=16)
+    """
+
+    fig_names = []
+
+    # Número máximo de campos enviados aos processos e ainda não plotados
+    maxpending = 2 * workers
+
+    t0 = time.perf_counter()
+
+    def progress(final=False):
+        elapsed = time.perf_counter() - t0
+        rate = len(fig_names) / elapsed if elapsed > 0 else 0.
+        if total is not None:
+            done = str(len(fig_names)) + '/' + str(total)
+        else:
+            done = str(len(fig_names))
+        if final:
+            print('Figuras concluídas: ' + done + ' em {:.1f} s ({:.2f} figuras/s, {:d} processos)'.format(elapsed, rate, workers))
+        else:
+            print('Figuras: ' + done + ' ({:.2f} figuras/s)'.format(rate))
+        sys.stdout.flush()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(render, levels)) as executor:
+
+        pending = set()
+
+        def collect(return_when):
+            done, rest = wait(pending, return_when=return_when)
+            for future in done:
+                fig_names.append(future.result())
+                if report and len(fig_names) % report == 0:
+                    progress()
+            return rest
+
+        for task in fields:
+            pending.add(executor.submit(render_field, task, figDir))
+            if len(pending) >= maxpending:
+                pending = collect(FIRST_COMPLETED)
+
+        while pending:
+            pending = collect(FIRST_COMPLETED)
+
+    progress(final=True)
+
+    return fig_names
+
+def animation_writer(fmt,fps):
+
+    """
+    Retorna o writer do Matplotlib e a extensão do arquivo das animações no formato fmt ('mp4' ou 'gif').
+    Se o ffmpeg não estiver disponível, as animações são salvas no formato GIF.
+    """
+
+    if fmt == 'mp4':
+        if animation.writers.is_available('ffmpeg'):
+            return animation.FFMpegWriter(fps=fps), 'mp4'
+        else:
+            print('O ffmpeg não está disponível, as animações serão salvas no formato GIF.')
+            fmt = 'gif'
+
+    if fmt == 'gif':
+        return animation.PillowWriter(fps=fps), 'gif'
+
+    raise Exception("Opção animation inválida: " + str(fmt) + " (utilize animation='mp4' ou animation='gif').")
+
+def animate_fields(dSet,figDir,fmt='mp4',fps=4,render='contour',levels=None,dpi=120):
+
+    """
+    animate_fields
+    ==============
+
+    Esta função salva uma animação (MP4 ou GIF) com a evolução temporal de cada campo (estatística,
+    experimento e variável) de um dicionário de datasets. Os quadros de todos os arquivos de um mesmo
+    campo (ex.: os arquivos diários lidos com series=True) são concatenados, na ordem de dSet, em uma
+    única animação. Os quadros são enviados diretamente ao
+    codificador, sem arquivos intermediários: uma única figura (ver a classe MapTemplate) é criada por
+    animação e, a cada tempo, apenas o campo (os dados da imagem, com render='raster', ou os contornos)
+    e o título são atualizados. Os campos são lidos um de cada vez.
+
+    Parâmetros de entrada
+    ---------------------
+        dSet   : objeto dicionário com um ou mais arquivos binários do SCANTEC (ver a função get_dataset);
+        figDir : string com o diretório onde as animações serão salvas.
+
+    Parâmetros de entrada opcionais
+    -------------------------------
+        fmt    : string com o formato das animações:
+                 * fmt='mp4' (valor padrão), vídeo MP4 (requer o ffmpeg; sem o ffmpeg, as animações são salvas em GIF);
+                 * fmt='gif', GIF animado;
+        fps    : número de quadros por segundo (valor padrão: 4);
+        render : string com a forma de plotagem dos campos, 'contour' (valor padrão) ou 'raster' (ver a função plot_field);
+        levels : dicionário com os níveis de cores de cada par (estatística, variável) (ver a função field_levels);
+                 se levels=None (valor padrão), os níveis são calculados a partir de dSet, de forma que todos os
+                 quadros de uma animação tenham a mesma escala de cores;
+        dpi    : resolução dos quadros (valor padrão: 120).
+
+    Resultado
+    ---------
+        Lista com os nomes das animações salvas (ex.: ACOR_X126_TEMP:850.mp4).
+
+    Uso
+    ---
+        import render_functions as rf
+
+        anim_names = rf.animate_fields(dSet, figDir, fmt='gif', render='raster')
+    """
+
+    if levels is None:
+        levels = field_levels(dSet)
+
+    # Arquivos de cada animação (estatística, experimento, variável), na ordem de dSet; com series=True,
+    # os quadros de todos os arquivos diários são concatenados em uma única animação
+    groups = {}
+
+    for file in dSet.keys():
+
+        stat = file.split('_')[0][0:4]
+        exp = file.split('_')[0][4:8]
+
+        for var in dSet[file].data_vars:
+            groups.setdefault((stat, exp, var), []).append(file)
+
+    anim_names = []
+
+    for (stat, exp, var), files in groups.items():
+
+        ntimes = sum(len(dSet[file].time) - 1 for file in files)
+
+        if ntimes < 1:
+            continue
+
+        writer, ext = animation_writer(fmt, fps)
+
+        anim_name = stat + '_' + exp + '_' + var + '.' + ext
+
+        tmpl = MapTemplate(figsize=(10,5), render=render)
+
+        lv = levels.get((stat, var))
+
+        t0 = time.perf_counter()
+
+        with writer.saving(tmpl.fig, os.path.join(figDir, anim_name), dpi):
+
+            for file in files:
+
+                for t in range(len(dSet[file].time) - 1):
+
+                    field = dSet[file][var].isel(time=t).load()
+
+                    stat, exp, ftime, title, fig_name = field_names(file, var, field)
+
+                    tmpl.update(field, title, levels=lv)
+
+                    writer.grab_frame()
+
+                    del field
+
+        elapsed = time.perf_counter() - t0
+
+        print('Animação ' + anim_name + ': {:d} quadros em {:.1f} s ({:.2f} quadros/s)'.format(ntimes, elapsed, ntimes / elapsed))
+        sys.stdout.flush()
+
+        anim_names.append(anim_name)
+
+    return anim_names
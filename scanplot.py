@@ -11,8 +11,20 @@ scanplot
 Funções
 -------
     read_nemalists      : lê os namelists e arquivos de definições do SCANTEC;
+    read_ctl            : lê os arquivos descritores do GrADS (.ctl) dos arquivos binários do SCANTEC;
     get_dataframe       : transforma as tabelas do SCANTEC em dataframes;
     get_dataset         : transforma os campos com a distribuição espacial das estatísticas do SCANTEC datasets;
+    DataoutIndex        : índice em memória dos arquivos disponíveis no diretório de saída do SCANTEC;
+    tables_to_long      : transforma um dicionário de tabelas do SCANTEC em um único dataframe no formato longo;
+    table_keys          : lista as chaves (estatística, experimento e período) das tabelas de um dicionário ou dataframe longo;
+    select_table        : seleciona uma tabela do SCANTEC a partir da sua chave, em um dicionário ou dataframe longo;
+    FieldMap            : mapeia em memória (np.memmap) um arquivo binário do SCANTEC, sem cópia dos campos;
+    iter_fields         : percorre os campos bidimensionais de um dicionário de datasets, um de cada vez;
+    dask_budget         : aplica ao dask, dentro de um bloco with, o limite de memória registrado em um dataset (lazy=True);
+    compute_scorecard   : calcula o ganho percentual e a mudança fracional de todas as estatísticas, variáveis e tempos de previsão;
+    field_levels        : calcula os níveis de cores de cada estatística e variável a partir de todos os campos;
+    prepare_natural_earth : baixa e valida os arquivos do Natural Earth (linhas de costa) em um diretório local;
+    set_natural_earth   : configura o Cartopy para utilizar os arquivos do Natural Earth de um diretório local, sem download;
     plot_lines          : plota gráficos de linha com os dataframes das tabelas do SCANTEC;
     plot_lines_tStudent : plota gráficos de linha com os dataframes das tabelas do SCANTEC;
     plot_scorecard      : resume as informações dos dataframes com as tabelas do SCANTEC em scorecards;
@@ -20,8 +32,42 @@ Funções
                           os dataframes com as tabelas do SCANTEC.
 """
 
-from core_scanplot import read_namelists, dummy
-from data_structures import get_dataframe, get_dataset
+import importlib
+
+from core_scanplot import read_namelists, read_ctl, dummy
+from data_structures import get_dataframe, get_dataset, DataoutIndex, tables_to_long, table_keys, select_table, FieldMap, iter_fields, dask_budget, compute_scorecard
 from aux_functions import concat_tables_and_loc, df_fill_nan, calc_tStudent, isnotebook 
-from plot_functions import plot_lines, plot_lines_tStudent, plot_scorecard, plot_dTaylor, plot_fields 
-from gui_functions import show_interface
\ No newline at end of file
+
+# Funções dos módulos de plotagem, dos mapas e da interface gráfica, que dependem de bibliotecas
+# com tempo de importação elevado (ex.: Matplotlib, Cartopy, Seaborn, hvplot e panel). Estes módulos
+# são importados apenas no primeiro uso de uma de suas funções (ex.: scanplot.plot_lines), de forma
+# que scripts que utilizam apenas as funções de leitura (ex.: get_dataframe) não pagam este custo.
+lazy_functions = {
+    'plot_lines'            : 'plot_functions',
+    'plot_lines_tStudent'   : 'plot_functions',
+    'plot_scorecard'        : 'plot_functions',
+    'plot_dTaylor'          : 'plot_functions',
+    'plot_fields'           : 'plot_functions',
+    'field_levels'          : 'render_functions',
+    'prepare_natural_earth' : 'asset_functions',
+    'check_natural_earth'   : 'asset_functions',
+    'set_natural_earth'     : 'asset_functions',
+    'show_interface'        : 'gui_functions',
+}
+
+# Nomes exportados por "from scanplot import *" (as funções de lazy_functions são importadas por
+# meio de __getattr__)
+__all__ = ['read_namelists', 'read_ctl', 'dummy',
+           'get_dataframe', 'get_dataset', 'DataoutIndex', 'tables_to_long', 'table_keys', 'select_table',
+           'FieldMap', 'iter_fields', 'dask_budget', 'compute_scorecard',
+           'concat_tables_and_loc', 'df_fill_nan', 'calc_tStudent', 'isnotebook'] + list(lazy_functions.keys())
+
+def __getattr__(name):
+    if name in lazy_functions:
+        func = getattr(importlib.import_module(lazy_functions[name]), name)
+        globals()[name] = func
+        return func
+    raise AttributeError("module 'scanplot' has no attribute '" + name + "'")
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(lazy_functions.keys()))
\ No newline at end of file
@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+
+# Uso:
+# $ conda activate SCANPLOT-teste2
+# $ python bench_cmd-plot_fields.py
+#
+# Compara a taxa de figuras por segundo (fps) da plotagem dos campos com a implementação anterior
+# da função plot_fields (uma figura do pyplot por campo, com a projeção, as linhas de costa, as linhas
+# de grade e o eixo da barra de cores criados a cada figura) e com a classe MapTemplate (uma única
+# figura reutilizada em todos os campos). Os campos são sintéticos (e suaves), com a geometria do
+# namelist do diretório test/SCANTEC.TESTS, e as figuras são salvas em um diretório temporário.
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+import matplotlib
+matplotlib.use('agg')
+import matplotlib.pyplot as plt
+
+import cartopy.crs as ccrs
+
+from datetime import timedelta
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+# Permite importar os módulos do SCANPLOT a partir do diretório scripts
+cdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, cdir)
+
+import core_scanplot as cs
+import render_functions as rf
+
+# Número de campos plotados (o primeiro campo de cada implementação não é considerado)
+nframes = 12
+
+data_vars, data_conf = cs.read_namelists(os.path.join(cdir, 'test/SCANTEC.TESTS'))
+
+xdef = int(((np.float32(data_conf['run domain upper right lon']) - np.float32(data_conf['run domain lower left lon'])) /
+            np.float32(data_conf['run domain resolution dx'])) + 1)
+ydef = int(((np.float32(data_conf['run domain upper right lat']) - np.float32(data_conf['run domain lower left lat'])) /
+            np.float32(data_conf['run domain resolution dy'])) + 1)
+
+lats = np.linspace(np.float32(data_conf['run domain lower left lat']), np.float32(data_conf['run domain upper right lat']), num=ydef)
+lons = np.linspace(np.float32(data_conf['run domain lower left lon']), np.float32(data_conf['run domain upper right lon']), num=xdef)
+times = pd.date_range(data_conf['Starting Time'], periods=nframes + 1, freq=timedelta(hours=int(data_conf['Forecast Time Step'])))
+
+def make_field(t):
+    lon, lat = np.meshgrid(np.deg2rad(lons), np.deg2rad(lats))
+    data = (np.sin(2 * lon + 0.3 * t) * np.cos(3 * lat + 0.1 * t)).astype(np.float32)
+    return xr.DataArray(data, dims=('lat', 'lon'), coords={'lat': lats, 'lon': lons, 'time': times[t]})
+
+def plot_field_orig(field,title,fname):
+
+    # Implementação anterior da plotagem de um campo (referência)
+    plt.figure(figsize=(10,9))
+
+    ax = plt.subplot(projection=ccrs.PlateCarree())
+
+    im = field.plot.contourf(ax=ax, transform=ccrs.PlateCarree(), add_colorbar=False)
+
+    gl = ax.gridlines(color='grey', linestyle='--', linewidth=0.5, draw_labels=True)
+    gl.xlabels_top, gl.ylabels_right = False, False
+    ax.coastlines()
+    ax.set_aspect('equal')
+
+    divider = make_axes_locatable(ax)
+    cax = divider.append_axes('right', '5%', pad='3%', axes_class=plt.Axes)
+    ax.get_figure().colorbar(im, cax=cax, orientation='vertical')
+
+    ax.set_title(title)
+
+    plt.savefig(fname, bbox_inches='tight', dpi=120)
+    plt.close()
+
+def bench_orig(fields,figDir):
+    for n, field in enumerate(fields):
+        if n == 1:
+            t0 = time.perf_counter()
+        plot_field_orig(field, 'ANTERIOR', os.path.join(figDir, 'anterior-' + str(n) + '.png'))
+    return (len(fields) - 1) / (time.perf_counter() - t0)
+
+def bench_template(fields,figDir):
+    tmpl = rf.MapTemplate()
+    for n, field in enumerate(fields):
+        if n == 1:
+            t0 = time.perf_counter()
+        tmpl.render(field, 'MAPTEMPLATE')
+        tmpl.save(os.path.join(figDir, 'maptemplate-' + str(n) + '.png'))
+        tmpl.clear()
+    return (len(fields) - 1) / (time.perf_counter() - t0)
+
+fields = [make_field(t) for t in range(nframes + 1)]
+
+with tempfile.TemporaryDirectory() as tmpDir:
+
+    print('Campos:', len(fields), '(' + str(xdef) + 'x' + str(ydef) + ' pontos)')
+
+    fps_orig = bench_orig(fields, tmpDir)
+    fps_tmpl = bench_template(fields, tmpDir)
+
+print('{:<28s}{:>14s}'.format('', 'figuras/s'))
+print('{:<28s}{:>14.2f}'.format('anterior (pyplot)', fps_orig))
+print('{:<28s}{:>14.2f}'.format('MapTemplate', fps_tmpl))
+print('Aceleração: {:.1f}x'.format(fps_tmpl / fps_orig))
@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+
+# Uso:
+# $ conda activate SCANPLOT-teste2
+# $ python bench_cmd-plot_lines.py
+#
+# Compara a taxa de gráficos por segundo da plotagem dos gráficos de linha da função plot_lines
+# (opção combine=False) com a implementação anterior (uma figura e um gráfico do pandas por tabela
+# e variável) e com a classe LineTemplate (uma única figura reutilizada em todos os gráficos). São
+# utilizadas as tabelas e todas as variáveis do diretório test/SCANTEC.TESTS e as figuras são salvas
+# em um diretório temporário (ou não são salvas, para a medida apenas da construção dos gráficos).
+
+import os
+import sys
+import time
+import tempfile
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Permite importar os módulos do SCANPLOT a partir do diretório scripts
+cdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, cdir)
+
+import core_scanplot as cs
+import data_structures as ds
+import render_functions as rf
+
+data_vars, data_conf = cs.read_namelists(os.path.join(cdir, 'test/SCANTEC.TESTS'))
+
+Vars = list(map(data_vars.get, [*data_vars.keys()]))
+Stats = ['ACOR', 'RMSE', 'VIES']
+Exps = list(data_conf['Experiments'].keys())
+outDir = os.path.join(cdir, 'test/SCANTEC.TESTS/dataout')
+
+dTable = ds.get_dataframe(data_conf['Starting Time'], data_conf['Ending Time'], Stats, Exps, outDir)
+
+# Lista de tuplas (tabela, estatística, variável, título) com os gráficos
+charts = [(table, table[0:4], var[0].lower(), var[1]) for table in dTable for var in Vars
+          if var[0].lower() in dTable[table].columns]
+
+def plot_line_orig(df,Stat,vname,title,ename,fname):
+
+    # Implementação anterior da plotagem de um gráfico (referência)
+    fig = Figure(figsize=(8,5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    df.loc[:,[vname]].plot(ax=ax, title=title, fontsize=12, linewidth=1.5, marker='o')
+
+    ax.set_xticks(df.index)
+    ax.set_xticklabels(df.loc[:,'%Previsao'].values)
+    ax.legend([ename])
+    ax.set_ylabel(Stat)
+    ax.set_xlabel('Horas de Integração')
+    ax.tick_params(axis='x', labelrotation=90)
+
+    if Stat == 'ACOR':
+        ax.axhline(y=0.5, color='black', linestyle='-', linewidth=1)
+    else:
+        ax.axhline(y=0.0, color='black', linestyle='-', linewidth=1)
+
+    ax.grid(color='grey', linestyle='--', linewidth=0.5)
+
+    if fname is not None:
+        fig.savefig(fname, bbox_inches='tight', dpi=120)
+
+def bench_orig(figDir):
+    t0 = time.perf_counter()
+    for n, (table, Stat, vname, title) in enumerate(charts):
+        fname = os.path.join(figDir, 'anterior-' + str(n) + '.png') if figDir else None
+        plot_line_orig(dTable[table], Stat, vname, title, table.split('_')[0][4:], fname)
+    return len(charts) / (time.perf_counter() - t0)
+
+def bench_template(figDir):
+    t0 = time.perf_counter()
+    tmpl = rf.LineTemplate()
+    for n, (table, Stat, vname, title) in enumerate(charts):
+        df = dTable[table]
+        tmpl.render(df.index, df.loc[:,vname], df.loc[:,'%Previsao'].values, title, Stat, table.split('_')[0][4:],
+                    yref=0.5 if Stat == 'ACOR' else 0.0)
+        if figDir:
+            tmpl.save(os.path.join(figDir, 'linetemplate-' + str(n) + '.png'))
+    return len(charts) / (time.perf_counter() - t0)
+
+print('Gráficos:', len(charts), '(' + str(len(dTable)) + ' tabelas, ' + str(len(Vars)) + ' variáveis)')
+
+with tempfile.TemporaryDirectory() as tmpDir:
+
+    # Aquecimento (importações e cache de fontes)
+    plot_line_orig(dTable[charts[0][0]], charts[0][1], charts[0][2], charts[0][3], 'X', os.path.join(tmpDir, 'aquecimento.png'))
+
+    results = [('construção', bench_orig(None), bench_template(None)),
+               ('construção e savefig', bench_orig(tmpDir), bench_template(tmpDir))]
+
+print('{:<24s}{:>18s}{:>18s}{:>14s}'.format('gráficos/s', 'anterior (pandas)', 'LineTemplate', 'aceleração'))
+for name, cps_orig, cps_tmpl in results:
+    print('{:<24s}{:>18.2f}{:>18.2f}{:>13.1f}x'.format(name, cps_orig, cps_tmpl, cps_tmpl / cps_orig))
@@ -0,0 +1,134 @@
+#! /usr/bin/env python3
+
+# Uso:
+# $ conda activate SCANPLOT-teste2
+# $ python bench_cmd-read_field.py
+#
+# Compara o tempo de leitura e o pico de memória da leitura dos arquivos binários do SCANTEC
+# com a implementação anterior (um FortranFile, uma atribuição de coordenadas e um transpose por
+# registro, seguidos de xr.concat) e com a função read_field_file (um array pré-alocado por arquivo).
+# Os arquivos binários são gerados em um diretório temporário com a geometria do namelist do 
+# diretório test/SCANTEC.TESTS.
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from datetime import timedelta
+from scipy.io import FortranFile
+
+# Permite importar os módulos do SCANPLOT a partir do diretório scripts
+cdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, cdir)
+
+import core_scanplot as cs
+import data_structures as ds
+
+# Número de arquivos e de repetições (o menor tempo é considerado)
+nfiles = 4
+nrep = 3
+
+data_vars, data_conf = cs.read_namelists(os.path.join(cdir, 'test/SCANTEC.TESTS'))
+
+fnames = [i[0] for i in data_vars.values()]
+nvars = len(fnames)
+
+xdef = int(((np.float32(data_conf['run domain upper right lon']) - np.float32(data_conf['run domain lower left lon'])) / 
+            np.float32(data_conf['run domain resolution dx'])) + 1)
+ydef = int(((np.float32(data_conf['run domain upper right lat']) - np.float32(data_conf['run domain lower left lat'])) / 
+            np.float32(data_conf['run domain resolution dy'])) + 1)
+tdef = int((int(data_conf['Forecast Total Time']) / int(data_conf['Analisys Time Step'])) + 1)
+
+lats = np.linspace(np.float32(data_conf['run domain lower left lat']), np.float32(data_conf['run domain upper right lat']), num=ydef)
+lons = np.linspace(np.float32(data_conf['run domain lower left lon']), np.float32(data_conf['run domain upper right lon']), num=xdef)
+times = pd.date_range(data_conf['Starting Time'], periods=tdef, freq=timedelta(hours=int(data_conf['Forecast Time Step'])))
+
+def read_field_file_orig(fname,fnames,xdef,ydef,tdef,lats,lons,times):
+
+    # Implementação anterior da leitura dos campos (referência)
+    nvars = len(fnames)
+
+    dsl = []
+    ds = xr.Dataset()
+
+    with open(fname,'rb') as f:
+
+        for t in np.arange(tdef):
+
+            for i in np.arange(nvars):
+
+                data = FortranFile(f, 'r')
+                field = data.read_record('f4').reshape(xdef, ydef, order='F')
+
+                field[field == -999.9] = np.nan
+
+                ds[fnames[i]] = (('lon','lat'), field)
+                ds.coords['lat'] = ('lat', lats)
+                ds.coords['lon'] = ('lon', lons)
+                ds.coords['time'] = [times[t]]
+
+                dst = ds.transpose('time', 'lat', 'lon')
+
+            dsl.append(dst)
+
+        dsc = xr.concat(dsl, dim='time')
+
+    return xr.concat(dsl, dim='time')
+
+def write_field_file(fname,seed):
+    rng = np.random.default_rng(seed)
+    rsize = np.array([xdef * ydef * 4], dtype='<i4').tobytes()
+    with open(fname,'wb') as f:
+        for t in range(tdef):
+            for i in range(nvars):
+                field = rng.random(xdef * ydef, dtype=np.float32)
+                field[:xdef] = -999.9
+                f.write(rsize)
+                f.write(field.astype('<f4').tobytes())
+                f.write(rsize)
+
+def bench(reader,files):
+    best = None
+    for rep in range(nrep):
+        t0 = time.perf_counter()
+        for fname in files:
+            reader(fname, fnames, xdef, ydef, tdef, lats, lons, times)
+        elapsed = time.perf_counter() - t0
+        if best is None or elapsed < best:
+            best = elapsed
+    tracemalloc.start()
+    dsl = [reader(fname, fnames, xdef, ydef, tdef, lats, lons, times) for fname in files]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, dsl
+
+with tempfile.TemporaryDirectory() as tmpDir:
+
+    files = []
+
+    for n in range(nfiles):
+        fname = os.path.join(tmpDir, 'ACOREXP' + str(n) + '_20200601002020081500F.scan')
+        write_field_file(fname, n)
+        files.append(fname)
+
+    size = sum(os.path.getsize(fname) for fname in files) / 1024**2
+
+    print('Arquivos:', nfiles, '(' + str(nvars) + ' variáveis, ' + str(tdef) + ' tempos, ' + 
+          str(xdef) + 'x' + str(ydef) + ' pontos, ' + '{:.1f}'.format(size) + ' MB)')
+
+    t_orig, m_orig, ds_orig = bench(read_field_file_orig, files)
+    t_new, m_new, ds_new = bench(ds.read_field_file, files)
+
+    for a, b in zip(ds_orig, ds_new):
+        xr.testing.assert_identical(a, b)
+
+print('{:<28s}{:>10s}{:>16s}'.format('', 'tempo (s)', 'pico (MB)'))
+print('{:<28s}{:>10.3f}{:>16.1f}'.format('anterior', t_orig, m_orig / 1024**2))
+print('{:<28s}{:>10.3f}{:>16.1f}'.format('read_field_file', t_new, m_new / 1024**2))
+print('Aceleração: {:.1f}x, memória: {:.1f}x menor'.format(t_orig / t_new, m_orig / m_new))
@@ -0,0 +1,55 @@
+#! /usr/bin/env python3
+
+# Uso:
+# $ conda activate SCANPLOT-teste2
+# $ python bench_cmd-read_table.py
+#
+# Compara o tempo de leitura das tabelas do SCANTEC com a função read_csv do Pandas
+# (leitor padrão da função get_dataframe) e com a função read_table (parser='fast').
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Permite importar os módulos do SCANPLOT a partir do diretório scripts
+cdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, cdir)
+
+import data_structures as ds
+
+outDir = os.path.join(cdir, 'test/SCANTEC.TESTS/dataout')
+
+# Número de repetições (o menor tempo é considerado)
+nrep = 3
+
+tables = ds.DataoutIndex(outDir).files(kind='T')
+
+def bench(reader):
+    best = None
+    for rep in range(nrep):
+        t0 = time.perf_counter()
+        for table in tables:
+            reader(table)
+        elapsed = time.perf_counter() - t0
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+t_pandas = bench(lambda table: pd.read_csv(table, sep=r"\s+"))
+t_fast = bench(lambda table: ds.read_table(table))
+t_array = bench(lambda table: ds.read_table(table, dataframe=False))
+
+# Verifica se os valores lidos são equivalentes
+for table in tables:
+    df_pandas = pd.read_csv(table, sep=r"\s+")
+    df_fast = ds.read_table(table)
+    assert list(df_pandas.columns) == list(df_fast.columns)
+    assert np.allclose(df_pandas.to_numpy(dtype=np.float64), df_fast.to_numpy(dtype=np.float64), atol=1e-6, equal_nan=True)
+
+print('Tabelas lidas: ' + str(len(tables)))
+print('pd.read_csv(sep="\\s+")           : {:8.3f} s ({:8.1f} tabelas/s)'.format(t_pandas, len(tables) / t_pandas))
+print('read_table (dataframe=True)      : {:8.3f} s ({:8.1f} tabelas/s, {:5.1f}x)'.format(t_fast, len(tables) / t_fast, t_pandas / t_fast))
+print('read_table (dataframe=False)     : {:8.3f} s ({:8.1f} tabelas/s, {:5.1f}x)'.format(t_array, len(tables) / t_array, t_pandas / t_array))
@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+
+# Uso:
+# $ conda activate SCANPLOT-teste2
+# $ python test_cmd-import_time.py            # limite padrão de 2 s
+# $ python test_cmd-import_time.py 1.5        # limite de 1,5 s
+#
+# Teste de regressão do tempo de importação do SCANPLOT: executa "python -X importtime -c 'import scanplot'"
+# (o menor tempo de algumas execuções é considerado), mostra os módulos com maior tempo de importação
+# e falha (código de saída 1) se o tempo total ultrapassar o limite ou se alguma das bibliotecas pesadas,
+# que devem ser importadas apenas no primeiro uso das funções de plotagem e da interface gráfica,
+# for importada por "import scanplot".
+
+import os
+import sys
+import subprocess
+
+cdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Número de execuções e limite do tempo de importação (s)
+nrep = 3
+limit = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+
+# Bibliotecas que não devem ser importadas por "import scanplot"
+heavy = ['matplotlib', 'cartopy', 'seaborn', 'skill_metrics', 'scipy.stats', 'hvplot', 'holoviews',
+         'panel', 'param', 'bokeh', 'tkinter', 'IPython']
+
+def import_times():
+
+    # Retorna um dicionário {módulo: tempo acumulado (s)} da importação do scanplot
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import scanplot'], cwd=cdir,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+    if proc.returncode != 0:
+        print(proc.stderr)
+        sys.exit(1)
+
+    times = {}
+
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumul_us, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(cumul_us) / 1e6
+
+    return times
+
+best = None
+
+for rep in range(nrep):
+    times = import_times()
+    if best is None or times['scanplot'] < best['scanplot']:
+        best = times
+
+print('Tempo de importação do scanplot: {:.2f} s (limite: {:.2f} s)'.format(best['scanplot'], limit))
+print('')
+print('{:<40s}{:>12s}'.format('Módulo', 'tempo (s)'))
+for module, elapsed in sorted(best.items(), key=lambda x: x[1], reverse=True)[1:11]:
+    print('{:<40s}{:>12.3f}'.format(module, elapsed))
+print('')
+
+failed = False
+
+imported = [module for module in heavy if module in best]
+
+if imported:
+    print('Bibliotecas importadas por "import scanplot" (devem ser importadas apenas no primeiro uso): ' + ', '.join(imported))
+    failed = True
+
+if best['scanplot'] > limit:
+    print('O tempo de importação ultrapassou o limite.')
+    failed = True
+
+if failed:
+    sys.exit(1)
+
+print('OK')
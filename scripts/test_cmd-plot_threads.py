@@ -0,0 +1,113 @@
+#! /usr/bin/env python3
+
+# Uso:
+# $ conda activate SCANPLOT-teste2
+# $ python test_cmd-plot_threads.py            # 4 threads
+# $ python test_cmd-plot_threads.py 8          # 8 threads
+#
+# Teste da plotagem simultânea em várias threads: plota as figuras das funções plot_lines (combine=False
+# e combine=True), plot_scorecard e plot_dTaylor com os dados do diretório test/SCANTEC.TESTS, primeiro
+# sequencialmente e depois simultaneamente (concurrent.futures.ThreadPoolExecutor), e falha (código de
+# saída 1) se alguma figura for diferente, se os rcParams do Matplotlib forem alterados ou se alguma
+# figura permanecer aberta no pyplot.
+
+import os
+import sys
+import time
+import filecmp
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Permite importar os módulos do SCANPLOT a partir do diretório scripts
+cdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, cdir)
+
+import scanplot
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+
+workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+data_vars, data_conf = scanplot.read_namelists(os.path.join(cdir, 'test/SCANTEC.TESTS'))
+
+dataInicial = data_conf['Starting Time']
+dataFinal = data_conf['Ending Time']
+Vars = list(map(data_vars.get, [*data_vars.keys()]))[:2]
+Stats = ['ACOR', 'RMSE', 'VIES']
+Exps = list(data_conf['Experiments'].keys())
+outDir = os.path.join(cdir, 'test/SCANTEC.TESTS/dataout')
+
+dTable = scanplot.get_dataframe(dataInicial, dataFinal, Stats, Exps, outDir)
+dTable2 = scanplot.get_dataframe(dataInicial, dataFinal, Stats, Exps[:2], outDir)
+
+def plot_jobs(figDir):
+
+    # Lista de tuplas (subdiretório, função) com as plotagens
+    return [('lines', lambda d: scanplot.plot_lines(dTable, Vars, Stats, outDir, saveFig=True, figDir=d)),
+            ('combined', lambda d: scanplot.plot_lines(dTable, Vars, Stats, outDir, saveFig=True, figDir=d, combine=True)),
+            ('ganho', lambda d: scanplot.plot_scorecard(dTable2, Vars, Stats, 'ganho', Exps[:2], outDir, saveFig=True, figDir=d)),
+            ('fc', lambda d: scanplot.plot_scorecard(dTable2, Vars, Stats, 'fc', Exps[:2], outDir, saveFig=True, figDir=d)),
+            ('dtaylor', lambda d: scanplot.plot_dTaylor(dTable, data_conf, Vars, Stats, outDir, saveFig=True, figDir=d))]
+
+def run(figDir,nthreads):
+    jobs = []
+    for name, job in plot_jobs(figDir):
+        os.makedirs(os.path.join(figDir, name))
+        jobs.append((job, os.path.join(figDir, name)))
+    t0 = time.perf_counter()
+    if nthreads == 1:
+        for job, d in jobs:
+            job(d)
+    else:
+        with ThreadPoolExecutor(nthreads) as executor:
+            for future in [executor.submit(job, d) for job, d in jobs]:
+                future.result()
+    return time.perf_counter() - t0
+
+with tempfile.TemporaryDirectory() as tmpDir:
+
+    serDir = os.path.join(tmpDir, 'sequencial')
+    thrDir = os.path.join(tmpDir, 'threads')
+
+    t_ser = run(serDir, 1)
+
+    rc = dict(mpl.rcParams)
+
+    t_thr = run(thrDir, workers)
+
+    nfigs = 0
+    diffs = []
+
+    for name, job in plot_jobs(tmpDir):
+        for fname in sorted(os.listdir(os.path.join(serDir, name))):
+            nfigs += 1
+            if not filecmp.cmp(os.path.join(serDir, name, fname), os.path.join(thrDir, name, fname), shallow=False):
+                diffs.append(fname)
+
+print('{:<28s}{:>10s}'.format('', 'tempo (s)'))
+print('{:<28s}{:>10.2f}'.format('sequencial', t_ser))
+print('{:<28s}{:>10.2f}'.format(str(workers) + ' threads', t_thr))
+print('Figuras:', nfigs)
+
+failed = False
+
+if diffs:
+    print('Figuras diferentes da plotagem sequencial: ' + ', '.join(diffs))
+    failed = True
+
+changed = [key for key in rc if rc[key] != mpl.rcParams[key]]
+
+if changed:
+    print('rcParams alterados: ' + ', '.join(changed))
+    failed = True
+
+if plt.get_fignums():
+    print('Figuras abertas no pyplot: ' + str(len(plt.get_fignums())))
+    failed = True
+
+if failed:
+    sys.exit(1)
+
+print('OK')